@@ -1,20 +1,17 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from dotenv import load_dotenv, find_dotenv
 import io
-import os
-import re
-import requests
-from mcp_server.file_service import list_local_text_files, read_local_text_file
-from mcp_server.steam_service import list_owned_games, app_user_details, get_owned_count
+import time
+from mcp_server import lmstudio, metrics, singleflight, sync_service
+from mcp_server.answer import fallback_payload, sse
+from mcp_server.steam_service import all_owned_games, get_owned_count
+from mcp_server.context import PROVIDERS, context_scope, gather_context, context_to_system_prompt, estimate_tokens
+from mcp_server.intents import route_intent
 try:
-	from mcp_server.ytmusic_service import list_liked_songs_free, list_liked_songs_all
+	from mcp_server.ytmusic_service import liked_songs_all, liked_songs_page
 except Exception:
-	list_liked_songs_free = None
-	list_liked_songs_all = None
-try:
-	from mcp_server.steam_service import playtime_for_name
-except Exception:
-	playtime_for_name = None
+	liked_songs_all = None
+	liked_songs_page = None
 
 
 def _load_env_robust():
@@ -30,7 +27,6 @@ def _load_env_robust():
 	# Fallback: manually read and feed via stream with lenient encodings
 	for enc in ("utf-8-sig", "utf-16", "latin-1"):
 		try:
-			from pathlib import Path
 			cand = find_dotenv() or ".env"
 			with open(cand, "rb") as f:
 				text = f.read().decode(enc)
@@ -44,6 +40,33 @@ _load_env_robust()
 app = Flask(__name__)
 
 
+@app.before_request
+def _start_timer():
+	g.started = time.perf_counter()
+
+
+@app.before_request
+def _start_sync():
+	# On the first request, so every serving process syncs (python app.py, gunicorn
+	# workers) but not the debug reloader's watcher. HUB_SYNC=0 disables it.
+	sync_service.start_background_sync()
+
+
+@app.after_request
+def _observe_route(response):
+	rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+	metrics.ROUTE_LATENCY.observe(
+		time.perf_counter() - g.get("started", time.perf_counter()),
+		app="flask", route=rule, method=request.method, status=str(response.status_code)
+	)
+	return response
+
+
+@app.teardown_request
+def _end_timings(exc):
+	metrics.end_request_timings()
+
+
 @app.route("/", methods=["GET"]) 
 def index():
 	return render_template("index.html")
@@ -54,195 +77,116 @@ def ask():
 	user_query = request.form.get("query", "").strip()
 	if not user_query:
 		return jsonify({"error": "Query is required"}), 400
-
-	# Simple intents for local notes without LM Studio tool calls
-	lq = user_query.lower()
-	if "list" in lq and ("note" in lq or "notes" in lq):
-		files = list_local_text_files()
-		return jsonify({"answer": files})
-
-	match = re.search(r"(?:open|read|fetch)\s+([\w.-]+\.txt)", lq)
-	if match:
-		name = match.group(1)
-		try:
-			content = read_local_text_file(name)
-			return jsonify({"answer": content})
-		except Exception as e:
-			return jsonify({"error": str(e)}), 400
-
-	# Steam playtime intent by name
-	m_play = re.search(r"how (?:many|much) (?:hours|time).*(?:for|in|on)\s+(.+)$", lq)
-	if m_play and playtime_for_name is not None:
-		qname = m_play.group(1).strip().strip('?!.')
-		res = playtime_for_name(qname)
-		if isinstance(res, dict) and res.get("best_match"):
-			bm = res["best_match"]
-			return jsonify({"answer": f"You played {bm['name']} for {bm['hours']} hours ({bm['minutes']} minutes).", "details": res})
-		return jsonify(res)
-
-	# YT Music liked songs intent (free path)
-	limit_match = re.search(r"(?:first|top)\s+(\d+)", lq)
-	limit = int(limit_match.group(1)) if limit_match else 5
-	if (("liked" in lq and "song" in lq) or ("ytm" in lq and "liked" in lq and "song" in lq) or ("youtube music" in lq and "liked" in lq)):
-		if list_liked_songs_all is not None and ("all" in lq or "everything" in lq):
-			items = list_liked_songs_all()
-			return jsonify({"answer": items})
-		if list_liked_songs_free is not None:
-			items = list_liked_songs_free(limit=limit)
-			return jsonify({"answer": items})
-		return jsonify({"error": "YT Music headers not configured. Set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}), 400
-
-	# Simple intents for Steam
-	if "steam" in lq and ("games" in lq or "list" in lq):
-		if "all" in lq or "everything" in lq:
-			items = list_owned_games(limit=10000)
-			return jsonify({"answer": items})
-		limit_match2 = re.search(r"(first|top)\s+(\d+)", lq)
-		limit2 = int(limit_match2.group(2)) if limit_match2 else 25
-		items = list_owned_games(limit=limit2)
-		return jsonify({"answer": items})
-	if "user details" in lq and "appid" in lq:
-		ids = re.findall(r"\b\d{3,7}\b", lq)
-		if ids:
-			data = app_user_details(appids=",".join(ids))
-			return jsonify({"answer": data})
-
-	# Steam: count owned games
-	if ("how many" in lq and "game" in lq) or ("games do i own" in lq):
-		data = get_owned_count()
-		if isinstance(data, dict) and "count" in data:
-			return jsonify({"answer": f"You own {data['count']} games on Steam."})
-		return jsonify({"answer": data})
-
-	# GitHub repos intent by username or profile URL
-	m_gh_repos = re.search(r"github\s+(?:repos|repositories)\s+(?:for\s+)?(@?[\w-]+|https?://github\.com/([\w-]+))", lq)
-	if m_gh_repos:
-		u1 = m_gh_repos.group(1) if m_gh_repos.group(1) else ""
-		u2 = m_gh_repos.group(2) if len(m_gh_repos.groups()) > 1 else ""
-		username = (u2 or u1).lstrip('@')
-		try:
-			h = {"Accept": "application/vnd.github+json"}
-			gh_token = os.getenv("GITHUB_TOKEN")
-			if gh_token:
-				h["Authorization"] = f"token {gh_token}"
-			url = f"https://api.github.com/users/{username}/repos?per_page=100&page=1&sort=updated"
-			res = requests.get(url, headers=h, timeout=20).json()
-			items = res if isinstance(res, list) else []
-			answer = [{"name": r.get("name"), "url": r.get("html_url"), "stars": r.get("stargazers_count", 0)} for r in items]
-			return jsonify({"answer": answer})
-		except Exception as e:
-			return jsonify({"error": str(e)}), 400
-
-	# Build automatic context for the model based on available integrations
-	def gather_auto_context(prompt_text: str):
-		ctx = {}
-		# Steam context (if credentials present)
-		try:
-			steam_count = get_owned_count()
-			if isinstance(steam_count, dict) and "count" in steam_count:
-				owned = list_owned_games(limit=10000)
-				if isinstance(owned, list) and owned:
-					ordered = sorted(owned, key=lambda g: int(g.get("playtime_forever_min", 0) or 0), reverse=True)
-					ctx["steam"] = {
-						"owned_count": steam_count["count"],
-						"top_games": [
-							{"name": g.get("name"), "appid": g.get("appid"), "min": int(g.get("playtime_forever_min", 0) or 0)}
-							for g in ordered[:25]
-						]
-					}
-		except Exception:
-			pass
-
-		# YT Music context
-		try:
-			if list_liked_songs_free is not None:
-				liked_songs = list_liked_songs_free(limit=10)
-				if isinstance(liked_songs, list) and liked_songs:
-					ctx["ytmusic"] = {"liked_songs": [{"title": s.get("title"), "artist": s.get("artist"), "url": s.get("url")} for s in liked_songs]}
-		except Exception:
-			pass
-
-		# GitHub context (optional) - uses env GITHUB_USER and GITHUB_REPO if set
-		try:
-			gh_user = os.getenv("GITHUB_USER")
-			gh_repo = os.getenv("GITHUB_REPO")
-			gh_token = os.getenv("GITHUB_TOKEN")
-			if gh_user and gh_repo:
-				h = {"Accept": "application/vnd.github+json"}
-				if gh_token:
-					h["Authorization"] = f"token {gh_token}"
-				url = f"https://api.github.com/repos/{gh_user}/{gh_repo}/commits?per_page=100&page=1"
-				res = requests.get(url, headers=h, timeout=15).json()
-				if isinstance(res, list):
-					ctx["github"] = {
-						"repo": f"{gh_user}/{gh_repo}",
-						"recent_commits": [
-							{"sha": c.get("sha"), "msg": (c.get("commit", {}) or {}).get("message")}
-							for c in res[:10]
-						]
-					}
-		except Exception:
-			pass
-
-		return ctx
-
-	def context_to_system_prompt(ctx: dict) -> str:
-		if not ctx:
-			return ""
-		parts = []
-		steam = ctx.get("steam")
-		if steam:
-			parts.append(f"Steam: owned_count={steam.get('owned_count')} top_games=" + ", ".join([g.get("name") for g in steam.get("top_games", [])]))
-		ytm = ctx.get("ytmusic")
-		if ytm:
-			parts.append("YT Music liked: " + ", ".join([v.get("title") for v in ytm.get("liked_songs", [])]))
-		gh = ctx.get("github")
-		if gh:
-			parts.append(f"GitHub {gh.get('repo')} recent commits: " + "; ".join([(c.get("msg") or "").split("\n")[0][:80] for c in gh.get("recent_commits", [])]))
-		return "Context: " + " | ".join(parts)
-
-	auto_ctx = gather_auto_context(user_query)
+	# Opt-in breakdown of where the time went (form field timings=1)
+	timings = metrics.request_timings() if _form_flag("timings") else None
+
+	start = time.perf_counter()
+	routed = route_intent(user_query)
+	if timings:
+		timings.phase("route", time.perf_counter() - start)
+	if routed is not None:
+		payload, status = routed
+		if timings:
+			payload = {**payload, "timings": timings.as_dict()}
+		return jsonify(payload), status
+
+	# A repeated question is answered before any provider is consulted
+	use_cache = not _form_flag("nocache")
+	scope = context_scope(user_query)
+	if use_cache:
+		answer, cache_meta = lmstudio.recent_answer(user_query, scope)
+		if answer is not None:
+			payload = {"answer": answer, "context": {}, "context_timings": {}, "cache": cache_meta}
+			if timings:
+				payload["timings"] = timings.as_dict()
+			return jsonify(payload), 200
+
+	start = time.perf_counter()
+	auto_ctx, ctx_timings = gather_context(user_query)
 	ctx_prompt = context_to_system_prompt(auto_ctx)
+	if timings:
+		timings.phase("context", time.perf_counter() - start)
 
 	# Call LM Studio (OpenAI-compatible API) if available
-	base_url = os.getenv("LM_STUDIO_BASE_URL", "http://localhost:1234")
-	api_key = os.getenv("LM_STUDIO_API_KEY", "lm-studio")
-	model = os.getenv("LM_STUDIO_MODEL", "local-model")
-
+	start = time.perf_counter()
 	try:
-		resp = requests.post(
-			f"{base_url}/v1/chat/completions",
-			headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-			json={
-				"model": model,
-				"messages": [
-					{"role": "system", "content": "You are a helpful personal assistant."},
-					*([{ "role": "system", "content": ctx_prompt }] if ctx_prompt else []),
-					{"role": "user", "content": user_query}
-				],
-				"temperature": 0.2
-			}
-		)
-		resp.raise_for_status()
-		data = resp.json()
-		answer = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+		messages = lmstudio.build_messages(user_query, ctx_prompt)
+		answer, cache_meta = lmstudio.cached_chat(user_query, messages, use_cache=use_cache, scope=scope)
 		if not answer:
 			answer = "(No content returned from LM Studio)"
-		return jsonify({"answer": answer, "context": auto_ctx})
+		payload = {"answer": answer, "context": auto_ctx, "context_timings": ctx_timings, "cache": cache_meta}
 	except Exception as e:
-		return jsonify({
-			"answer": f"You asked: '{user_query}'.",
-			"warning": "LM Studio not reachable; returning fallback response.",
-			"error": str(e),
-			"context": auto_ctx
-		}), 200
+		payload = fallback_payload(user_query, e, auto_ctx, ctx_timings)
+	if timings:
+		timings.phase("llm", time.perf_counter() - start)
+		payload["timings"] = timings.as_dict()
+	return jsonify(payload), 200
+
+
+def _form_flag(name: str) -> bool:
+	return request.form.get(name, "").lower() in ("1", "true", "yes")
+
+
+@app.route("/ask/stream", methods=["POST"]) 
+def ask_stream():
+	"""Server-Sent Events variant of /ask.
+
+	Events: `answer` (a direct intent result, same shape as /ask), or `context`
+	followed by `token` deltas from LM Studio; then `done`. Failures end with
+	`error` carrying the /ask fallback payload.
+	"""
+	user_query = request.form.get("query", "").strip()
+	if not user_query:
+		return jsonify({"error": "Query is required"}), 400
+
+	no_cache = _form_flag("nocache")
+
+	def generate():
+		routed = route_intent(user_query)
+		if routed is not None:
+			yield sse("answer", routed[0])
+			yield sse("done", {})
+			return
+		scope = context_scope(user_query)
+		if not no_cache:
+			cached, cache_meta = lmstudio.recent_answer(user_query, scope)
+			if cached is not None:
+				yield sse("context", {"context": {}, "context_timings": {}, "cache": cache_meta})
+				yield sse("token", {"delta": cached})
+				yield sse("done", {})
+				return
+		auto_ctx, ctx_timings = gather_context(user_query)
+		messages = lmstudio.build_messages(user_query, context_to_system_prompt(auto_ctx))
+		cached, cache_meta, fp = (None, {"hit": False, "bypassed": True}, None) if no_cache else lmstudio.cache_lookup(user_query, messages)
+		yield sse("context", {"context": auto_ctx, "context_timings": ctx_timings, "cache": cache_meta})
+		if cached is not None:
+			yield sse("token", {"delta": cached})
+			yield sse("done", {})
+			return
+		try:
+			parts = []
+			for delta in lmstudio.stream_chat(messages):
+				parts.append(delta)
+				yield sse("token", {"delta": delta})
+			if fp is not None:
+				lmstudio.cache_put(user_query, fp, "".join(parts), scope)
+		except Exception as e:
+			yield sse("error", fallback_payload(user_query, e, auto_ctx, ctx_timings))
+		yield sse("done", {})
+
+	return Response(
+		stream_with_context(generate()),
+		mimetype="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	)
 
 
 # Public API proxy endpoints
 @app.route("/api/steam/owned-games", methods=["GET"]) 
 def api_steam_owned_games():
 	limit = request.args.get("limit", default=50, type=int)
-	items = list_owned_games(limit=limit)
+	fresh = request.args.get("fresh", default="", type=str).lower() in ("1", "true", "yes")
+	items = all_owned_games(fresh=fresh, limit=limit, images=False)
 	return jsonify(items)
 
 
@@ -254,23 +198,41 @@ def api_steam_owned_count():
 
 @app.route("/api/ytmusic/liked-all", methods=["GET"]) 
 def api_ytmusic_liked_all():
-	if list_liked_songs_all is None:
+	if liked_songs_all is None:
 		return jsonify({"error": "YT Music headers not configured."}), 400
-	items = list_liked_songs_all()
+	fresh = request.args.get("fresh", default="", type=str).lower() in ("1", "true", "yes")
+	page_size = request.args.get("page_size", type=int)
+	if page_size:
+		return jsonify(liked_songs_page(request.args.get("cursor") or None, page_size=page_size, fresh=fresh))
+	items = liked_songs_all(fresh=fresh)
 	return jsonify(items)
 
 
+@app.route("/metrics", methods=["GET"]) 
+def prometheus_metrics():
+	return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@app.route("/api/singleflight", methods=["GET"]) 
+def api_singleflight():
+	"""Upstream calls per group: executed vs coalesced into an identical in-flight call."""
+	return jsonify(singleflight.stats())
+
+
 @app.route("/api/context", methods=["GET"]) 
 def api_context():
 	q = request.args.get("q", default="", type=str)
-	ctx = {} if q == "" else None
-	if ctx is None:
-		ctx = {}
+	providers = request.args.get("providers", default="", type=str)
+	if providers == "all":
+		providers = list(PROVIDERS)
+	elif providers:
+		providers = [p.strip() for p in providers.split(",") if p.strip()]
+	else:
+		providers = None
 	try:
-		ctx = ctx or {}
-		def gather_auto_context_for_api(prompt_text):
-			return gather_auto_context(prompt_text)
-		return jsonify(gather_auto_context_for_api(q))
+		ctx, timings = gather_context(q, providers=providers)
+		prompt = context_to_system_prompt(ctx)
+		return jsonify({"context": ctx, "context_timings": timings, "prompt": prompt, "prompt_tokens": estimate_tokens(prompt)})
 	except Exception as e:
 		return jsonify({"error": str(e)})
 
@@ -0,0 +1,256 @@
+"""ASGI serving mode: the Flask app's routes as async Starlette handlers.
+
+Upstream calls (LM Studio, Steam) go through the async HTTP client, so a request
+waiting on them holds no thread. Intent handlers, context providers and YT Music
+(whose client library is blocking) run in worker threads.
+
+	uvicorn asgi_app:app --host 127.0.0.1 --port 5000
+"""
+import contextlib
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.middleware import Middleware
+from starlette.routing import Route
+from starlette.templating import Jinja2Templates
+
+from mcp_server.env import load_env
+
+# Before the services are imported: several read their settings at import time
+load_env()
+
+from mcp_server import async_http, lmstudio, metrics, singleflight, sync_service  # noqa: E402
+from mcp_server.answer import fallback_payload, sse  # noqa: E402
+from mcp_server.context import PROVIDERS, agather_context, context_scope, context_to_system_prompt, estimate_tokens  # noqa: E402
+from mcp_server.intents import route_intent  # noqa: E402
+from mcp_server.steam_service import aall_owned_games, aget_owned_count  # noqa: E402
+try:
+	from mcp_server.ytmusic_service import liked_songs_all, liked_songs_page
+except Exception:
+	liked_songs_all = None
+	liked_songs_page = None
+
+
+templates = Jinja2Templates(directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates"))
+
+
+def _flag(value) -> bool:
+	return (value or "").lower() in ("1", "true", "yes")
+
+
+def _int(value, default=None):
+	try:
+		return int(value)
+	except (TypeError, ValueError):
+		return default
+
+
+async def index(request):
+	return templates.TemplateResponse(request, "index.html")
+
+
+async def ask(request):
+	form = await request.form()
+	user_query = (form.get("query") or "").strip()
+	if not user_query:
+		return JSONResponse({"error": "Query is required"}, status_code=400)
+
+	timings = metrics.request_timings() if _flag(form.get("timings")) else None
+
+	start = time.perf_counter()
+	routed = await run_in_threadpool(route_intent, user_query)
+	if timings:
+		timings.phase("route", time.perf_counter() - start)
+	if routed is not None:
+		payload, status = routed
+		if timings:
+			payload = {**payload, "timings": timings.as_dict()}
+		return JSONResponse(payload, status_code=status)
+
+	# A repeated question is answered before any provider is consulted
+	use_cache = not _flag(form.get("nocache"))
+	scope = await run_in_threadpool(context_scope, user_query)
+	if use_cache:
+		answer, cache_meta = await run_in_threadpool(lmstudio.recent_answer, user_query, scope)
+		if answer is not None:
+			payload = {"answer": answer, "context": {}, "context_timings": {}, "cache": cache_meta}
+			if timings:
+				payload["timings"] = timings.as_dict()
+			return JSONResponse(payload)
+
+	start = time.perf_counter()
+	auto_ctx, ctx_timings = await agather_context(user_query)
+	ctx_prompt = context_to_system_prompt(auto_ctx)
+	if timings:
+		timings.phase("context", time.perf_counter() - start)
+	start = time.perf_counter()
+	try:
+		messages = lmstudio.build_messages(user_query, ctx_prompt)
+		answer, cache_meta = await lmstudio.acached_chat(user_query, messages, use_cache=use_cache, scope=scope)
+		if not answer:
+			answer = "(No content returned from LM Studio)"
+		payload = {"answer": answer, "context": auto_ctx, "context_timings": ctx_timings, "cache": cache_meta}
+	except Exception as e:
+		payload = fallback_payload(user_query, e, auto_ctx, ctx_timings)
+	if timings:
+		timings.phase("llm", time.perf_counter() - start)
+		payload["timings"] = timings.as_dict()
+	return JSONResponse(payload)
+
+
+async def ask_stream(request):
+	"""Server-Sent Events variant of /ask; same events as the Flask route."""
+	form = await request.form()
+	user_query = (form.get("query") or "").strip()
+	if not user_query:
+		return JSONResponse({"error": "Query is required"}, status_code=400)
+	no_cache = _flag(form.get("nocache"))
+
+	async def generate():
+		routed = await run_in_threadpool(route_intent, user_query)
+		if routed is not None:
+			yield sse("answer", routed[0])
+			yield sse("done", {})
+			return
+		scope = await run_in_threadpool(context_scope, user_query)
+		if not no_cache:
+			cached, cache_meta = await run_in_threadpool(lmstudio.recent_answer, user_query, scope)
+			if cached is not None:
+				yield sse("context", {"context": {}, "context_timings": {}, "cache": cache_meta})
+				yield sse("token", {"delta": cached})
+				yield sse("done", {})
+				return
+		auto_ctx, ctx_timings = await agather_context(user_query)
+		messages = lmstudio.build_messages(user_query, context_to_system_prompt(auto_ctx))
+		if no_cache:
+			cached, cache_meta, fp = None, {"hit": False, "bypassed": True}, None
+		else:
+			cached, cache_meta, fp = await run_in_threadpool(lmstudio.cache_lookup, user_query, messages)
+		yield sse("context", {"context": auto_ctx, "context_timings": ctx_timings, "cache": cache_meta})
+		if cached is not None:
+			yield sse("token", {"delta": cached})
+			yield sse("done", {})
+			return
+		try:
+			parts = []
+			async for delta in lmstudio.astream_chat(messages):
+				parts.append(delta)
+				yield sse("token", {"delta": delta})
+			if fp is not None:
+				await run_in_threadpool(lmstudio.cache_put, user_query, fp, "".join(parts), scope)
+		except Exception as e:
+			yield sse("error", fallback_payload(user_query, e, auto_ctx, ctx_timings))
+		yield sse("done", {})
+
+	return StreamingResponse(
+		generate(),
+		media_type="text/event-stream",
+		headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+	)
+
+
+async def api_steam_owned_games(request):
+	limit = _int(request.query_params.get("limit"), 50)
+	items = await aall_owned_games(fresh=_flag(request.query_params.get("fresh")), limit=limit, images=False)
+	return JSONResponse(items)
+
+
+async def api_steam_owned_count(request):
+	return JSONResponse(await aget_owned_count())
+
+
+async def api_ytmusic_liked_all(request):
+	if liked_songs_all is None:
+		return JSONResponse({"error": "YT Music headers not configured."}, status_code=400)
+	fresh = _flag(request.query_params.get("fresh"))
+	page_size = _int(request.query_params.get("page_size"))
+	if page_size:
+		cursor = request.query_params.get("cursor") or None
+		return JSONResponse(await run_in_threadpool(liked_songs_page, cursor, page_size=page_size, fresh=fresh))
+	return JSONResponse(await run_in_threadpool(liked_songs_all, fresh=fresh))
+
+
+async def prometheus_metrics(request):
+	return Response(metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+async def api_singleflight(request):
+	return JSONResponse(singleflight.stats())
+
+
+async def api_context(request):
+	q = request.query_params.get("q", "")
+	providers = request.query_params.get("providers", "")
+	if providers == "all":
+		providers = list(PROVIDERS)
+	elif providers:
+		providers = [p.strip() for p in providers.split(",") if p.strip()]
+	else:
+		providers = None
+	try:
+		ctx, timings = await agather_context(q, providers=providers)
+		prompt = context_to_system_prompt(ctx)
+		return JSONResponse({"context": ctx, "context_timings": timings, "prompt": prompt, "prompt_tokens": estimate_tokens(prompt)})
+	except Exception as e:
+		return JSONResponse({"error": str(e)})
+
+
+class RouteMetrics:
+	"""ASGI middleware recording per-route latency (to response start for streams)."""
+
+	def __init__(self, app):
+		self.app = app
+
+	async def __call__(self, scope, receive, send):
+		if scope["type"] != "http":
+			return await self.app(scope, receive, send)
+		start = time.perf_counter()
+
+		async def send_wrapper(message):
+			if message["type"] == "http.response.start":
+				metrics.ROUTE_LATENCY.observe(
+					time.perf_counter() - start,
+					app="asgi", route=getattr(scope.get("route"), "path", "unmatched"), method=scope["method"],
+					status=str(message["status"])
+				)
+			await send(message)
+		await self.app(scope, receive, send_wrapper)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+	sync_service.start_background_sync()
+	try:
+		yield
+	finally:
+		await async_http.aclose()
+
+
+app = Starlette(
+	routes=[
+		Route("/", index),
+		Route("/ask", ask, methods=["POST"]),
+		Route("/ask/stream", ask_stream, methods=["POST"]),
+		Route("/api/steam/owned-games", api_steam_owned_games),
+		Route("/api/steam/owned-count", api_steam_owned_count),
+		Route("/api/ytmusic/liked-all", api_ytmusic_liked_all),
+		Route("/metrics", prometheus_metrics),
+		Route("/api/singleflight", api_singleflight),
+		Route("/api/context", api_context),
+	],
+	middleware=[Middleware(RouteMetrics)],
+	lifespan=lifespan
+)
+
+
+if __name__ == "__main__":
+	import uvicorn
+	uvicorn.run(
+		"asgi_app:app",
+		host=os.getenv("HUB_HOST", "127.0.0.1"),
+		port=int(os.getenv("HUB_PORT", "5000")),
+		workers=int(os.getenv("HUB_WORKERS", "1"))
+	)
@@ -0,0 +1 @@
+"""Offline benchmarks and local stub upstreams for AI Personal Hub."""
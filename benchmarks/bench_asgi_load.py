@@ -0,0 +1,167 @@
+"""Load-test /ask on the Flask (WSGI) app and the ASGI app against a stub LM Studio.
+
+The stub answers each chat completion after `--latency-ms`, like a model
+generating a reply. The WSGI server gets a fixed pool of `--threads` workers (as
+a threaded production WSGI server would); the ASGI app runs on one uvicorn event
+loop. Both are driven with `--concurrency` simultaneous clients. The stub, the
+server under test and the load generator each run in their own process.
+
+	python -m benchmarks.bench_asgi_load --requests 400 --concurrency 64 --latency-ms 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+
+
+def _chat_route(latency: float):
+	def route(handler):
+		handler.read_body()
+		time.sleep(latency)
+		return 200, {}, {"choices": [{"message": {"role": "assistant", "content": "stub answer"}}]}
+	return route
+
+
+def _configure_env(stub_url: str):
+	# Must run before the app modules are imported: they read these at import time
+	os.environ["LM_STUDIO_BASE_URL"] = stub_url
+	os.environ["LLM_CACHE"] = "0"
+	os.environ["HUB_SYNC"] = "0"
+	os.environ["HTTP_HOST_CONCURRENCY"] = "10000"
+	os.environ.setdefault("HUB_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+
+
+def _serve_stub(latency_ms: float):
+	server = StubServer({"/v1/chat/completions": _chat_route(latency_ms / 1000)}).start()
+	print(server.url, flush=True)
+	threading.Event().wait()
+
+
+def _serve_wsgi(threads: int):
+	import logging
+	from werkzeug.serving import BaseWSGIServer
+	from app import app
+
+	class PooledWSGIServer(BaseWSGIServer):
+		request_queue_size = 1024
+
+		def __init__(self, *args, **kwargs):
+			super().__init__(*args, **kwargs)
+			self._pool = ThreadPoolExecutor(max_workers=threads)
+
+		def process_request(self, request, client_address):
+			self._pool.submit(self._process, request, client_address)
+
+		def _process(self, request, client_address):
+			try:
+				self.finish_request(request, client_address)
+			except Exception:
+				self.handle_error(request, client_address)
+			finally:
+				self.shutdown_request(request)
+
+	logging.getLogger("werkzeug").setLevel(logging.WARNING)
+	server = PooledWSGIServer("127.0.0.1", 0, app)
+	print(f"http://127.0.0.1:{server.server_port}", flush=True)
+	server.serve_forever()
+
+
+def _serve_asgi():
+	import socket
+	import uvicorn
+	from asgi_app import app
+
+	sock = socket.socket()
+	sock.bind(("127.0.0.1", 0))
+	print(f"http://127.0.0.1:{sock.getsockname()[1]}", flush=True)
+	uvicorn.Server(uvicorn.Config(app, log_level="warning", backlog=1024)).run(sockets=[sock])
+
+
+def _spawn(*args):
+	"""Start a role of this script in its own process (own GIL); returns (process, url)."""
+	proc = subprocess.Popen([sys.executable, "-m", "benchmarks.bench_asgi_load", *args], stdout=subprocess.PIPE, text=True)
+	return proc, proc.stdout.readline().strip()
+
+
+def _wait_ready(url: str):
+	for _ in range(200):
+		try:
+			httpx.get(f"{url}/api/context", timeout=1)
+			return
+		except httpx.TransportError:
+			time.sleep(0.05)
+
+
+async def _load(url: str, total: int, concurrency: int):
+	latencies = []
+	errors = 0
+	remaining = iter(range(total))
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+	async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+		async def worker():
+			nonlocal errors
+			for _ in remaining:
+				start = time.perf_counter()
+				resp = await client.post(f"{url}/ask", data={"query": "tell me a joke"})
+				latencies.append(time.perf_counter() - start)
+				if resp.status_code != 200 or resp.json().get("answer") != "stub answer":
+					errors += 1
+		start = time.perf_counter()
+		await asyncio.gather(*(worker() for _ in range(concurrency)))
+		elapsed = time.perf_counter() - start
+	latencies.sort()
+	return {
+		"requests": total,
+		"errors": errors,
+		"total_s": round(elapsed, 2),
+		"req_per_s": round(total / elapsed, 1),
+		"p50_ms": round(statistics.median(latencies) * 1000, 1),
+		"p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1)
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--requests", type=int, default=400)
+	parser.add_argument("--concurrency", type=int, default=64)
+	parser.add_argument("--latency-ms", type=float, default=500)
+	parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads")
+	parser.add_argument("--role", choices=["stub", "wsgi", "asgi"], help=argparse.SUPPRESS)
+	parser.add_argument("--upstream", help=argparse.SUPPRESS)
+	args = parser.parse_args()
+	if args.role == "stub":
+		return _serve_stub(args.latency_ms)
+	if args.role:
+		_configure_env(args.upstream)
+		return _serve_wsgi(args.threads) if args.role == "wsgi" else _serve_asgi()
+
+	stub, upstream = _spawn("--role", "stub", "--latency-ms", str(args.latency_ms))
+	results = []
+	try:
+		for label, role in ((f"flask wsgi ({args.threads} threads)", "wsgi"), ("starlette asgi (uvicorn)", "asgi")):
+			proc, url = _spawn("--role", role, "--upstream", upstream, "--threads", str(args.threads))
+			try:
+				_wait_ready(url)
+				results.append({"server": label, **asyncio.run(_load(url, args.requests, args.concurrency))})
+			finally:
+				proc.terminate()
+				proc.wait()
+	finally:
+		stub.terminate()
+		stub.wait()
+	print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+	main()
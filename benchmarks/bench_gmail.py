@@ -0,0 +1,156 @@
+"""Benchmark Gmail fetches against a local fake of the Gmail REST and batch endpoints.
+
+Compares the previous path (rebuild the service, list, then one messages.get per
+message) with `email_service.list_emails` (cached service, one list call, one
+batch call per GMAIL_BATCH_SIZE messages with format=metadata). Reports upstream
+HTTP requests and wall time per fetch.
+
+	python -m benchmarks.bench_gmail --emails 100 --latency-ms 30
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from email.parser import BytesParser
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.stub_server import StubServer
+
+
+BOUNDARY = "batch_stub_boundary"
+
+
+def make_mailbox(n: int):
+	return [{
+		"id": f"m{i:08x}",
+		"threadId": f"t{i // 3:08x}",
+		"snippet": f"Snippet for message {i} " + "lorem ipsum " * 8,
+		"internalDate": str(1735689600000 - i * 60000),
+		"labelIds": ["INBOX"],
+		"payload": {"headers": [
+			{"name": "From", "value": f"Sender {i % 17} <s{i % 17}@example.com>"},
+			{"name": "Subject", "value": f"Subject {i}"},
+			{"name": "Date", "value": "Wed, 1 Jan 2025 00:00:00 +0000"},
+			{"name": "Received", "value": "by stub " * 20}
+		], "body": {"data": "x" * 2000}}
+	} for i in range(n)]
+
+
+def fake_gmail(mailbox, latency_ms: float):
+	by_id = {m["id"]: m for m in mailbox}
+
+	def sleep():
+		if latency_ms:
+			time.sleep(latency_ms / 1000)
+
+	def message(msg_id: str, query: dict):
+		m = by_id.get(msg_id)
+		if m is None:
+			return 404, {"error": {"code": 404, "message": "Not Found"}}
+		if query.get("format", ["full"])[0] == "metadata":
+			m = {k: v for k, v in m.items() if k != "payload"}
+			m["payload"] = {"headers": [h for h in by_id[msg_id]["payload"]["headers"] if h["name"] in query.get("metadataHeaders", [])]}
+		return 200, m
+
+	def list_route(handler):
+		sleep()
+		q = parse_qs(urlsplit(handler.path).query)
+		start = int(q.get("pageToken", ["0"])[0])
+		size = min(int(q.get("maxResults", ["100"])[0]), 500)
+		page = mailbox[start:start + size]
+		body = {"messages": [{"id": m["id"], "threadId": m["threadId"]} for m in page], "resultSizeEstimate": len(mailbox)}
+		if start + size < len(mailbox):
+			body["nextPageToken"] = str(start + size)
+		return 200, {}, body
+
+	def get_route(handler):
+		sleep()
+		parts = urlsplit(handler.path)
+		status, body = message(parts.path.rsplit("/", 1)[1], parse_qs(parts.query))
+		return status, {}, body
+
+	def batch_route(handler):
+		sleep()
+		body = handler.read_body()
+		msg = BytesParser().parsebytes(b"Content-Type: " + handler.headers["Content-Type"].encode() + b"\r\n\r\n" + body)
+		out = []
+		for part in msg.get_payload():
+			request_line = part.get_payload().split("\n", 1)[0]
+			parts = urlsplit(request_line.split(" ")[1])
+			status, payload = message(parts.path.rsplit("/", 1)[1], parse_qs(parts.query))
+			content_id = part["Content-ID"].strip("<>")
+			out.append(
+				f"--{BOUNDARY}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+				f"HTTP/1.1 {status} OK\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(payload)}\r\n"
+			)
+		out.append(f"--{BOUNDARY}--\r\n")
+		return 200, {"Content-Type": f"multipart/mixed; boundary={BOUNDARY}"}, "".join(out)
+
+	return StubServer(
+		routes={"/gmail/v1/users/me/messages": list_route, "/batch/gmail/v1": batch_route},
+		prefix_routes=[("/gmail/v1/users/me/messages/", get_route)]
+	)
+
+
+def per_message_fetch(max_results: int):
+	"""The pre-change path: build the service on every call, then N+1 sequential requests."""
+	from googleapiclient.discovery import build
+	from google.oauth2.credentials import Credentials
+	from mcp_server import email_service
+	creds = Credentials.from_authorized_user_file(email_service._token_file(), email_service.SCOPES)
+	service = build("gmail", "v1", credentials=creds, client_options={"api_endpoint": email_service.API_ENDPOINT})
+	results = service.users().messages().list(userId="me", maxResults=max_results).execute()
+	emails = []
+	for msg in results.get("messages", []):
+		m = service.users().messages().get(userId="me", id=msg["id"]).execute()
+		emails.append({"id": msg["id"], "snippet": m.get("snippet", "")})
+	return emails
+
+
+def _measure(server, fn, rounds: int):
+	server.reset_stats()
+	samples = []
+	for _ in range(rounds):
+		t = time.perf_counter()
+		emails = fn()
+		samples.append((time.perf_counter() - t) * 1000)
+	return {
+		"emails": len(emails),
+		"http_requests_per_fetch": server.requests / rounds,
+		"mean_ms": round(sum(samples) / len(samples), 1),
+		"best_ms": round(min(samples), 1)
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--emails", type=int, default=100)
+	parser.add_argument("--rounds", type=int, default=5)
+	parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated latency per upstream request")
+	args = parser.parse_args()
+
+	with fake_gmail(make_mailbox(max(args.emails, 1000)), args.latency_ms) as server, tempfile.TemporaryDirectory() as tmp:
+		token = os.path.join(tmp, "token.json")
+		with open(token, "w", encoding="utf-8") as f:
+			json.dump({"token": "stub", "refresh_token": "stub", "client_id": "stub", "client_secret": "stub", "expiry": "2099-01-01T00:00:00Z"}, f)
+		os.environ["GMAIL_TOKEN_FILE"] = token
+		os.environ["GMAIL_API_ENDPOINT"] = server.url + "/"
+		from mcp_server import email_service
+
+		before = _measure(server, lambda: per_message_fetch(args.emails), args.rounds)
+		after = _measure(server, lambda: email_service.list_emails(max_results=args.emails)["emails"], args.rounds)
+		sample = email_service.list_emails(max_results=1)["emails"][0]
+
+	print(json.dumps({
+		"emails": args.emails,
+		"latency_ms": args.latency_ms,
+		"batch_size": email_service.BATCH_SIZE,
+		"per_message_gets": before,
+		"batched_metadata": after,
+		"sample": sample
+	}, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,46 @@
+"""Compare bare `requests.get` with the pooled `mcp_server.http_client`.
+
+Runs both against a local stub upstream and reports wall time and how many TCP
+connections (handshakes) each approach opened.
+
+	python -m benchmarks.bench_http_pool --calls 200
+"""
+import argparse
+import json
+import time
+
+import requests
+
+from mcp_server import http_client
+from benchmarks.stub_server import StubServer, json_route
+
+
+def _run(label, fn, server, calls):
+	server.reset_stats()
+	start = time.perf_counter()
+	for _ in range(calls):
+		fn(f"{server.url}/api/ping").json()
+	elapsed = time.perf_counter() - start
+	return {
+		"client": label,
+		"calls": calls,
+		"connections": server.connections,
+		"total_ms": round(elapsed * 1000, 1),
+		"per_call_ms": round(elapsed * 1000 / calls, 3)
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--calls", type=int, default=200)
+	args = parser.parse_args()
+	with StubServer({"/api/ping": json_route({"ok": True})}) as server:
+		results = [
+			_run("requests.get", lambda url: requests.get(url, timeout=5), server, args.calls),
+			_run("http_client.get", http_client.get, server, args.calls),
+		]
+	print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+	main()
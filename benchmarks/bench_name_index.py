@@ -0,0 +1,132 @@
+"""Benchmark fuzzy game-name lookups on a synthetic library.
+
+Compares `NameIndex.search` against the previous approach (score every game,
+full sort) and reports build time plus lookup latency percentiles.
+
+	python -m benchmarks.bench_name_index --games 10000 --queries 2000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from mcp_server.name_index import NameIndex
+
+
+WORDS = (
+	"dark souls shadow legend war dragon star space hollow knight craft city empire "
+	"tales zero rogue dead light age quest sim night fall rise lost edge ghost iron "
+	"blood storm farm island survival racing super ultimate chronicles tactics planet "
+	"kingdom heroes wild hunter witcher portal counter strike rocket league stardew valley"
+).split()
+SYLLABLES = "ka ro mi ven tor al is un bra dor fel gri hal jus kor lem nav oth pry qua sil tem vor wex yl zan".split()
+SUFFIXES = ["", "", "", " 2", " 3", " ii", " remastered", ": definitive edition", " goty", "™"]
+
+
+def make_vocabulary(size: int, rng):
+	"""Common title words plus invented proper nouns, like a real library."""
+	vocab = set(WORDS)
+	while len(vocab) < size:
+		vocab.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))))
+	return sorted(vocab)
+
+
+def make_library(n: int, seed: int = 7, vocabulary: int = 3000):
+	rng = random.Random(seed)
+	vocab = make_vocabulary(vocabulary, rng)
+	names = set()
+	while len(names) < n:
+		# Half the words come from the small common set, half are proper nouns
+		words = [rng.choice(WORDS) if rng.random() < 0.5 else rng.choice(vocab) for _ in range(rng.randint(1, 4))]
+		names.add(" ".join(w.capitalize() for w in words) + rng.choice(SUFFIXES))
+	return sorted(names)
+
+
+def make_queries(names, n: int, seed: int = 11):
+	rng = random.Random(seed)
+	queries = []
+	for _ in range(n):
+		name = rng.choice(names)
+		kind = rng.random()
+		if kind < 0.3:
+			queries.append(name)
+		elif kind < 0.6:
+			words = name.split()
+			queries.append(" ".join(words[: max(1, len(words) - 1)]).lower())
+		else:
+			chars = list(name.lower())
+			i = rng.randrange(len(chars))
+			chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+			queries.append("".join(chars))
+	return queries
+
+
+def linear_search(names, query: str, k: int = 5):
+	"""The pre-index approach: score every name, then sort the whole list."""
+	ql = query.strip().lower()
+
+	def score(name: str) -> int:
+		n = (name or "").lower()
+		if ql == n:
+			return 100
+		if ql in n:
+			return 80
+		return 50 + len(set(ql.split()) & set(n.split()))
+	return sorted(names, key=score, reverse=True)[:k]
+
+
+def _percentiles(samples_us):
+	samples_us = sorted(samples_us)
+	return {
+		"p50_us": round(statistics.median(samples_us), 1),
+		"p99_us": round(samples_us[int(len(samples_us) * 0.99) - 1], 1),
+		"mean_us": round(statistics.fmean(samples_us), 1)
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--games", type=int, default=10000)
+	parser.add_argument("--queries", type=int, default=2000)
+	parser.add_argument("--vocabulary", type=int, default=3000, help="distinct words used to build names")
+	parser.add_argument("--repeat", type=int, default=3, help="passes over the queries; each keeps its fastest time")
+	args = parser.parse_args()
+
+	names = make_library(args.games, vocabulary=args.vocabulary)
+	queries = make_queries(names, args.queries)
+
+	start = time.perf_counter()
+	index = NameIndex(names)
+	build_ms = (time.perf_counter() - start) * 1000
+
+	# The fastest of a few passes per query, so scheduler noise does not pose as tail latency
+	indexed = [float("inf")] * len(queries)
+	exact_hits = 0
+	for _ in range(max(1, args.repeat)):
+		exact_hits = 0
+		for n, q in enumerate(queries):
+			t = time.perf_counter()
+			hits = index.search(q, k=5)
+			indexed[n] = min(indexed[n], (time.perf_counter() - t) * 1e6)
+			if q in names and hits and names[hits[0][0]] == q:
+				exact_hits += 1
+
+	linear = []
+	for q in queries[:200]:
+		t = time.perf_counter()
+		linear_search(names, q)
+		linear.append((time.perf_counter() - t) * 1e6)
+
+	print(json.dumps({
+		"games": len(names),
+		"queries": len(queries),
+		"index_build_ms": round(build_ms, 1),
+		"indexed": _percentiles(indexed),
+		"linear_sort": _percentiles(linear),
+		"exact_queries_ranked_first": f"{exact_hits}/{sum(1 for q in queries if q in names)}"
+	}, indent=2))
+
+
+if __name__ == "__main__":
+	main()
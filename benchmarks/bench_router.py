@@ -0,0 +1,132 @@
+"""Benchmark intent routing latency and accuracy over a labelled query corpus.
+
+Compares `mcp_server.intents.router` with the previous linear if/regex chain
+(reproduced below as `legacy_classify`). Only classification is timed; no
+handler runs, so nothing touches the network.
+
+	python -m benchmarks.bench_router --repeat 200
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+
+from mcp_server.intents import router
+
+
+# (query, expected intent; None = should fall through to the LLM)
+CORPUS = [
+	("search notes for kubernetes", "notes.search"),
+	("find meeting agenda in my notes", "notes.search"),
+	("search my notes about steam deck setup", "notes.search"),
+	("find in notes budget 2024", "notes.search"),
+	("list my notes", "notes.list"),
+	("show all notes", "notes.list"),
+	("list notes", "notes.list"),
+	("what notes do I have?", "notes.list"),
+	("open todo.txt", "notes.read"),
+	("read ideas.txt lines 10-20", "notes.read"),
+	("last 20 lines of journal.txt", "notes.read"),
+	("fetch shopping-list.txt", "notes.read"),
+	("show me first 5 lines of log.txt", "notes.read"),
+	("how many hours do I have in Hollow Knight", "steam.playtime"),
+	("how much time did I spend on Stardew Valley?", "steam.playtime"),
+	("how many hours have I played for Portal 2 on steam", "steam.playtime"),
+	("how many hours in total on Dark Souls III", "steam.playtime"),
+	("how many games do I own", "steam.count"),
+	("how many steam games do I have", "steam.count"),
+	("which games do i own? just the count", "steam.count"),
+	("count my steam games", "steam.count"),
+	("list my steam games", "steam.games"),
+	("show steam library", "steam.games"),
+	("steam games top 10", "steam.games"),
+	("list all my steam games", "steam.games"),
+	("list my steam games and save them to my notes", "steam.games"),
+	("show me my steam list of notes-worthy games", "steam.games"),
+	("user details for appid 620 and 440", "steam.user_details"),
+	("get user details appids 570", "steam.user_details"),
+	("list 5 of my liked songs on YouTube Music", "ytm.liked"),
+	("show my liked songs", "ytm.liked"),
+	("songs I liked recently", "ytm.liked"),
+	("ytm liked top 20", "ytm.liked"),
+	("all my liked songs", "ytm.liked"),
+	("github repos for Harsh-1807", "github.repos"),
+	("github repositories https://github.com/torvalds", "github.repos"),
+	("github repos @octocat", "github.repos"),
+	("what is the capital of France?", None),
+	("summarize my last 5 emails", None),
+	("which steam game should I play tonight given my mood", None),
+	("write a haiku about notes and music", None),
+	("explain how a hash map works", None),
+	("recommend songs like the ones I liked", "ytm.liked"),
+	("how do I install a mod for skyrim", None),
+	("tell me something about my github activity", None),
+	("what did I write about in my notes yesterday", None),
+]
+
+
+def legacy_classify(user_query: str):
+	"""Intent the pre-router chain in app.py would have picked (ordering preserved)."""
+	lq = user_query.lower()
+	if re.search(r"(?:search|find)\s+(?:in\s+)?(?:my\s+)?notes?\s+(?:for\s+|about\s+)?(.+)$", lq) or \
+		re.search(r"(?:search|find)\s+(.+?)\s+in\s+(?:my\s+)?notes?$", lq):
+		return "notes.search"
+	if "list" in lq and ("note" in lq or "notes" in lq):
+		return "notes.list"
+	if re.search(r"(?:open|read|fetch)\s+([\w.-]+\.txt)", lq) or \
+		re.search(r"(?:first|last|head|tail)\s+\d+\s+lines?\s+(?:of|from|in)\s+([\w.-]+\.txt)", lq):
+		return "notes.read"
+	if re.search(r"how (?:many|much) (?:hours|time).*(?:for|in|on)\s+(.+)$", lq):
+		return "steam.playtime"
+	re.search(r"(?:first|top)\s+(\d+)", lq)
+	if (("liked" in lq and "song" in lq) or ("ytm" in lq and "liked" in lq and "song" in lq) or ("youtube music" in lq and "liked" in lq)):
+		return "ytm.liked"
+	if "steam" in lq and ("games" in lq or "list" in lq):
+		return "steam.games"
+	if "user details" in lq and "appid" in lq:
+		return "steam.user_details"
+	if ("how many" in lq and "game" in lq) or ("games do i own" in lq):
+		return "steam.count"
+	if re.search(r"github\s+(?:repos|repositories)\s+(?:for\s+)?(@?[\w-]+|https?://github\.com/([\w-]+))", lq):
+		return "github.repos"
+	return None
+
+
+def router_classify(user_query: str):
+	matches = router.match(user_query)
+	return matches[0][1].name if matches else None
+
+
+def _run(classify, repeat: int):
+	samples = []
+	for _ in range(repeat):
+		for q, _ in CORPUS:
+			t = time.perf_counter()
+			classify(q)
+			samples.append((time.perf_counter() - t) * 1e6)
+	samples.sort()
+	wrong = [{"query": q, "expected": want, "got": got} for q, want in CORPUS if (got := classify(q)) != want]
+	return {
+		"accuracy": f"{len(CORPUS) - len(wrong)}/{len(CORPUS)}",
+		"false_llm_fallthrough": sum(1 for w in wrong if w["got"] is None),
+		"p50_us": round(statistics.median(samples), 2),
+		"p99_us": round(samples[int(len(samples) * 0.99) - 1], 2),
+		"mean_us": round(statistics.fmean(samples), 2),
+		"misrouted": wrong
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--repeat", type=int, default=200)
+	args = parser.parse_args()
+	print(json.dumps({
+		"queries": len(CORPUS),
+		"legacy_chain": _run(legacy_classify, args.repeat),
+		"router": _run(router_classify, args.repeat)
+	}, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,75 @@
+"""Burst of identical concurrent fetches with and without single-flight coalescing.
+
+`--clients` threads ask for the owned-games list (cold cache) and for the same
+GitHub commits page at once, against a stub upstream with `--latency-ms`
+per response. Reports upstream requests made and wall time for each mode.
+
+	python -m benchmarks.bench_singleflight --clients 32 --latency-ms 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.stub_server import StubServer
+
+
+def _slow(payload, latency: float):
+	def route(handler):
+		time.sleep(latency)
+		return 200, {}, payload
+	return route
+
+
+def _burst(clients: int, fn):
+	barrier = threading.Barrier(clients)
+
+	def run():
+		barrier.wait()
+		fn()
+	threads = [threading.Thread(target=run) for _ in range(clients)]
+	start = time.perf_counter()
+	for t in threads:
+		t.start()
+	for t in threads:
+		t.join()
+	return round((time.perf_counter() - start) * 1000, 1)
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--clients", type=int, default=32)
+	parser.add_argument("--latency-ms", type=float, default=100)
+	args = parser.parse_args()
+	os.environ.update(STEAM_API_KEY="bench", STEAM_ID="1", HUB_SYNC="0", HTTP_HOST_CONCURRENCY="1000")
+	os.environ.setdefault("HUB_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+	from mcp_server import github_fetch, singleflight, steam_service
+
+	latency = args.latency_ms / 1000
+	games = {"response": {"game_count": 2, "games": [{"appid": 1, "name": "A"}, {"appid": 2, "name": "B"}]}}
+	commits = [{"sha": str(i), "commit": {"message": f"commit {i}"}} for i in range(30)]
+	with StubServer({"/owned": _slow(games, latency), "/commits": _slow(commits, latency)}) as upstream:
+		steam_service.OWNED_GAMES_URL = f"{upstream.url}/owned"
+		commits_url = f"{upstream.url}/commits"
+		params = steam_service._owned_params("bench", "1", True)
+		cases = [
+			("steam owned games", lambda: steam_service._get(steam_service.OWNED_GAMES_URL, params), lambda: (
+				steam_service.invalidate_owned_games(), steam_service.owned_library())),
+			("github commits page", lambda: github_fetch.http_client.get(commits_url, params={"page": 1}).json(),
+				lambda: github_fetch.fetch(commits_url, {"page": 1}, headers={})),
+		]
+		results = []
+		for label, direct, coalesced in cases:
+			row = {"fetch": label, "clients": args.clients}
+			for mode, fn in (("direct", direct), ("singleflight", coalesced)):
+				upstream.reset_stats()
+				ms = _burst(args.clients, fn)
+				row[mode] = {"upstream_requests": upstream.requests, "wall_ms": ms}
+			results.append(row)
+	print(json.dumps({"results": results, "singleflight": singleflight.stats()}, indent=2))
+
+
+if __name__ == "__main__":
+	main()
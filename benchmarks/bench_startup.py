@@ -0,0 +1,127 @@
+"""Cold start of the MCP server as LM Studio sees it, plus an import-time report.
+
+Each run spawns `python -m mcp_server.server` over stdio and times the
+initialize, tools/list and first tools/call responses from process start. The
+interpreter and the `mcp` framework import are measured alone as the floor.
+`--profile` adds the slowest imports from `python -X importtime` and whether
+the heavy client libraries were loaded at startup.
+
+	python -m benchmarks.bench_startup --runs 5 --profile 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Client libraries the server should only import on first use
+DEFERRED = ("googleapiclient", "google.oauth2", "requests", "ytmusicapi")
+
+
+def _env():
+	env = dict(os.environ, HUB_SYNC="0", PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+	env.setdefault("HUB_DB_PATH", os.path.join(tempfile.mkdtemp(), "bench.db"))
+	return env
+
+
+def _wall(code: str, cwd: str) -> float:
+	start = time.perf_counter()
+	subprocess.run([sys.executable, "-c", code], cwd=cwd, env=_env(), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+	return (time.perf_counter() - start) * 1000
+
+
+def _handshake(cwd: str):
+	"""ms from spawn to the initialize, tools/list and first tools/call responses."""
+	start = time.perf_counter()
+	proc = subprocess.Popen(
+		[sys.executable, "-m", "mcp_server.server"], cwd=cwd, env=_env(), text=True, bufsize=1,
+		stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+	)
+
+	def send(message):
+		proc.stdin.write(json.dumps({"jsonrpc": "2.0", **message}) + "\n")
+		proc.stdin.flush()
+
+	def reply(msg_id):
+		while True:
+			line = proc.stdout.readline()
+			if not line:
+				raise RuntimeError("server exited before answering")
+			message = json.loads(line)
+			if message.get("id") == msg_id:
+				return message, (time.perf_counter() - start) * 1000
+
+	try:
+		send({"id": 1, "method": "initialize", "params": {
+			"protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "bench", "version": "0"}}})
+		_, ready = reply(1)
+		send({"method": "notifications/initialized"})
+		send({"id": 2, "method": "tools/list"})
+		listed, tools = reply(2)
+		send({"id": 3, "method": "tools/call", "params": {"name": "list_local_files", "arguments": {}}})
+		_, first_call = reply(3)
+	finally:
+		proc.stdin.close()
+		try:
+			proc.wait(timeout=10)
+		except subprocess.TimeoutExpired:
+			proc.kill()
+	return {"initialize_ms": ready, "tools_list_ms": tools, "first_call_ms": first_call, "tools": len(listed["result"]["tools"])}
+
+
+def _import_profile(cwd: str, top: int):
+	code = f"import json, sys, mcp_server.server; print(json.dumps([m for m in {DEFERRED!r} if m in sys.modules]))"
+	proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=cwd, env=_env(), capture_output=True, text=True, check=True)
+	rows = []
+	for line in proc.stderr.splitlines():
+		if not line.startswith("import time:") or "|" not in line:
+			continue
+		self_us, cumulative_us, name = line[len("import time:"):].split("|")
+		if not self_us.strip().isdigit():
+			continue  # header row
+		rows.append({"module": name.strip(), "depth": (len(name) - len(name.lstrip()) - 1) // 2, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+	loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+	return {
+		"slowest_self": [{k: r[k] for k in ("module", "self_ms")} for r in sorted(rows, key=lambda r: -r["self_ms"])[:top]],
+		"top_level": [{k: r[k] for k in ("module", "cumulative_ms")} for r in sorted((r for r in rows if r["depth"] == 0), key=lambda r: -r["cumulative_ms"])[:top]],
+		"services": [{k: r[k] for k in ("module", "cumulative_ms")} for r in rows if r["module"].startswith("mcp_server.")],
+		"deferred_loaded_at_startup": loaded,
+	}
+
+
+def _summary(samples):
+	return {"median_ms": round(statistics.median(samples), 1), "min_ms": round(min(samples), 1), "max_ms": round(max(samples), 1)}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--runs", type=int, default=5)
+	parser.add_argument("--profile", type=int, default=0, metavar="N", help="include the N slowest imports")
+	args = parser.parse_args()
+
+	cwd = tempfile.mkdtemp(prefix="hub-startup-")
+	os.makedirs(os.path.join(cwd, "notes"))
+	floors = {
+		"python": [_wall("pass", cwd) for _ in range(args.runs)],
+		"import_fastmcp": [_wall("import mcp.server.fastmcp", cwd) for _ in range(args.runs)],
+		"import_server": [_wall("import mcp_server.server", cwd) for _ in range(args.runs)],
+	}
+	runs = [_handshake(cwd) for _ in range(args.runs)]
+	result = {
+		"runs": args.runs,
+		"tools": runs[0]["tools"],
+		"process": {name: _summary(samples) for name, samples in floors.items()},
+		"stdio": {k: _summary([r[k] for r in runs]) for k in ("initialize_ms", "tools_list_ms", "first_call_ms")},
+	}
+	if args.profile:
+		result["imports"] = _import_profile(cwd, args.profile)
+	print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,124 @@
+"""Benchmark streaming Takeout parsing on a generated watch-history fixture.
+
+Writes a Takeout-shaped JSON array of `--size-mb` MB (default 500), then pages
+through it with `parse_takeout` in a fresh process and reports throughput and
+peak RSS. `--baseline` also measures the previous `json.load` approach (needs
+several GB of RAM at the default size).
+
+	python -m benchmarks.bench_takeout --size-mb 500
+	python -m benchmarks.bench_takeout --size-mb 50 --baseline
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def write_fixture(path: str, size_mb: int, videos: int = 50000, seed: int = 5):
+	"""Stream records into `path` until it reaches size_mb; repeats videos like a real history."""
+	rng = random.Random(seed)
+	target = size_mb * 1024 * 1024
+	written = 0
+	t = 1735689600  # 2025-01-01, walking backwards like Takeout
+	with open(path, "w", encoding="utf-8") as f:
+		f.write("[")
+		first = True
+		while written < target:
+			vid = rng.randrange(videos)
+			t -= rng.randint(30, 900)
+			record = {
+				"header": "YouTube Music",
+				"title": f"Watched Song {vid} – Ünïcode",
+				"titleUrl": f"https://music.youtube.com/watch?v=v{vid:010d}",
+				"subtitles": [{"name": f"Artist {vid % 997} - Topic", "url": f"https://www.youtube.com/channel/UC{vid % 997:022d}"}],
+				"time": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(t)),
+				"products": ["YouTube"],
+				"activityControls": ["YouTube watch history"]
+			}
+			chunk = ("" if first else ",\n") + json.dumps(record, ensure_ascii=False)
+			first = False
+			f.write(chunk)
+			written += len(chunk.encode("utf-8"))
+		f.write("]")
+	return os.path.getsize(path)
+
+
+def _peak_rss_mb():
+	return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure(mode: str, path: str, limit: int, dedup: bool):
+	"""Runs inside a fresh interpreter so peak RSS reflects only this parse."""
+	start = time.perf_counter()
+	songs = pages = 0
+	if mode == "stream":
+		from mcp_server.takeout import parse_takeout
+		cursor = None
+		while True:
+			res = parse_takeout(path, cursor=cursor, limit=limit, dedup=dedup)
+			songs += len(res["liked_songs"])
+			pages += 1
+			cursor = res["next_cursor"]
+			if not cursor:
+				break
+	else:
+		from mcp_server.takeout import to_liked_song
+		with open(path, "r", encoding="utf-8") as f:
+			blob = json.load(f)
+		items = [to_liked_song(it) for it in blob]
+		songs, pages = len(items), 1
+	elapsed = time.perf_counter() - start
+	size_mb = os.path.getsize(path) / (1024 * 1024)
+	return {
+		"songs": songs,
+		"pages": pages,
+		"seconds": round(elapsed, 2),
+		"mb_per_s": round(size_mb / elapsed, 1),
+		"peak_rss_mb": _peak_rss_mb()
+	}
+
+
+def _run(mode: str, path: str, limit: int, dedup: bool):
+	cmd = [sys.executable, "-m", "benchmarks.bench_takeout", "--measure", mode, "--fixture", path, "--limit", str(limit)]
+	if not dedup:
+		cmd.append("--no-dedup")
+	out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+	return json.loads(out)
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--size-mb", type=int, default=500)
+	parser.add_argument("--limit", type=int, default=500, help="songs per page")
+	parser.add_argument("--fixture", help="reuse (or keep) the fixture at this path")
+	parser.add_argument("--baseline", action="store_true", help="also measure json.load of the whole file")
+	parser.add_argument("--no-dedup", action="store_true")
+	parser.add_argument("--measure", choices=("stream", "json_load"), help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.measure:
+		print(json.dumps(measure(args.measure, args.fixture, args.limit, not args.no_dedup)))
+		return
+
+	with tempfile.TemporaryDirectory() as tmp:
+		path = args.fixture or os.path.join(tmp, "watch-history.json")
+		if not os.path.exists(path):
+			start = time.perf_counter()
+			write_fixture(path, args.size_mb)
+			print(f"fixture: {os.path.getsize(path) / 2**20:.0f} MB in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+		result = {
+			"fixture_mb": round(os.path.getsize(path) / 2**20, 1),
+			"stream": _run("stream", path, args.limit, not args.no_dedup)
+		}
+		if args.baseline:
+			result["json_load"] = _run("json_load", path, args.limit, not args.no_dedup)
+	print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+	main()
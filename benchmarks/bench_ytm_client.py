@@ -0,0 +1,117 @@
+"""Benchmark per-request cost of YT Music liked-song lookups with a stubbed YTMusic.
+
+The stub subclasses the real `ytmusicapi.YTMusic`, so client construction is real,
+including the visitor-id page fetch browser auth does on first use; that fetch and
+`get_liked_songs` are answered from canned payloads after `--latency-ms`.
+Compares the previous per-call path (re-read headers, build a client, fetch) with
+the shared client, with and without the liked-songs TTL cache.
+
+	python -m benchmarks.bench_ytm_client --calls 500 --latency-ms 20
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from types import SimpleNamespace
+
+import ytmusicapi
+
+from mcp_server import ytmusic_service
+
+
+HEADERS = {
+	"cookie": "SAPISID=stub; __Secure-3PAPISID=stub",
+	"authorization": "SAPISIDHASH 0_stub",
+	"x-goog-authuser": "0",
+	"user-agent": "Mozilla/5.0"
+}
+
+
+def make_stub(tracks: int, latency_ms: float):
+	payload = {"tracks": [{
+		"title": f"Song {i}",
+		"artists": [{"name": f"Artist {i % 97}"}],
+		"album": {"name": f"Album {i % 31}"},
+		"duration": "3:21",
+		"videoId": f"vid{i:08d}"
+	} for i in range(tracks)]}
+
+	class StubYTMusic(ytmusicapi.YTMusic):
+		def _send_get_request(self, url, params=None, use_base_headers=False):
+			time.sleep(latency_ms / 1000)
+			return SimpleNamespace(text='ytcfg.set({"VISITOR_DATA": "stub"});')
+
+		def get_liked_songs(self, limit=100):
+			time.sleep(latency_ms / 1000)
+			return {"tracks": payload["tracks"][:limit]}
+	return StubYTMusic
+
+
+def per_call_client(limit: int):
+	"""The pre-change path: parse headers and construct a client on every call."""
+	headers = ytmusic_service._load_headers()
+	ytm = ytmusicapi.YTMusic(headers)
+	data = ytm.get_liked_songs(limit=limit)
+	return [ytmusic_service._map_track(t) for t in (data or {}).get("tracks", [])[:limit]]
+
+
+def _time(fn, calls: int):
+	samples = []
+	for _ in range(calls):
+		t = time.perf_counter()
+		fn()
+		samples.append((time.perf_counter() - t) * 1e6)
+	samples.sort()
+	return {
+		"p50_us": round(statistics.median(samples), 1),
+		"p99_us": round(samples[int(len(samples) * 0.99) - 1], 1),
+		"mean_us": round(statistics.fmean(samples), 1)
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--calls", type=int, default=500)
+	parser.add_argument("--limit", type=int, default=50)
+	parser.add_argument("--tracks", type=int, default=2000)
+	parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated upstream latency per fetch")
+	args = parser.parse_args()
+
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "headers_auth.json")
+		with open(path, "w", encoding="utf-8") as f:
+			json.dump(HEADERS, f)
+		os.environ.pop("YTMUSIC_HEADERS_JSON", None)
+		os.environ["YTMUSIC_HEADERS_FILE"] = path
+		ytmusicapi.YTMusic = make_stub(args.tracks, args.latency_ms)
+
+		before = _time(lambda: per_call_client(args.limit), args.calls)
+
+		def shared_uncached():
+			ytmusic_service.invalidate_liked_songs()
+			return ytmusic_service.list_liked_songs_free(limit=args.limit)
+		shared = _time(shared_uncached, args.calls)
+
+		ytmusic_service.invalidate_liked_songs()
+		cached = _time(lambda: ytmusic_service.list_liked_songs_free(limit=args.limit), args.calls)
+
+		# Touching the headers file must rebuild the client
+		first = ytmusic_service._ytm()
+		os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+		rebuilt = ytmusic_service._ytm() is not first
+
+	print(json.dumps({
+		"calls": args.calls,
+		"limit": args.limit,
+		"latency_ms": args.latency_ms,
+		"per_call_client": before,
+		"shared_client": shared,
+		"shared_client_ttl_cache": cached,
+		"rebuilt_after_headers_change": rebuilt
+	}, indent=2))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,121 @@
+"""Local HTTP/1.1 stub upstream used by the benchmarks.
+
+Routes map a URL path to a handler `fn(handler) -> (status, headers, body)`;
+`body` may be bytes, str, or any JSON-serialisable object. The server keeps
+connections alive and counts how many TCP connections clients opened, which is a
+direct proxy for TCP/TLS handshakes against the real upstreams.
+"""
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class _Handler(BaseHTTPRequestHandler):
+	protocol_version = "HTTP/1.1"
+
+	def setup(self):
+		super().setup()
+		# Headers and body go out as separate writes; avoid Nagle/delayed-ACK stalls
+		self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		with self.server.stats_lock:
+			self.server.connections += 1
+
+	def log_message(self, format, *args):
+		pass
+
+	def _dispatch(self):
+		with self.server.stats_lock:
+			self.server.requests += 1
+		path = urlsplit(self.path).path
+		route = self.server.routes.get(path)
+		if route is None:
+			for prefix, fn in self.server.prefix_routes:
+				if path.startswith(prefix):
+					route = fn
+					break
+		if route is None:
+			status, headers, body = 404, {}, {"error": "no stub route", "path": path}
+		else:
+			status, headers, body = route(self)
+		if not isinstance(body, (bytes, str)):
+			body = json.dumps(body)
+			headers = {"Content-Type": "application/json", **headers}
+		if isinstance(body, str):
+			body = body.encode("utf-8")
+		self.send_response(status)
+		for k, v in headers.items():
+			self.send_header(k, v)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		if self.command != "HEAD":
+			self.wfile.write(body)
+
+	def read_body(self) -> bytes:
+		length = int(self.headers.get("Content-Length") or 0)
+		return self.rfile.read(length) if length else b""
+
+	do_GET = _dispatch
+	do_POST = _dispatch
+	do_HEAD = _dispatch
+
+
+class _Server(ThreadingHTTPServer):
+	# Room for bursts of concurrent clients (the socketserver default backlog is 5)
+	request_queue_size = 1024
+
+
+class StubServer:
+	"""Threaded stub upstream on 127.0.0.1; use as a context manager."""
+
+	def __init__(self, routes=None, prefix_routes=None, port: int = 0):
+		self.httpd = _Server(("127.0.0.1", port), _Handler)
+		self.httpd.daemon_threads = True
+		self.httpd.routes = dict(routes or {})
+		self.httpd.prefix_routes = list(prefix_routes or [])
+		self.httpd.stats_lock = threading.Lock()
+		self.httpd.connections = 0
+		self.httpd.requests = 0
+		self._thread = None
+
+	@property
+	def url(self) -> str:
+		host, port = self.httpd.server_address[:2]
+		return f"http://{host}:{port}"
+
+	@property
+	def connections(self) -> int:
+		return self.httpd.connections
+
+	@property
+	def requests(self) -> int:
+		return self.httpd.requests
+
+	def route(self, path: str, fn):
+		self.httpd.routes[path] = fn
+
+	def reset_stats(self):
+		with self.httpd.stats_lock:
+			self.httpd.connections = 0
+			self.httpd.requests = 0
+
+	def start(self):
+		self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+	def stop(self):
+		self.httpd.shutdown()
+		self.httpd.server_close()
+
+	def __enter__(self):
+		return self.start()
+
+	def __exit__(self, *exc):
+		self.stop()
+
+
+def json_route(payload, status: int = 200, headers=None):
+	"""Route returning a fixed JSON payload."""
+	return lambda handler: (status, dict(headers or {}), payload)
@@ -0,0 +1,544 @@
+"""Offline benchmark suite: replays recorded upstream responses and reports JSON.
+
+Steam, Steam Store, GitHub, Gmail and LM Studio are served by local stub servers
+from the responses in `benchmarks/fixtures/` (lists scaled up to the requested
+sizes); YT Music is replayed through an in-process client because ytmusicapi has
+no endpoint override. Nothing leaves the machine. Measures:
+
+- `ask`: /ask end-to-end latency per intent (plus the LLM fallback)
+- `tools`: latency of every tool registered in `mcp_server/server.py`
+- `memory`: tracemalloc peak for the large-payload tools
+- `throughput`: /ask requests per second under concurrency
+
+	python -m benchmarks.suite --out bench.json
+	python -m benchmarks.suite --compare bench.json --fail-over 25
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.bench_gmail import fake_gmail, make_mailbox
+from benchmarks.stub_server import StubServer
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+STEAM_ID = "76561190000000000"
+GH_USER, GH_REPO = "octo-user", "weather"
+
+# Query per intent; "llm" falls through the router to LM Studio
+ASK_QUERIES = {
+	"notes.list": "list my notes",
+	"notes.search": "search my notes for groceries",
+	"notes.read": "show the first 5 lines of todo.txt",
+	"steam.count": "how many games do i own",
+	"steam.games": "list my steam games",
+	"steam.playtime": "how many hours for stardew valley",
+	"steam.user_details": "user details for appid 413150",
+	"steam.breakdown": "what genres do i play most?",
+	"steam.achievements": "what is my achievement completion rate?",
+	"ytm.liked": "list 5 of my liked songs",
+	"github.repos": f"github repos for {GH_USER}",
+	"llm": "which game should I play tonight?",
+}
+
+# Arguments for tools with required parameters (and a few representative calls)
+TOOL_ARGS = {
+	"fetch_local_file": {"name": "todo.txt"},
+	"search_local_files": {"query": "groceries"},
+	"github_repos": {"user": GH_USER},
+	"github_commits": {"user": GH_USER, "repo": GH_REPO},
+	"github_commits_paginated": {"user": GH_USER, "repo": GH_REPO, "fresh": True},
+	"github_commits_all": {"user": GH_USER, "repo": GH_REPO, "fresh": True},
+	"github_list_files": {"user": GH_USER, "repo": GH_REPO, "recursive": True},
+	"github_file_content": {"user": GH_USER, "repo": GH_REPO, "path": "README.md"},
+	"github_issues": {"user": GH_USER, "repo": GH_REPO},
+	"github_issue": {"user": GH_USER, "repo": GH_REPO, "number": 14},
+	"read_emails": {"max_results": 25, "fresh": True},
+	"steam_all_games": {"fresh": True},
+	"steam_app_details": {"appid": 413150},
+	"steam_player_achievements": {"appid": 413150},
+	"steam_game_stats": {"appid": 413150},
+	"steam_app_user_details": {"appids": "413150"},
+	"steam_playtime_for": {"query": "stardew"},
+	"steam_enrich_library": {"max_fetch": 200},
+	"steam_achievement_stats": {"top_n": 0},
+	"sync_now": {"source": "github"},
+	"ytm_liked_songs_all": {"fresh": True},
+	"ytm_liked_songs_sync": {"full": True},
+}
+
+# Tools whose result size scales with the library; measured under tracemalloc
+MEMORY_TOOLS = {
+	"steam_all_games": {"fresh": True},
+	"ytm_liked_songs_all": {"fresh": True, "page_size": 100000},
+	"ytm_takeout_parse": {"limit": 100000},
+}
+
+
+def fixture(name: str):
+	with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+		return json.load(f)
+
+
+def _scaled(items, n: int, vary):
+	"""Repeat recorded items up to n, passing (copy, index) to `vary` for the copies."""
+	out = []
+	for i in range(n):
+		item = dict(items[i % len(items)])
+		if i >= len(items):
+			vary(item, i)
+		out.append(item)
+	return out
+
+
+def _scaled_games(n: int):
+	def vary(g, i):
+		g["appid"] = 2000000 + i
+		g["name"] = f"{g['name']} {i}"
+		g["playtime_forever"] = (g["playtime_forever"] * (i + 7)) % 50000
+	return _scaled(fixture("steam_owned_games.json")["response"]["games"], n, vary)
+
+
+def _scaled_commits(n: int):
+	def vary(c, i):
+		c["sha"] = f"{i:040x}"
+		c["commit"] = {**c["commit"], "message": f"Commit {i}\n\nReplayed from the recorded fixture."}
+	return _scaled(fixture("github_commits.json"), n, vary)
+
+
+def _scaled_songs(n: int):
+	def vary(t, i):
+		t["videoId"] = f"vid{i:08d}"
+		t["title"] = f"{t['title']} ({i})"
+	return _scaled(fixture("ytm_liked_songs.json")["tracks"], n, vary)
+
+
+def _delayed(fn, latency: float):
+	if not latency:
+		return fn
+
+	def route(handler):
+		time.sleep(latency)
+		return fn(handler)
+	return route
+
+
+def _query(handler):
+	return {k: v[0] for k, v in parse_qs(urlsplit(handler.path).query).items()}
+
+
+def steam_stub(games, latency: float):
+	def owned(handler):
+		q = _query(handler)
+		if q.get("include_appinfo"):
+			listed = games
+		else:
+			listed = [{k: g[k] for k in ("appid", "playtime_forever") if k in g} for g in games]
+		return 200, {}, {"response": {"game_count": len(games), "games": listed}}
+
+	def achievements(handler):
+		appid = _query(handler).get("appid", "")
+		n = int(appid) if appid.isdigit() else 0
+		if n % 5 == 4:
+			return 400, {}, {"playerstats": {"error": "Requested app has no stats", "success": False}}
+		# Same achievement list per app, unlocked up to an appid-dependent share
+		stats = recorded["playerstats"]
+		rows = stats["achievements"]
+		cut = len(rows) * (n % 11) // 10
+		return 200, {}, {"playerstats": {**stats, "achievements": [
+			{**a, "achieved": int(k < cut), "unlocktime": a["unlocktime"] or 1700000000 + k if k < cut else 0} for k, a in enumerate(rows)
+		]}}
+
+	recent = fixture("steam_recent_games.json")
+	recorded = fixture("steam_achievements.json")
+	routes = {
+		"/IPlayerService/GetOwnedGames/v0001/": owned,
+		"/IPlayerService/GetRecentlyPlayedGames/v0001/": lambda h: (200, {}, recent),
+		"/ISteamUserStats/GetPlayerAchievements/v0001/": achievements,
+	}
+	return StubServer({path: _delayed(fn, latency) for path, fn in routes.items()})
+
+
+GENRES = ("Action", "Adventure", "Indie", "RPG", "Simulation", "Strategy", "Casual", "Racing")
+
+
+def store_stub(latency: float):
+	details = fixture("steam_appdetails.json")
+	user_details = fixture("steam_appuserdetails.json")
+
+	def appdetails(handler):
+		appid = _query(handler).get("appids", "")
+		# Vary genres and developers by appid so library breakdowns have something to group
+		n = int(appid) if appid.isdigit() else 0
+		data = {
+			**details["data"],
+			"steam_appid": n,
+			"genres": [{"id": str(k), "description": GENRES[(n + k) % len(GENRES)]} for k in range(1 + n % 3)],
+			"developers": [f"Studio {n % 40}"]
+		}
+		return 200, {}, {appid: {"success": True, "data": data}}
+
+	routes = {
+		"/api/appdetails": appdetails,
+		"/api/appuserdetails": lambda h: (200, {}, user_details),
+	}
+	return StubServer({path: _delayed(fn, latency) for path, fn in routes.items()})
+
+
+def _git_blob_sha(data: bytes) -> str:
+	return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _git_tree(readme: bytes):
+	"""Recursive Trees API payload and blobs by SHA for the stub repository."""
+	files = {
+		"README.md": readme,
+		"weather.py": b"import requests\n\n" + b"".join(
+			b"def forecast_%d(city):\n\treturn requests.get(city).json()\n\n" % i for i in range(500)),
+		"requirements.txt": b"requests\n",
+		"tests/test_weather.py": b"from weather import forecast_0\n",
+		"docs/README.md": readme,  # same blob as the top-level README
+	}
+	entries = [{"path": d, "mode": "040000", "type": "tree", "sha": "0" * 40} for d in sorted({p.rsplit("/", 1)[0] for p in files if "/" in p})]
+	entries += [{"path": p, "mode": "100644", "type": "blob", "sha": _git_blob_sha(data), "size": len(data)} for p, data in files.items()]
+	tree = {"sha": "f" * 40, "truncated": False, "tree": sorted(entries, key=lambda e: e["path"])}
+	return tree, {_git_blob_sha(data): data for data in files.values()}
+
+
+def github_stub(commits, latency: float):
+	repos = fixture("github_repos.json")
+	contents_dir = fixture("github_contents_dir.json")
+	contents_file = fixture("github_contents_file.json")
+	issues = fixture("github_issues.json")
+	tree, blobs = _git_tree(base64.b64decode(contents_file["content"]))
+
+	def route(handler):
+		parts = urlsplit(handler.path)
+		segments = parts.path.strip("/").split("/")
+		q = _query(handler)
+		if segments[0] == "users" and segments[-1] == "repos":
+			return 200, {}, repos
+		if len(segments) >= 4 and segments[0] == "repos":
+			kind = segments[3]
+			if kind == "commits":
+				per_page = int(q.get("per_page", 30))
+				page = int(q.get("page", 1))
+				last = max(1, -(-len(commits) // per_page))
+				headers = {}
+				if last > 1:
+					headers["Link"] = f'<{handler.server.base_url}{parts.path}?per_page={per_page}&page={last}>; rel="last"'
+				return 200, headers, commits[(page - 1) * per_page:page * per_page]
+			if kind == "git" and len(segments) > 5 and segments[4] == "trees":
+				return 200, {"ETag": f'"{tree["sha"]}"'}, tree
+			if kind == "git" and len(segments) > 5 and segments[4] == "blobs":
+				if segments[5] not in blobs:
+					return 404, {}, {"message": "Not Found"}
+				return 200, {"Content-Type": "application/vnd.github.raw+json"}, blobs[segments[5]]
+			if kind == "contents":
+				return 200, {}, contents_file if len(segments) > 4 and "." in segments[-1] else contents_dir
+			if kind == "issues":
+				if len(segments) > 4:
+					return 200, {}, next((i for i in issues if str(i["number"]) == segments[4]), {"message": "Not Found"})
+				return 200, {}, issues
+		return 404, {}, {"message": "Not Found"}
+
+	server = StubServer(prefix_routes=[("/", _delayed(route, latency))])
+	server.httpd.base_url = server.url
+	return server
+
+
+def lmstudio_stub(latency: float):
+	completion = fixture("lmstudio_chat.json")
+	content = completion["choices"][0]["message"]["content"]
+
+	def chat(handler):
+		body = json.loads(handler.read_body() or b"{}")
+		if body.get("stream"):
+			chunks = [{"choices": [{"delta": {"content": word + " "}}]} for word in content.split()]
+			sse = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+			return 200, {"Content-Type": "text/event-stream"}, sse
+		return 200, {}, completion
+	return StubServer({"/v1/chat/completions": _delayed(chat, latency)})
+
+
+class ReplayYTMusic:
+	"""Stands in for ytmusicapi.YTMusic, answering get_liked_songs from the fixture."""
+
+	def __init__(self, tracks, latency: float):
+		self.playlist = fixture("ytm_liked_songs.json")
+		self.tracks = tracks
+		self.latency = latency
+
+	def get_liked_songs(self, limit: int = 100):
+		time.sleep(self.latency)
+		return {**self.playlist, "trackCount": len(self.tracks), "tracks": self.tracks[:limit]}
+
+
+def _write_notes(root: str):
+	notes = os.path.join(root, "notes")
+	os.makedirs(notes)
+	with open(os.path.join(notes, "todo.txt"), "w", encoding="utf-8") as f:
+		f.write("\n".join(f"{i}. buy groceries and call the bank" if i % 7 == 0 else f"{i}. task number {i}" for i in range(2000)))
+	for i in range(20):
+		with open(os.path.join(notes, f"journal-{i:02d}.txt"), "w", encoding="utf-8") as f:
+			f.write(("Today I played some games and listened to music. " * 40 + "\n") * 20)
+
+
+def _stats(samples_ms):
+	samples = sorted(samples_ms)
+	return {
+		"n": len(samples),
+		"first_ms": round(samples_ms[0], 2),
+		"p50_ms": round(statistics.median(samples), 2),
+		"p95_ms": round(samples[min(len(samples) - 1, math.ceil(len(samples) * 0.95) - 1)], 2),
+		"mean_ms": round(statistics.fmean(samples), 2)
+	}
+
+
+def bench_ask(client, repeat: int):
+	from mcp_server.intents import router
+	out = {}
+	for intent, query in ASK_QUERIES.items():
+		matched = router.match(query)
+		samples, status = [], None
+		for _ in range(repeat):
+			start = time.perf_counter()
+			resp = client.post("/ask", data={"query": query, "nocache": "1"})
+			samples.append((time.perf_counter() - start) * 1000)
+			status = resp.status_code
+		out[intent] = {"routed_to": matched[0][1].name if matched else "llm", "status": status, **_stats(samples)}
+	return out
+
+
+def _tool_call(loop, server, name: str, args: dict):
+	start = time.perf_counter()
+	try:
+		result = loop.run_until_complete(server.call_tool(name, args))
+		error = None
+	except Exception as e:
+		result, error = None, str(e)
+	elapsed = (time.perf_counter() - start) * 1000
+	text = "".join(getattr(c, "text", "") for c in (result[0] if isinstance(result, tuple) else result or []))
+	if error is None and text.startswith("{"):
+		try:
+			payload = json.loads(text)
+		except ValueError:
+			payload = None
+		if isinstance(payload, dict) and payload.get("error"):
+			error = str(payload["error"])[:200]
+	return elapsed, len(text), error
+
+
+def bench_tools(server, repeat: int, takeout_path: str):
+	loop = asyncio.new_event_loop()
+	out = {}
+	try:
+		for tool in loop.run_until_complete(server.list_tools()):
+			args = dict(TOOL_ARGS.get(tool.name, {}))
+			if tool.name == "ytm_takeout_parse":
+				args = {"file_path": takeout_path, "limit": 500}
+			missing = [p for p in tool.inputSchema.get("required", []) if p not in args]
+			if missing:
+				out[tool.name] = {"skipped": f"no benchmark arguments for {missing}"}
+				continue
+			samples, size, error = [], 0, None
+			for _ in range(repeat):
+				ms, size, error = _tool_call(loop, server, tool.name, args)
+				samples.append(ms)
+			out[tool.name] = {**_stats(samples), "result_bytes": size, **({"error": error} if error else {})}
+	finally:
+		loop.close()
+	return out
+
+
+def bench_memory(server, takeout_path: str):
+	loop = asyncio.new_event_loop()
+	out = {}
+	try:
+		for name, args in MEMORY_TOOLS.items():
+			if name == "ytm_takeout_parse":
+				args = {**args, "file_path": takeout_path}
+			tracemalloc.start()
+			ms, size, error = _tool_call(loop, server, name, args)
+			_, peak = tracemalloc.get_traced_memory()
+			tracemalloc.stop()
+			out[name] = {"peak_kb": peak // 1024, "result_bytes": size, "wall_ms": round(ms, 1), **({"error": error} if error else {})}
+	finally:
+		loop.close()
+	return out
+
+
+def bench_throughput(app, concurrency: int, requests: int):
+	out = {}
+	for label, query in (("direct_intent", ASK_QUERIES["steam.count"]), ("llm", ASK_QUERIES["llm"])):
+		def one(_):
+			client = app.test_client()
+			start = time.perf_counter()
+			resp = client.post("/ask", data={"query": query, "nocache": "1"})
+			return (time.perf_counter() - start) * 1000, resp.status_code
+		start = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=concurrency) as pool:
+			results = list(pool.map(one, range(requests)))
+		elapsed = time.perf_counter() - start
+		out[label] = {
+			"concurrency": concurrency,
+			"requests": requests,
+			"errors": sum(1 for _, status in results if status != 200),
+			"req_per_s": round(requests / elapsed, 1),
+			**{k: v for k, v in _stats([ms for ms, _ in results]).items() if k != "first_ms"}
+		}
+	return out
+
+
+def _flatten(data, prefix=""):
+	if isinstance(data, dict):
+		for k, v in data.items():
+			yield from _flatten(v, f"{prefix}.{k}" if prefix else k)
+	elif isinstance(data, (int, float)) and not isinstance(data, bool):
+		yield prefix, data
+
+
+def compare(old: dict, new: dict):
+	"""{metric: {old, new, change_pct}} for latency, memory and throughput figures in both runs."""
+	before = dict(_flatten({k: old.get(k) for k in ("ask", "tools", "memory", "throughput")}))
+	out = {}
+	for key, value in _flatten({k: new.get(k) for k in ("ask", "tools", "memory", "throughput")}):
+		if not key.endswith(("p50_ms", "p95_ms", "peak_kb", "req_per_s")) or key not in before or not before[key]:
+			continue
+		out[key] = {"old": before[key], "new": value, "change_pct": round((value - before[key]) * 100 / before[key], 1)}
+	return out
+
+
+def regressions(changes: dict, threshold: float):
+	"""Metrics that got worse by more than `threshold` percent (throughput down, the rest up)."""
+	return sorted(
+		key for key, c in changes.items()
+		if (-c["change_pct"] if key.endswith("req_per_s") else c["change_pct"]) > threshold
+	)
+
+
+def _git_commit():
+	try:
+		return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip() or None
+	except Exception:
+		return None
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--repeat", type=int, default=20, help="samples per /ask intent and per tool")
+	parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every stub upstream response")
+	parser.add_argument("--games", type=int, default=5000)
+	parser.add_argument("--songs", type=int, default=5000)
+	parser.add_argument("--commits", type=int, default=1000)
+	parser.add_argument("--emails", type=int, default=200)
+	parser.add_argument("--takeout-mb", type=int, default=20)
+	parser.add_argument("--concurrency", type=int, default=16)
+	parser.add_argument("--requests", type=int, default=200, help="requests per throughput scenario")
+	parser.add_argument("--out", help="also write the results to this file")
+	parser.add_argument("--compare", help="earlier results file to compare against")
+	parser.add_argument("--fail-over", type=float, help="exit 1 if any compared metric regressed by more than this percent")
+	args = parser.parse_args()
+
+	repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+	commit = _git_commit()
+	latency = args.latency_ms / 1000
+	work = tempfile.mkdtemp(prefix="hub-bench-")
+	_write_notes(work)
+	token = os.path.join(work, "token.json")
+	with open(token, "w", encoding="utf-8") as f:
+		json.dump({"token": "stub", "refresh_token": "stub", "client_id": "stub", "client_secret": "stub", "expiry": "2099-01-01T00:00:00Z"}, f)
+	takeout_path = os.path.join(work, "watch-history.json")
+	from benchmarks.bench_takeout import write_fixture
+	write_fixture(takeout_path, args.takeout_mb)
+
+	steam = steam_stub(_scaled_games(args.games), latency).start()
+	store_api = store_stub(latency).start()
+	github = github_stub(_scaled_commits(args.commits), latency).start()
+	lmstudio = lmstudio_stub(latency).start()
+	gmail = fake_gmail(make_mailbox(args.emails), args.latency_ms).start()
+	try:
+		# The services read these at import time
+		os.environ.update({
+			"HUB_DB_PATH": os.path.join(work, "hub.db"),
+			"HUB_SYNC": "0",
+			"LLM_CACHE": "0",
+			"HTTP_MAX_RETRIES": "0",
+			"STEAM_API_KEY": "stub",
+			"STEAM_ID": STEAM_ID,
+			"STEAM_API_BASE": steam.url,
+			"STEAM_STORE_BASE": store_api.url,
+			"STEAM_STORE_COOKIE": "stub=1",
+			"STEAM_STORE_RATE": "100000",
+			"STEAM_API_RATE": "100000",
+			"GITHUB_API_BASE": github.url,
+			"GITHUB_TOKEN": "stub",
+			"GITHUB_USER": GH_USER,
+			"GITHUB_REPO": GH_REPO,
+			"LM_STUDIO_BASE_URL": lmstudio.url,
+			"GMAIL_API_ENDPOINT": gmail.url + "/",
+			"GMAIL_TOKEN_FILE": token,
+			"YTMUSIC_HEADERS_JSON": json.dumps({"cookie": "SAPISID=stub", "x-goog-authuser": "0"}),
+		})
+		os.chdir(work)
+		sys.path.insert(0, repo_root)
+		from mcp_server import ytmusic_service
+		ytmusic_service._client = (ytmusic_service._headers_source(), ReplayYTMusic(_scaled_songs(args.songs), latency))
+		from app import app
+		from mcp_server.server import server
+		from mcp_server.steam_enrich import enrich_owned_games
+		# Store details back the library breakdowns; fill them before timing /ask
+		enriched = enrich_owned_games(max_fetch=args.games)
+
+		results = {
+			"meta": {
+				"commit": commit,
+				"python": platform.python_version(),
+				"platform": platform.platform(),
+				"cpus": os.cpu_count(),
+				"at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+				"args": {k: v for k, v in vars(args).items() if k not in ("out", "compare", "fail_over")},
+				"steam_store_enrich_ms": enriched.get("ms"),
+			},
+			"ask": bench_ask(app.test_client(), args.repeat),
+			"tools": bench_tools(server, args.repeat, takeout_path),
+			"memory": bench_memory(server, takeout_path),
+			"throughput": bench_throughput(app, args.concurrency, args.requests),
+		}
+	finally:
+		for stub in (steam, store_api, github, lmstudio, gmail):
+			stub.stop()
+		os.chdir(repo_root)
+
+	failed = []
+	if args.compare:
+		with open(args.compare, "r", encoding="utf-8") as f:
+			results["compare"] = compare(json.load(f), results)
+		if args.fail_over is not None:
+			failed = regressions(results["compare"], args.fail_over)
+			results["regressions"] = failed
+	text = json.dumps(results, indent=2)
+	if args.out:
+		with open(args.out, "w", encoding="utf-8") as f:
+			f.write(text + "\n")
+	print(text)
+	if failed:
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
@@ -1,4 +1,12 @@
 """MCP server package for AI Personal Hub."""
+import importlib
 
-# Services expose a register(server) function
-from . import file_service, github_service, email_service, steam_service, summarize_service  # noqa: F401
\ No newline at end of file
+# Services expose a register(server) function; imported on first attribute access
+# so that importing one module of the package does not load every service
+_SERVICES = {"file_service", "github_service", "email_service", "steam_service", "summarize_service"}
+
+
+def __getattr__(name):
+	if name in _SERVICES:
+		return importlib.import_module(f".{name}", __name__)
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,18 @@
+"""Response pieces shared by the Flask (app.py) and ASGI (asgi_app.py) /ask routes."""
+import json
+
+
+def fallback_payload(user_query: str, error: Exception, auto_ctx: dict, ctx_timings: dict):
+	"""/ask body when LM Studio fails; also the `error` event of /ask/stream."""
+	return {
+		"answer": f"You asked: '{user_query}'.",
+		"warning": "LM Studio not reachable; returning fallback response.",
+		"error": str(error),
+		"context": auto_ctx,
+		"context_timings": ctx_timings
+	}
+
+
+def sse(event: str, data) -> str:
+	"""One Server-Sent Events frame with a JSON payload."""
+	return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,159 @@
+"""Cache of LM Studio answers for repeated questions.
+
+Answers are keyed on (normalized query, model, temperature, hash of the system
+and context prompt), so a changed context never serves an old answer. The
+memory tier is an LRU with a TTL; the optional disk tier (LLM_CACHE_DISK=1)
+keeps answers in the local store across restarts. With LLM_CACHE_SEMANTIC=1 a
+miss also accepts a cached question whose trigram similarity to this one is at
+least LLM_CACHE_SEMANTIC_THRESHOLD under the same context fingerprint.
+
+Each answer also remembers the context fingerprint it was generated under, keyed on
+the question and a context scope (providers consulted, snapshot version). For
+LLM_CACHE_CONTEXT_TTL seconds `get_recent` answers a repeat from that alone, before
+any context is gathered.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from . import metrics, store
+from .cache import TTLCache
+from .name_index import normalize, trigrams
+
+
+ENABLED = os.getenv("LLM_CACHE", "1") not in ("0", "false", "no")
+TTL = float(os.getenv("LLM_CACHE_TTL", "900"))
+MAXSIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+DISK = os.getenv("LLM_CACHE_DISK", "0") in ("1", "true", "yes")
+DISK_MAX_ROWS = int(os.getenv("LLM_CACHE_DISK_MAX", "5000"))
+SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "0") in ("1", "true", "yes")
+SEMANTIC_THRESHOLD = float(os.getenv("LLM_CACHE_SEMANTIC_THRESHOLD", "0.85"))
+CONTEXT_TTL = float(os.getenv("LLM_CACHE_CONTEXT_TTL", "60"))
+
+
+def fingerprint(messages, model: str, temperature: float) -> str:
+	"""Hash of everything but the user question: model, temperature and system/context prompts."""
+	system = [m.get("content", "") for m in messages if m.get("role") == "system"]
+	blob = json.dumps([model, round(float(temperature), 3), system], ensure_ascii=False)
+	return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _key(norm_query: str, fp: str) -> str:
+	return hashlib.sha256(f"{fp}\n{norm_query}".encode("utf-8")).hexdigest()
+
+
+def _dice(a: frozenset, b: frozenset) -> float:
+	return 2 * len(a & b) / (len(a) + len(b)) if a and b else 0.0
+
+
+class AnswerCache:
+	def __init__(self, ttl: float = TTL, maxsize: int = MAXSIZE, disk: bool = DISK, semantic: bool = SEMANTIC,
+			threshold: float = SEMANTIC_THRESHOLD, context_ttl: float = CONTEXT_TTL):
+		self._memory = TTLCache(ttl=ttl, maxsize=maxsize)
+		# (question, context scope) key -> fingerprint of the context last used for it
+		self._contexts = TTLCache(ttl=context_ttl, maxsize=maxsize)
+		self.ttl = ttl
+		self.disk = disk
+		self.semantic = semantic
+		self.threshold = threshold
+		# fingerprint -> {key: (normalized query, trigrams)}; mirrors the memory tier's keys
+		self._recent = {}
+		self._recent_order = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, query: str, fp: str):
+		"""(answer or None, metadata) for a question under context fingerprint `fp`."""
+		norm = normalize(query)
+		key = _key(norm, fp)
+		hit = self._memory.peek(key)
+		if hit is not None:
+			metrics.LLM_CACHE.inc(tier="memory")
+			return hit[0], {"hit": True, "tier": "memory", "age_s": round(hit[1], 1), "key": key[:12]}
+		if self.disk:
+			try:
+				hit = store.load_answer(key, self.ttl)
+			except Exception:
+				hit = None
+			if hit is not None:
+				self._remember(key, fp, norm, hit[0])
+				metrics.LLM_CACHE.inc(tier="disk")
+				return hit[0], {"hit": True, "tier": "disk", "age_s": round(hit[1], 1), "key": key[:12]}
+		if self.semantic:
+			match = self._nearest(norm, fp)
+			if match is not None:
+				other_key, similarity = match
+				hit = self._memory.peek(other_key)
+				if hit is not None:
+					metrics.LLM_CACHE.inc(tier="semantic")
+					return hit[0], {
+						"hit": True, "tier": "semantic", "age_s": round(hit[1], 1),
+						"key": other_key[:12], "similarity": round(similarity, 3)
+					}
+		metrics.LLM_CACHE.inc(tier="miss")
+		return None, {"hit": False, "key": key[:12]}
+
+	def get_recent(self, query: str, scope: str):
+		"""(answer or None, metadata, fingerprint) from the context last used for this question and scope.
+
+		Lets a repeat skip gathering context; None when there is no such context
+		within CONTEXT_TTL or its answer is gone.
+		"""
+		recent = self._contexts.peek(_key(normalize(query), scope))
+		if recent is None:
+			return None, None, None
+		answer, meta = self.get(query, recent[0])
+		if answer is None:
+			return None, None, None
+		meta["context_age_s"] = round(recent[1], 1)
+		return answer, meta, recent[0]
+
+	def put(self, query: str, fp: str, answer: str, scope: str | None = None):
+		if not answer:
+			return
+		norm = normalize(query)
+		key = _key(norm, fp)
+		self._remember(key, fp, norm, answer)
+		if scope is not None:
+			self._contexts.set(_key(norm, scope), fp)
+		if self.disk:
+			try:
+				store.save_answer(key, fp, norm, answer, max_rows=DISK_MAX_ROWS)
+			except Exception:
+				pass  # the memory tier still has it
+
+	def clear(self):
+		self._memory.invalidate()
+		self._contexts.invalidate()
+		with self._lock:
+			self._recent.clear()
+			self._recent_order.clear()
+
+	def _remember(self, key: str, fp: str, norm: str, answer: str):
+		self._memory.set(key, answer)
+		if not self.semantic:
+			return
+		with self._lock:
+			self._recent.setdefault(fp, {})[key] = (norm, trigrams(norm))
+			self._recent_order[key] = fp
+			self._recent_order.move_to_end(key)
+			while len(self._recent_order) > self._memory.maxsize:
+				old_key, old_fp = self._recent_order.popitem(last=False)
+				entries = self._recent.get(old_fp, {})
+				entries.pop(old_key, None)
+				if not entries:
+					self._recent.pop(old_fp, None)
+
+	def _nearest(self, norm: str, fp: str):
+		grams = trigrams(norm)
+		best = None
+		with self._lock:
+			for key, (_, other) in self._recent.get(fp, {}).items():
+				s = _dice(grams, other)
+				if s >= self.threshold and (best is None or s > best[1]):
+					best = (key, s)
+		return best
+
+
+cache = AnswerCache()
@@ -0,0 +1,101 @@
+"""Async counterpart of `http_client` for the ASGI app.
+
+One pooled `httpx.AsyncClient` per event loop, the same per-host concurrency cap,
+timeouts and retry policy as the blocking client, so an upstream wait suspends a
+coroutine instead of pinning a worker thread.
+"""
+import asyncio
+import random
+import time
+
+from . import metrics
+from .http_client import (
+	BACKOFF_BASE, BACKOFF_MAX, DEFAULT_TIMEOUT, HOST_CONCURRENCY, MAX_RETRIES, POOL_SIZE,
+	_backoff, _origin, _server_delay, _should_retry
+)
+from .lazy import LazyModule
+
+httpx = LazyModule("httpx")
+
+
+class _LoopState:
+	def __init__(self):
+		self.client = httpx.AsyncClient(
+			limits=httpx.Limits(max_connections=None, max_keepalive_connections=POOL_SIZE),
+			timeout=DEFAULT_TIMEOUT
+		)
+		self.semaphores = {}
+
+	def semaphore(self, url: str):
+		origin = _origin(url)
+		sem = self.semaphores.get(origin)
+		if sem is None:
+			sem = self.semaphores[origin] = asyncio.Semaphore(HOST_CONCURRENCY)
+		return sem
+
+
+# loop -> _LoopState; an AsyncClient cannot be shared across event loops
+_states = {}
+
+
+def _state():
+	loop = asyncio.get_running_loop()
+	state = _states.get(loop)
+	if state is None:
+		state = _states[loop] = _LoopState()
+	return state
+
+
+async def aclose():
+	"""Close the client of the running loop (call on shutdown)."""
+	state = _states.pop(asyncio.get_running_loop(), None)
+	if state is not None:
+		await state.client.aclose()
+
+
+async def request(method: str, url: str, *, timeout: float | None = None, retries: int | None = None, **kwargs):
+	"""Async `http_client.request`: same retry and rate-limit handling, awaiting instead of sleeping."""
+	state = _state()
+	semaphore = state.semaphore(url)
+	upstream = metrics.upstream_name(url)
+	retries = MAX_RETRIES if retries is None else retries
+	timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+	attempt = 0
+	while True:
+		start = time.perf_counter()
+		try:
+			async with semaphore:
+				resp = await state.client.request(method, url, timeout=timeout, **kwargs)
+		except (httpx.TransportError, httpx.TimeoutException):
+			metrics.observe_upstream(upstream, time.perf_counter() - start, error=True)
+			if attempt >= retries:
+				raise
+			await asyncio.sleep(_backoff(attempt))
+			attempt += 1
+			continue
+		metrics.observe_upstream(upstream, time.perf_counter() - start, resp.status_code, metrics.response_bytes(resp))
+		if attempt >= retries or not _should_retry(resp):
+			return resp
+		delay = _server_delay(resp)
+		if delay is None:
+			delay = _backoff(attempt)
+		elif delay > BACKOFF_MAX:
+			return resp
+		else:
+			delay += random.uniform(0, BACKOFF_BASE)
+		await asyncio.sleep(delay)
+		attempt += 1
+
+
+async def get(url: str, **kwargs):
+	return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs):
+	kwargs.setdefault("retries", 0)
+	return await request("POST", url, **kwargs)
+
+
+def stream(method: str, url: str, *, timeout: float | None = None, **kwargs):
+	"""`async with stream(...) as resp` for streamed bodies; not retried."""
+	return _state().client.stream(method, url, timeout=DEFAULT_TIMEOUT if timeout is None else timeout, **kwargs)
@@ -0,0 +1,154 @@
+"""In-process caches shared by the services."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+	"""Size-bounded LRU cache with a TTL and stale-while-revalidate refresh.
+
+	Entries younger than `ttl` seconds are served as-is. Entries older than `ttl`
+	but younger than `ttl + stale_ttl` are served immediately while one background
+	thread reloads them. Anything older (or missing) is loaded synchronously.
+	Loader exceptions propagate and nothing is stored. Caches given a `name` report
+	their hit/stale/miss counts through `TTLCache.named()`.
+	"""
+
+	_named = {}
+
+	def __init__(self, ttl: float, stale_ttl: float = 0.0, maxsize: int = 128, name: str | None = None):
+		self.ttl = ttl
+		self.stale_ttl = stale_ttl
+		self.maxsize = maxsize
+		self._data = OrderedDict()  # key -> (value, stored_at)
+		self._lock = threading.Lock()
+		self._refreshing = set()
+		self._generation = 0
+		self._tasks = set()
+		self.hits = self.stale = self.misses = 0
+		if name:
+			TTLCache._named[name] = self
+
+	def get(self, key, loader):
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is not None:
+				value, stored_at = entry
+				age = time.monotonic() - stored_at
+				if age < self.ttl + self.stale_ttl:
+					self._data.move_to_end(key)
+					if age < self.ttl:
+						self.hits += 1
+					else:
+						self.stale += 1
+					if age >= self.ttl and key not in self._refreshing:
+						self._refreshing.add(key)
+						threading.Thread(target=self._refresh, args=(key, loader, self._generation), daemon=True).start()
+					return value
+			generation = self._generation
+			self.misses += 1
+		value = loader()
+		self._store(key, value, generation)
+		return value
+
+	async def aget(self, key, loader):
+		"""`get` for a coroutine `loader`; stale entries are refreshed by a background task."""
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is not None:
+				value, stored_at = entry
+				age = time.monotonic() - stored_at
+				if age < self.ttl + self.stale_ttl:
+					self._data.move_to_end(key)
+					if age < self.ttl:
+						self.hits += 1
+					else:
+						self.stale += 1
+					if age >= self.ttl and key not in self._refreshing:
+						self._refreshing.add(key)
+						task = asyncio.ensure_future(self._arefresh(key, loader, self._generation))
+						self._tasks.add(task)
+						task.add_done_callback(self._tasks.discard)
+					return value
+			generation = self._generation
+			self.misses += 1
+		value = await loader()
+		self._store(key, value, generation)
+		return value
+
+	async def _arefresh(self, key, loader, generation):
+		try:
+			self._store(key, await loader(), generation)
+		except Exception:
+			pass
+		finally:
+			with self._lock:
+				self._refreshing.discard(key)
+
+	def _refresh(self, key, loader, generation):
+		try:
+			self._store(key, loader(), generation)
+		except Exception:
+			pass  # keep serving the stale value until it expires
+		finally:
+			with self._lock:
+				self._refreshing.discard(key)
+
+	def _store(self, key, value, generation):
+		with self._lock:
+			# Drop results of loads that started before an invalidation
+			if generation != self._generation:
+				return
+			self._data[key] = (value, time.monotonic())
+			self._data.move_to_end(key)
+			while len(self._data) > self.maxsize:
+				self._data.popitem(last=False)
+
+	def peek(self, key):
+		"""(value, age in seconds) if `key` is present and not expired, else None; never loads."""
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				self.misses += 1
+				return None
+			age = time.monotonic() - entry[1]
+			if age >= self.ttl + self.stale_ttl:
+				del self._data[key]
+				self.misses += 1
+				return None
+			self._data.move_to_end(key)
+			if age < self.ttl:
+				self.hits += 1
+			else:
+				self.stale += 1
+			return entry[0], age
+
+	def set(self, key, value):
+		with self._lock:
+			generation = self._generation
+		self._store(key, value, generation)
+
+	def invalidate(self, key=None, predicate=None):
+		"""Drop one key, every key matching `predicate`, or (no args) everything."""
+		with self._lock:
+			self._generation += 1
+			if key is None and predicate is None:
+				self._data.clear()
+				return
+			if key is not None:
+				self._data.pop(key, None)
+			if predicate is not None:
+				for k in [k for k in self._data if predicate(k)]:
+					del self._data[k]
+
+	@classmethod
+	def named(cls):
+		"""{name: {hit, stale, miss, entries}} for every named cache."""
+		return {
+			name: {"hit": c.hits, "stale": c.stale, "miss": c.misses, "entries": len(c)}
+			for name, c in list(cls._named.items())
+		}
+
+	def __len__(self):
+		return len(self._data)
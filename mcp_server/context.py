@@ -0,0 +1,250 @@
+"""Automatic LLM context gathering.
+
+Each provider fetches one integration's data. `select_providers` picks the ones
+the question is about from keyword signals; `gather_context` runs only those,
+concurrently and each under its own deadline, and `context_to_system_prompt`
+renders the result within a token budget.
+"""
+import asyncio
+import contextvars
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from . import github_fetch, metrics, store
+from .file_service import search_local_text_files
+from .steam_service import owned_library
+try:
+	from .ytmusic_service import list_liked_songs_free
+except Exception:
+	list_liked_songs_free = None
+
+
+def steam_context(query: str = ""):
+	library = owned_library()
+	if isinstance(library, dict) or not len(library):
+		return None
+	return {
+		"owned_count": library.count,
+		"top_games": [
+			{"name": library.names[i], "appid": library.appids[i], "min": library.forever[i]}
+			for i in library.top(25)
+		]
+	}
+
+
+def ytmusic_context(query: str = ""):
+	if list_liked_songs_free is None:
+		return None
+	liked_songs = list_liked_songs_free(limit=10)
+	if not (isinstance(liked_songs, list) and liked_songs):
+		return None
+	return {"liked_songs": [{"title": s.get("title"), "artist": s.get("artist"), "url": s.get("url")} for s in liked_songs]}
+
+
+def github_context(query: str = ""):
+	"""Recent commits for env GITHUB_USER/GITHUB_REPO, if both are set."""
+	gh_user = os.getenv("GITHUB_USER")
+	gh_repo = os.getenv("GITHUB_REPO")
+	if not (gh_user and gh_repo):
+		return None
+	url = f"{github_fetch.API_ROOT}/repos/{gh_user}/{gh_repo}/commits"
+	# Conditional request: an unchanged repo costs a 304, not a fresh download
+	res, _ = github_fetch.fetch(url, {"per_page": 10, "page": 1})
+	if not isinstance(res, list):
+		return None
+	return {
+		"repo": f"{gh_user}/{gh_repo}",
+		"recent_commits": [
+			{"sha": c.get("sha"), "msg": (c.get("commit", {}) or {}).get("message")}
+			for c in res[:10]
+		]
+	}
+
+
+def notes_context(query: str = ""):
+	"""Best-matching local notes for the question (BM25), with snippets."""
+	if not query.strip():
+		return None
+	hits = search_local_text_files(query, limit=3)
+	if not hits:
+		return None
+	return {"matches": [{"name": h["name"], "snippet": h["snippet"]} for h in hits]}
+
+
+PROVIDERS = {
+	"steam": steam_context,
+	"ytmusic": ytmusic_context,
+	"github": github_context,
+	"notes": notes_context,
+}
+
+# Words that make a provider worth consulting for a question
+SIGNALS = {
+	"steam": re.compile(r"\b(?:steam|games?|gaming|gamer|play(?:ed|ing|time)?|hours|achievements?|library|backlog)\b"),
+	"ytmusic": re.compile(r"\b(?:songs?|music|listen(?:ed|ing)?|artists?|albums?|playlists?|tracks?|ytm|youtube|liked)\b"),
+	"github": re.compile(r"\b(?:github|repos?|repository|repositories|commits?|code|coding|pull requests?|prs?|issues?|branch(?:es)?|projects?)\b"),
+	"notes": re.compile(r"\b(?:notes?|wrote|written|journal|todo|to-do|remember|remind(?:er)?s?|txt)\b"),
+}
+
+# Comma-separated providers consulted for every question (e.g. "notes")
+ALWAYS = [n.strip() for n in os.getenv("CONTEXT_PROVIDERS_ALWAYS", "").split(",") if n.strip()]
+TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "400"))
+
+DEFAULT_TIMEOUT = float(os.getenv("CONTEXT_PROVIDER_TIMEOUT", "5"))
+
+# Shared pool; a provider that overruns its deadline keeps its worker until it returns.
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv("CONTEXT_WORKERS", "8")), thread_name_prefix="context")
+
+
+def provider_timeout(name: str) -> float:
+	"""Deadline in seconds for a provider (env CONTEXT_TIMEOUT_<NAME>, else the default)."""
+	try:
+		return float(os.getenv(f"CONTEXT_TIMEOUT_{name.upper()}", DEFAULT_TIMEOUT))
+	except ValueError:
+		return DEFAULT_TIMEOUT
+
+
+def select_providers(prompt_text: str):
+	"""Providers relevant to the question, most signal hits first."""
+	lq = (prompt_text or "").lower()
+	hits = {name: len(rx.findall(lq)) for name, rx in SIGNALS.items()}
+	names = sorted((n for n, c in hits.items() if c), key=lambda n: -hits[n])
+	return names + [n for n in ALWAYS if n in PROVIDERS and n not in names]
+
+
+def context_scope(prompt_text: str = "", providers=None) -> str:
+	"""What the context for a question depends on besides live data: the providers
+	consulted and the snapshot store version. Keys answers reused without gathering."""
+	try:
+		version = store.snapshot_version()
+	except Exception:
+		version = 0.0
+	return f"{','.join(_selected(prompt_text, providers))}@{version}"
+
+
+def _timed(fn, query):
+	start = time.perf_counter()
+	try:
+		return fn(query), None, time.perf_counter() - start
+	except Exception as e:
+		return None, e, time.perf_counter() - start
+
+
+def _selected(prompt_text: str, providers):
+	selected = select_providers(prompt_text) if providers is None else list(providers)
+	return [n for n in selected if n in PROVIDERS]
+
+
+def _submit(names, prompt_text):
+	# Each provider runs in a copy of the caller's context so its upstream calls count toward the request's timings
+	return {name: _executor.submit(contextvars.copy_context().run, _timed, PROVIDERS[name], prompt_text) for name in names}
+
+
+def _record(name, outcome, results, timings):
+	value, error, elapsed = outcome
+	ms = round(elapsed * 1000, 1)
+	if error is not None:
+		timings[name] = {"status": "error", "ms": ms, "error": str(error)}
+	elif value:
+		results[name] = value
+		timings[name] = {"status": "ok", "ms": ms}
+	else:
+		timings[name] = {"status": "empty", "ms": ms}
+	metrics.PROVIDER_LATENCY.observe(elapsed, provider=name, status=timings[name]["status"])
+
+
+def gather_context(prompt_text: str = "", providers=None):
+	"""Run the relevant context providers concurrently.
+
+	`providers` overrides the query-based selection. Returns (ctx, timings): ctx
+	holds each provider that produced data before its deadline, in relevance
+	order; timings maps every provider name to {"status", "ms"}, with status
+	"skipped" for the ones not consulted.
+	"""
+	names = _selected(prompt_text, providers)
+	start = time.perf_counter()
+	futures = _submit(names, prompt_text)
+	results, timings = {}, {name: {"status": "skipped", "ms": 0.0} for name in PROVIDERS if name not in futures}
+	# Wait in deadline order so each provider only ever waits for its own budget
+	for name in sorted(names, key=provider_timeout):
+		budget = provider_timeout(name)
+		remaining = budget - (time.perf_counter() - start)
+		try:
+			outcome = futures[name].result(timeout=max(0.0, remaining))
+		except FutureTimeout:
+			futures[name].cancel()
+			timings[name] = {"status": "timeout", "ms": round(budget * 1000, 1)}
+			metrics.PROVIDER_LATENCY.observe(budget, provider=name, status="timeout")
+			continue
+		_record(name, outcome, results, timings)
+	return {name: results[name] for name in names if name in results}, timings
+
+
+async def agather_context(prompt_text: str = "", providers=None):
+	"""`gather_context` for the ASGI app: awaits the providers without blocking the event loop."""
+	names = _selected(prompt_text, providers)
+	start = time.perf_counter()
+	futures = _submit(names, prompt_text)
+	results, timings = {}, {name: {"status": "skipped", "ms": 0.0} for name in PROVIDERS if name not in futures}
+	for name in sorted(names, key=provider_timeout):
+		budget = provider_timeout(name)
+		remaining = budget - (time.perf_counter() - start)
+		try:
+			outcome = await asyncio.wait_for(asyncio.wrap_future(futures[name]), timeout=max(0.0, remaining))
+		except asyncio.TimeoutError:
+			timings[name] = {"status": "timeout", "ms": round(budget * 1000, 1)}
+			metrics.PROVIDER_LATENCY.observe(budget, provider=name, status="timeout")
+			continue
+		_record(name, outcome, results, timings)
+	return {name: results[name] for name in names if name in results}, timings
+
+
+def estimate_tokens(text: str) -> int:
+	"""Rough token count (~4 characters per token for English text)."""
+	return (len(text) + 3) // 4
+
+
+def _sections(ctx: dict):
+	"""(header, items, separator) per provider, in ctx order."""
+	out = []
+	for name, data in ctx.items():
+		if name == "steam":
+			out.append((f"Steam: owned_count={data.get('owned_count')} top_games=", [g.get("name") or "" for g in data.get("top_games", [])], ", "))
+		elif name == "ytmusic":
+			out.append(("YT Music liked: ", [v.get("title") or "" for v in data.get("liked_songs", [])], ", "))
+		elif name == "github":
+			out.append((f"GitHub {data.get('repo')} recent commits: ", [(c.get("msg") or "").split("\n")[0][:80] for c in data.get("recent_commits", [])], "; "))
+		elif name == "notes":
+			out.append(("Notes: ", [f"{m.get('name')}: {' '.join((m.get('snippet') or '').split())}" for m in data.get("matches", [])], " / "))
+	return out
+
+
+def context_to_system_prompt(ctx: dict, max_tokens: int | None = None) -> str:
+	"""Render context within `max_tokens` (default CONTEXT_TOKEN_BUDGET).
+
+	Items are taken round-robin across providers so one long list cannot crowd
+	out the others; whatever does not fit is dropped.
+	"""
+	if not ctx:
+		return ""
+	budget = (TOKEN_BUDGET if max_tokens is None else max_tokens) * 4
+	sections = _sections(ctx)
+	taken = [[] for _ in sections]
+	used = len("Context: ")
+	progress = True
+	while progress:
+		progress = False
+		for i, (header, items, sep) in enumerate(sections):
+			if len(taken[i]) == len(items):
+				continue
+			item = items[len(taken[i])]
+			cost = len(item) + (len(sep) if taken[i] else len(header) + 3)
+			if used + cost > budget:
+				continue
+			taken[i].append(item)
+			used += cost
+			progress = True
+	parts = [header + sep.join(chosen) for (header, _, sep), chosen in zip(sections, taken) if chosen]
+	return "Context: " + " | ".join(parts) if parts else ""
@@ -1,17 +1,189 @@
-from googleapiclient.discovery import build
-from google.oauth2.credentials import Credentials
+import os
+import threading
+
+from . import metrics, store
+from .lazy import LazyModule
+from .sync_service import max_age
+
+# The Google client libraries are imported on the first Gmail call
+discovery = LazyModule("googleapiclient.discovery")
+gapi_http = LazyModule("googleapiclient.http")
+auth_requests = LazyModule("google.auth.transport.requests")
+credentials = LazyModule("google.oauth2.credentials")
+
+
+SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
+# Set GMAIL_API_ENDPOINT (e.g. http://127.0.0.1:8080/) to point the client at a local fake
+API_ENDPOINT = os.getenv("GMAIL_API_ENDPOINT")
+# Gmail allows up to 100 calls per batch but throttles large ones; 50 is the documented sweet spot
+BATCH_SIZE = max(1, min(int(os.getenv("GMAIL_BATCH_SIZE", "50")), 100))
+METADATA_HEADERS = ["From", "Subject", "Date"]
+SNAPSHOT_TOKEN = "snapshot:"
+MESSAGE_FIELDS = "id,threadId,snippet,internalDate,labelIds,payload/headers"
+
+# (token file mtime, credentials, service); rebuilt only when token.json changes
+_service = (None, None, None)
+_service_lock = threading.Lock()
+# httplib2 connections are not thread-safe, so calls on the shared service are serialized
+_call_lock = threading.RLock()
+
+
+def _token_file():
+	return os.getenv("GMAIL_TOKEN_FILE", "token.json")
+
+
+def _gmail():
+	"""Return the shared Gmail service, refreshing an expired token first."""
+	global _service
+	path = _token_file()
+	with _service_lock:
+		mtime, creds, service = _service
+		if service is None or mtime != os.stat(path).st_mtime_ns:
+			creds = credentials.Credentials.from_authorized_user_file(path, SCOPES)
+			options = {"api_endpoint": API_ENDPOINT} if API_ENDPOINT else None
+			# static_discovery uses the discovery document bundled with googleapiclient (no fetch)
+			service = discovery.build("gmail", "v1", credentials=creds, cache_discovery=False, static_discovery=True, client_options=options)
+		if not creds.valid and creds.refresh_token:
+			creds.refresh(auth_requests.Request())
+			with open(path, "w", encoding="utf-8") as f:
+				f.write(creds.to_json())
+		_service = (os.stat(path).st_mtime_ns, creds, service)
+		return service
+
+
+def _new_batch(service, callback):
+	if API_ENDPOINT:
+		return gapi_http.BatchHttpRequest(callback=callback, batch_uri=API_ENDPOINT.rstrip("/") + "/batch/gmail/v1")
+	return service.new_batch_http_request(callback=callback)
+
+
+def _map_message(m):
+	headers = {h.get("name", "").lower(): h.get("value") for h in ((m.get("payload") or {}).get("headers") or [])}
+	return {
+		"id": m.get("id"),
+		"thread_id": m.get("threadId"),
+		"sender": headers.get("from"),
+		"subject": headers.get("subject"),
+		"date": headers.get("date"),
+		"snippet": m.get("snippet", "")
+	}
+
+
+def _get_metadata(service, ids):
+	"""Fetch metadata for message ids with one batch request per BATCH_SIZE ids, in input order."""
+	found = {}
+	errors = {}
+
+	def on_response(request_id, response, exception):
+		if exception is not None:
+			errors[request_id] = str(exception)
+		else:
+			found[request_id] = response
+
+	messages = service.users().messages()
+	for i in range(0, len(ids), BATCH_SIZE):
+		batch = _new_batch(service, on_response)
+		for msg_id in ids[i:i + BATCH_SIZE]:
+			batch.add(messages.get(
+				userId="me", id=msg_id, format="metadata", metadataHeaders=METADATA_HEADERS, fields=MESSAGE_FIELDS
+			), request_id=msg_id)
+		with metrics.upstream_call("gmail"):
+			batch.execute()
+	return [_map_message(found[i]) if i in found else {"id": i, "error": errors.get(i, "missing")} for i in ids]
+
+
+def list_emails(max_results: int = 5, query: str | None = None, page_token: str | None = None, skip: int = 0):
+	"""Latest emails matching `query` (Gmail search syntax): {"emails", "next_page_token"}.
+
+	One messages.list call per 500 ids, then one batch call per BATCH_SIZE messages.
+	The first `skip` matches are only listed, not fetched.
+	"""
+	service = _gmail()
+	ids = []
+	token = page_token
+	wanted = max(0, skip) + max_results
+	with _call_lock:
+		messages = service.users().messages()
+		while len(ids) < wanted:
+			params = {"userId": "me", "maxResults": min(wanted - len(ids), 500), "fields": "messages/id,nextPageToken"}
+			if query:
+				params["q"] = query
+			if token:
+				params["pageToken"] = token
+			with metrics.upstream_call("gmail"):
+				res = messages.list(**params).execute()
+			ids.extend(m["id"] for m in res.get("messages", []))
+			token = res.get("nextPageToken")
+			if not token:
+				break
+		ids = ids[max(0, skip):]
+		emails = _get_metadata(service, ids) if ids else []
+	return {"emails": emails, "next_page_token": token}
+
+
+def fetch_emails(max_results: int = 5):
+	return list_emails(max_results=max_results)["emails"]
+
+
+def sync_emails(max_results: int = 25):
+	"""Fetch the latest emails live and replace the local snapshot.
+
+	Messages whose fetch failed are not stored; their previous rows are kept instead.
+	"""
+	emails = fetch_emails(max_results=max_results)
+	fetched = [e for e in emails if "error" not in e]
+	if len(fetched) == len(emails):
+		store.save_emails(fetched)
+	else:
+		store.upsert_emails(fetched, keep=max_results)
+	return emails
+
+
+def _snapshot_page(max_results: int, offset: int):
+	"""One page of the snapshot, or None if it cannot serve it (stale, past its end, short first page)."""
+	try:
+		if not store.has_snapshot("gmail", max_age=max_age("gmail")):
+			return None
+		emails = store.load_emails(limit=max_results, offset=offset)
+	except Exception:
+		return None  # unreadable store: the caller goes to the live API
+	if not emails or (offset == 0 and len(emails) < max_results):
+		return None
+	return {"emails": emails, "next_page_token": f"{SNAPSHOT_TOKEN}{offset + len(emails)}"}
+
+
+def read_page(max_results: int = 5, query: str | None = None, page_token: str | None = None, fresh: bool = False):
+	"""One page of the latest emails: {"emails", "next_page_token"}.
+
+	Unfiltered pages are served from the snapshot with "snapshot:<offset>" tokens and
+	continue live from that offset past its end, so callers page the same way either
+	way (the last snapshot page may hold fewer than max_results). Searches and Gmail
+	page tokens always go to Gmail.
+	"""
+	if query or (page_token and not page_token.startswith(SNAPSHOT_TOKEN)):
+		return list_emails(max_results=max_results, query=query, page_token=page_token)
+	offset = int(page_token[len(SNAPSHOT_TOKEN):]) if page_token else 0
+	if not fresh:
+		page = _snapshot_page(max_results, offset)
+		if page is not None:
+			return page
+	res = list_emails(max_results=max_results, skip=offset)
+	if offset == 0:
+		# Only the newest page: merged into the snapshot rather than replacing it
+		store.upsert_emails([e for e in res["emails"] if "error" not in e])
+	return res
 
 
 def register(server):
 	@server.tool("read_emails")
-	def read_emails():
-		creds = Credentials.from_authorized_user_file("token.json", ["https://www.googleapis.com/auth/gmail.readonly"])
-		service = build("gmail", "v1", credentials=creds)
-		results = service.users().messages().list(userId="me", maxResults=5).execute()
-		messages = results.get("messages", [])
-		emails = []
-		for msg in messages:
-			m = service.users().messages().get(userId="me", id=msg["id"]).execute()
-			snippet = m.get("snippet", "")
-			emails.append({"id": msg["id"], "snippet": snippet})
-		return emails
\ No newline at end of file
+	def read_emails(max_results: int = 5, query: str = "", page_token: str = "", fresh: bool = False):
+		"""Return the latest emails (id, sender, subject, date, snippet).
+
+		query uses Gmail search syntax (e.g. "from:bob is:unread"); pass the returned
+		next_page_token to continue. Without query the local snapshot is used unless
+		fresh=true; its pages continue from Gmail once the snapshot runs out.
+		"""
+		try:
+			return read_page(max_results=max_results, query=query or None, page_token=page_token or None, fresh=fresh)
+		except Exception as e:
+			return {"error": str(e)}
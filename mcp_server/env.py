@@ -0,0 +1,24 @@
+"""Loading of the project's .env file."""
+import io
+
+from dotenv import find_dotenv, load_dotenv
+
+
+def load_env():
+	"""Load .env, reading it once and decoding with the first encoding that fits."""
+	path = find_dotenv()
+	if not path:
+		return
+	try:
+		with open(path, "rb") as f:
+			raw = f.read()
+	except OSError:
+		return
+	# utf-8-sig also reads plain UTF-8; a UTF-16 BOM is not valid UTF-8, so it falls through
+	for enc in ("utf-8-sig", "utf-16", "latin-1"):
+		try:
+			text = raw.decode(enc)
+		except UnicodeDecodeError:
+			continue
+		load_dotenv(stream=io.StringIO(text))
+		return
@@ -1,4 +1,27 @@
+import codecs
+import json
+import math
+import mmap
 import os
+import re
+import threading
+import time
+from collections import defaultdict
+
+
+INDEX_FILENAME = ".notes_index.json"
+INDEX_VERSION = 2
+# Encoding is detected from this much of the start of a file
+SAMPLE_BYTES = 64 * 1024
+# Largest slice fetch_local_file returns when no window is requested
+MAX_FETCH_BYTES = int(os.getenv("NOTES_MAX_FETCH_BYTES", str(1024 * 1024)))
+# Searches rescan an unchanged notes dir at most this often (seconds)
+REFRESH_INTERVAL = float(os.getenv("NOTES_REFRESH_INTERVAL", "5"))
+# Search snippets are taken from this much of the start of a hit
+SNIPPET_SCAN_BYTES = int(os.getenv("NOTES_SNIPPET_SCAN_BYTES", str(256 * 1024)))
+_TOKEN = re.compile(r"[a-z0-9]+")
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+_NEWLINES = {"utf-16-le": b"\n\x00", "utf-16-be": b"\x00\n"}
 
 
 def list_local_text_files(notes_dir: str = "./notes"):
@@ -7,18 +30,350 @@ def list_local_text_files(notes_dir: str = "./notes"):
 	return [f for f in os.listdir(notes_dir) if f.endswith(".txt")]
 
 
+def detect_encoding(sample: bytes, complete: bool = False) -> str:
+	"""Guess a codec from the first bytes of a file (BOM, UTF-8 validity, NUL layout).
+
+	`complete` says the sample is the whole file, so a truncated multi-byte
+	sequence at its end is an error rather than a chunk boundary.
+	"""
+	for bom, enc in _BOMS:
+		if sample.startswith(bom):
+			return enc
+	# BOM-less UTF-16 text has a NUL in every other byte (checked first: mostly-ASCII
+	# UTF-16 is also valid UTF-8, NULs included)
+	if len(sample) >= 4:
+		if sample[1::2].count(0) > len(sample) // 4:
+			return "utf-16-le"
+		if sample[0::2].count(0) > len(sample) // 4:
+			return "utf-16-be"
+	try:
+		codecs.getincrementaldecoder("utf-8")().decode(sample, final=complete)
+		return "utf-8"
+	except UnicodeDecodeError:
+		pass
+	return "latin-1"
+
+
+def _bom_length(buf, encoding: str) -> int:
+	for bom, enc in _BOMS:
+		if enc == encoding and buf[:len(bom)] == bom:
+			return len(bom)
+	return 0
+
+
+def _decode(raw, encoding: str) -> str:
+	text = bytes(raw).decode(encoding, errors="replace")
+	# Match text-mode reads: universal newlines
+	return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _file_encoding(path: str, name: str, notes_dir: str) -> str:
+	cached = get_notes_index(notes_dir).cached_encoding(name)
+	if cached:
+		return cached
+	with open(path, "rb") as f:
+		sample = f.read(SAMPLE_BYTES)
+	return detect_encoding(sample, complete=len(sample) < SAMPLE_BYTES)
+
+
 def read_local_text_file(name: str, notes_dir: str = "./notes"):
 	path = os.path.join(notes_dir, name)
-	# Try a few common encodings gracefully
-	for enc in ("utf-8-sig", "utf-8", "utf-16", "latin-1"):
-		try:
-			with open(path, "r", encoding=enc, errors="strict") as f:
-				return f.read()
-		except UnicodeDecodeError:
-			continue
-	# Last resort: read bytes and decode with replacement to avoid crashes
+	encoding = _file_encoding(path, name, notes_dir)
 	with open(path, "rb") as f:
-		return f.read().decode("utf-8", errors="replace")
+		raw = f.read()
+	return _decode(raw[_bom_length(raw, encoding):], encoding)
+
+
+def _find_line_end(buf, nl: bytes, unit: int, base: int, pos: int, end: int) -> int:
+	"""Offset just past the next newline at or after `pos`, or `end` if none."""
+	while True:
+		hit = buf.find(nl, pos, end)
+		if hit == -1:
+			return end
+		if unit == 1 or (hit - base) % unit == 0:
+			return hit + len(nl)
+		pos = hit + 1
+
+
+def _find_line_start_back(buf, nl: bytes, unit: int, base: int, end: int) -> int:
+	"""Offset of the start of the line that ends just before `end`."""
+	while True:
+		hit = buf.rfind(nl, base, end)
+		if hit == -1:
+			return base
+		if unit == 1 or (hit - base) % unit == 0:
+			return hit + len(nl)
+		end = hit + len(nl) - 1
+
+
+def text_window(buf, encoding: str, offset: int | None = None, length: int | None = None,
+		line_start: int | None = None, line_count: int | None = None,
+		head: int | None = None, tail: int | None = None, max_bytes: int = MAX_FETCH_BYTES):
+	"""Decode one window of an encoded text buffer (bytes or mmap) without copying the rest.
+
+	Windows: byte `offset`/`length` (file offsets, so a previous `end` can be passed
+	back as the next `offset`); 1-based `line_start`/`line_count`; first `head` lines;
+	last `tail` lines. With none given, the first `max_bytes`. At most `max_bytes`
+	are decoded. Returns {content, start, end, truncated}.
+	"""
+	size = len(buf)
+	base = _bom_length(buf, encoding)
+	nl = _NEWLINES.get(encoding, b"\n")
+	unit = 2 if encoding.startswith("utf-16") else 1
+	if head is not None:
+		line_start, line_count = 1, head
+	if tail is not None:
+		end = size
+		# A trailing newline terminates the last line rather than starting a new one
+		limit = end - len(nl) if end - len(nl) >= base and buf[end - len(nl):end] == nl else end
+		start = limit
+		for _ in range(max(0, tail)):
+			start = _find_line_start_back(buf, nl, unit, base, limit)
+			limit = start - len(nl)
+			if limit < base:
+				break
+	elif line_start is not None or line_count is not None:
+		start = base
+		for _ in range(max(0, (line_start or 1) - 1)):
+			if start >= size:
+				break
+			start = _find_line_end(buf, nl, unit, base, start, size)
+		end = start
+		if line_count is None:
+			end = size
+		else:
+			for _ in range(max(0, line_count)):
+				if end >= size:
+					break
+				end = _find_line_end(buf, nl, unit, base, end, size)
+	else:
+		start = max(base, offset or 0)
+		start -= (start - base) % unit
+		end = size if length is None else min(size, start + max(0, length))
+	truncated = end - start > max_bytes
+	if truncated and tail is not None:
+		start = end - max_bytes
+		start += (start - base) % unit
+	elif truncated:
+		end = start + max_bytes
+	end -= (end - start) % unit
+	if encoding == "utf-8":
+		# Never split a multi-byte character at either edge
+		while start < end and buf[start] & 0xC0 == 0x80:
+			start += 1
+		while end < size and start < end and buf[end] & 0xC0 == 0x80:
+			end -= 1
+	return {"content": _decode(buf[start:end], encoding), "start": start, "end": end, "truncated": truncated}
+
+
+def read_local_text_window(name: str, notes_dir: str = "./notes", **window):
+	"""Read a byte or line window of a note via mmap; see `text_window` for options."""
+	path = os.path.join(notes_dir, name)
+	encoding = _file_encoding(path, name, notes_dir)
+	with open(path, "rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		if size == 0:
+			return {"content": "", "start": 0, "end": 0, "truncated": False, "size": 0, "encoding": encoding}
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+			result = text_window(buf, encoding, **window)
+	result.update({"size": size, "encoding": encoding})
+	return result
+
+
+def _tokenize(text: str):
+	return [t for t in _TOKEN.findall(text.lower()) if len(t) > 1]
+
+
+class NotesIndex:
+	"""Incremental inverted index over the .txt files in a notes directory.
+
+	Each file's mtime/size, detected encoding and term frequencies are persisted to
+	INDEX_FILENAME inside the directory; `refresh()` only re-reads files whose
+	mtime or size changed. `search()` ranks with BM25 and only rescans when the
+	directory changed (a note added, removed or renamed) or REFRESH_INTERVAL passed.
+	"""
+
+	K1 = 1.5
+	B = 0.75
+
+	def __init__(self, notes_dir: str):
+		self.notes_dir = notes_dir
+		self.index_path = os.path.join(notes_dir, INDEX_FILENAME)
+		self._files = {}  # name -> {"mtime_ns", "size", "encoding", "length", "terms"}
+		self._postings = defaultdict(dict)  # term -> {name: tf}
+		self._lock = threading.Lock()
+		self._scanned = None  # (dir mtime_ns, time.monotonic()) of the last refresh
+		self._load()
+
+	def _load(self):
+		try:
+			with open(self.index_path, "r", encoding="utf-8") as f:
+				data = json.load(f)
+		except (OSError, ValueError):
+			return
+		if data.get("version") != INDEX_VERSION:
+			return  # written by an older layout; rebuilt on the next refresh
+		files = data.get("files", {})
+		for name, entry in files.items():
+			self._add(name, entry)
+
+	def _save(self):
+		tmp = self.index_path + ".tmp"
+		try:
+			with open(tmp, "w", encoding="utf-8") as f:
+				json.dump({"version": INDEX_VERSION, "files": self._files}, f)
+			os.replace(tmp, self.index_path)
+		except OSError:
+			pass  # read-only notes dir: the in-memory index still works
+
+	def _add(self, name: str, entry: dict):
+		self._files[name] = entry
+		for term, tf in entry["terms"].items():
+			self._postings[term][name] = tf
+
+	def _remove(self, name: str):
+		entry = self._files.pop(name, None)
+		if not entry:
+			return
+		for term in entry["terms"]:
+			posting = self._postings.get(term)
+			if posting is not None:
+				posting.pop(name, None)
+				if not posting:
+					del self._postings[term]
+
+	def _index_file(self, name: str, st):
+		with open(os.path.join(self.notes_dir, name), "rb") as f:
+			raw = f.read()
+		encoding = detect_encoding(raw[:SAMPLE_BYTES], complete=len(raw) <= SAMPLE_BYTES)
+		text = _decode(raw[_bom_length(raw, encoding):], encoding)
+		tokens = _tokenize(text)
+		terms = defaultdict(int)
+		for t in tokens:
+			terms[t] += 1
+		return {
+			"mtime_ns": st.st_mtime_ns,
+			"size": st.st_size,
+			"encoding": encoding,
+			"length": len(tokens),
+			"terms": dict(terms)
+		}
+
+	def refresh(self):
+		"""Stat every note and re-index only new or changed files. Returns #changes."""
+		if not os.path.isdir(self.notes_dir):
+			return 0
+		dir_mtime = os.stat(self.notes_dir).st_mtime_ns
+		with self._lock:
+			seen = set()
+			changed = 0
+			with os.scandir(self.notes_dir) as it:
+				for de in it:
+					if not de.name.endswith(".txt") or not de.is_file():
+						continue
+					seen.add(de.name)
+					st = de.stat()
+					entry = self._files.get(de.name)
+					if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+						continue
+					try:
+						new_entry = self._index_file(de.name, st)
+					except OSError:
+						continue
+					self._remove(de.name)
+					self._add(de.name, new_entry)
+					changed += 1
+			for name in [n for n in self._files if n not in seen]:
+				self._remove(name)
+				changed += 1
+			if changed:
+				self._save()
+				# Saving the index touched the directory; a note added meanwhile is still
+				# picked up within REFRESH_INTERVAL
+				dir_mtime = os.stat(self.notes_dir).st_mtime_ns
+			self._scanned = (dir_mtime, time.monotonic())
+			return changed
+
+	def refresh_if_stale(self):
+		"""`refresh()` unless the directory is unchanged and was scanned within REFRESH_INTERVAL."""
+		scanned = self._scanned
+		if scanned is not None and time.monotonic() - scanned[1] < REFRESH_INTERVAL:
+			try:
+				if os.stat(self.notes_dir).st_mtime_ns == scanned[0]:
+					return 0
+			except OSError:
+				return 0
+		return self.refresh()
+
+	def cached_encoding(self, name: str):
+		"""Encoding detected at index time, if the file is unchanged since then."""
+		with self._lock:
+			entry = self._files.get(name)
+		if not entry:
+			return None
+		try:
+			st = os.stat(os.path.join(self.notes_dir, name))
+		except OSError:
+			return None
+		if entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+			return entry["encoding"]
+		return None
+
+	def search(self, query: str, limit: int = 10):
+		"""BM25 search; returns [(name, score)] best first."""
+		self.refresh_if_stale()
+		terms = set(_tokenize(query))
+		with self._lock:
+			n = len(self._files)
+			if not n or not terms:
+				return []
+			avg_len = sum(e["length"] for e in self._files.values()) / n or 1.0
+			scores = defaultdict(float)
+			for term in terms:
+				posting = self._postings.get(term)
+				if not posting:
+					continue
+				idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+				for name, tf in posting.items():
+					norm = self.K1 * (1 - self.B + self.B * self._files[name]["length"] / avg_len)
+					scores[name] += idf * tf * (self.K1 + 1) / (tf + norm)
+		ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+		return [(name, round(score, 4)) for name, score in ranked[:limit]]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_notes_index(notes_dir: str = "./notes") -> NotesIndex:
+	key = os.path.abspath(notes_dir)
+	with _indexes_lock:
+		index = _indexes.get(key)
+		if index is None:
+			index = _indexes[key] = NotesIndex(notes_dir)
+		return index
+
+
+def _snippet(name: str, terms: set, notes_dir: str, width: int = 200):
+	"""First line with a query term in the first SNIPPET_SCAN_BYTES of the note (else its start)."""
+	try:
+		text = read_local_text_window(name, notes_dir, max_bytes=SNIPPET_SCAN_BYTES)["content"]
+	except (OSError, ValueError):
+		return None
+	for line in text.splitlines():
+		if terms & set(_tokenize(line)):
+			return line.strip()[:width]
+	return text.strip()[:width]
+
+
+def search_local_text_files(query: str, limit: int = 10, notes_dir: str = "./notes"):
+	"""Keyword (BM25) search over notes; only the start of each returned hit is re-read for its snippet."""
+	hits = get_notes_index(notes_dir).search(query, limit=limit)
+	terms = set(_tokenize(query))
+	return [
+		{"name": name, "score": score, "snippet": _snippet(name, terms, notes_dir)}
+		for name, score in hits
+	]
 
 
 def register(server):
@@ -27,5 +382,21 @@ def register(server):
 		return [{"name": f, "uri": f"file://{f}"} for f in list_local_text_files()]
 
 	@server.tool("fetch_local_file")
-	def fetch_file(name: str):
-		return {"content": read_local_text_file(name)}
\ No newline at end of file
+	def fetch_file(name: str, offset: int | None = None, length: int | None = None,
+			line_start: int | None = None, line_count: int | None = None,
+			head: int | None = None, tail: int | None = None):
+		"""Read a local note, optionally windowed.
+
+		Use offset/length for a byte range, line_start (1-based)/line_count for a line
+		range, or head/tail for the first/last N lines. Without a window, files larger
+		than the fetch limit are truncated (see `truncated`).
+		"""
+		return read_local_text_window(
+			name, offset=offset, length=length, line_start=line_start,
+			line_count=line_count, head=head, tail=tail
+		)
+
+	@server.tool("search_local_files")
+	def search_files(query: str, limit: int = 10):
+		"""Keyword search (BM25) across local notes; returns names, scores and snippets."""
+		return search_local_text_files(query, limit=limit)
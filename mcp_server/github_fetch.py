@@ -0,0 +1,129 @@
+"""GitHub REST fetching with conditional requests and concurrent pagination.
+
+Every GET remembers its ETag/Last-Modified; repeats send If-None-Match /
+If-Modified-Since and a 304 (which GitHub does not count against the rate limit)
+is answered from memory. `fetch_all_pages` reads the page count from page 1's
+`Link` header and fetches the remaining pages concurrently.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from . import http_client, metrics
+from .singleflight import group
+
+
+API_ROOT = os.getenv("GITHUB_API_BASE", "https://api.github.com").rstrip("/")
+PAGE_WORKERS = int(os.getenv("GITHUB_PAGE_WORKERS", "6"))
+MAX_PAGES = int(os.getenv("GITHUB_MAX_PAGES", "200"))
+VALIDATOR_CACHE_SIZE = int(os.getenv("GITHUB_ETAG_CACHE_SIZE", "1024"))
+
+# (url, params, transform, token hash) -> (etag, last_modified, last_page, data)
+_validators = OrderedDict()
+_lock = threading.Lock()
+_flights = group("github")
+
+
+def default_headers():
+	h = {"Accept": "application/vnd.github+json"}
+	token = os.getenv("GITHUB_TOKEN")
+	if token:
+		h["Authorization"] = f"token {token}"
+	return h
+
+
+def _last_page(resp) -> int:
+	url = (resp.links.get("last") or {}).get("url")
+	if not url:
+		return 1
+	try:
+		return int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+	except ValueError:
+		return 1
+
+
+def fetch(url: str, params: dict | None = None, headers: dict | None = None, transform=None):
+	"""Conditional GET. Returns (data, last_page).
+
+	`transform` is applied to the decoded JSON of successful responses before it is
+	remembered, so only the compact form is kept in memory. Error payloads are
+	returned untransformed and never cached.
+	"""
+	headers = dict(headers if headers is not None else default_headers())
+	# Per token, so a response is never revalidated or served under another token
+	auth = headers.get("Authorization")
+	token = hashlib.sha256(auth.encode()).hexdigest() if auth else None
+	key = (url, urlencode(sorted((params or {}).items())), getattr(transform, "__qualname__", None), token)
+	# Identical concurrent requests (same headers too) share one call
+	return _flights.do(key + (tuple(sorted(headers.items())),), lambda: _fetch(key, url, params, headers, transform))
+
+
+def _fetch(key, url, params, headers, transform):
+	with _lock:
+		cached = _validators.get(key)
+	h = dict(headers)
+	if cached:
+		if cached[0]:
+			h["If-None-Match"] = cached[0]
+		if cached[1]:
+			h["If-Modified-Since"] = cached[1]
+	resp = http_client.get(url, params=params, headers=h)
+	metrics.GITHUB_CONDITIONAL.inc(result="unconditional" if not cached else "not_modified" if resp.status_code == 304 else "modified")
+	if resp.status_code == 304 and cached:
+		with _lock:
+			_validators.move_to_end(key)
+		return cached[3], cached[2]
+	try:
+		data = resp.json()
+	except ValueError:
+		# HTML or empty bodies (502s, abuse rate limit pages)
+		return {"message": f"GitHub returned HTTP {resp.status_code}"}, 1
+	if not resp.ok:
+		return data, 1
+	if transform is not None:
+		data = transform(data)
+	last_page = _last_page(resp)
+	etag = resp.headers.get("ETag")
+	last_modified = resp.headers.get("Last-Modified")
+	if etag or last_modified:
+		with _lock:
+			_validators[key] = (etag, last_modified, last_page, data)
+			_validators.move_to_end(key)
+			while len(_validators) > VALIDATOR_CACHE_SIZE:
+				_validators.popitem(last=False)
+	return data, last_page
+
+
+def fetch_pages(url: str, params: dict | None = None, headers: dict | None = None,
+		transform=None, max_pages: int | None = None, per_page: int = 100):
+	"""Fetch up to `max_pages` pages of a list endpoint; returns (items or error payload, complete).
+
+	`transform` maps one page's JSON list to the list that is kept and concatenated.
+	A failed later page yields {"message", "page"} rather than a silently short list;
+	`complete` is False when the endpoint has more pages than were fetched.
+	"""
+	params = {**(params or {}), "per_page": min(per_page, 100)}
+	first, total = fetch(url, {**params, "page": 1}, headers, transform)
+	if not isinstance(first, list):
+		return first, False
+	last_page = min(total, max_pages or MAX_PAGES)
+	if last_page <= 1:
+		return list(first), total <= last_page
+	with ThreadPoolExecutor(max_workers=min(PAGE_WORKERS, last_page - 1), thread_name_prefix="github-page") as pool:
+		pages = list(pool.map(lambda n: fetch(url, {**params, "page": n}, headers, transform)[0], range(2, last_page + 1)))
+	items = list(first)
+	for n, page in enumerate(pages, start=2):
+		if not isinstance(page, list):
+			message = page.get("message") if isinstance(page, dict) else None
+			return {"message": f"Page {n} of {last_page} failed: {message or 'unexpected response'}", "page": n}, False
+		items.extend(page)
+	return items, total <= last_page
+
+
+def fetch_all_pages(url: str, params: dict | None = None, headers: dict | None = None,
+		transform=None, max_pages: int | None = None, per_page: int = 100):
+	"""Fetch every page of a list endpoint (up to `max_pages`); returns a list, or an error payload if any page failed."""
+	return fetch_pages(url, params, headers, transform, max_pages, per_page)[0]
@@ -0,0 +1,232 @@
+"""Git Trees and Blobs API access for the GitHub file tools.
+
+A repository listing is one recursive Trees API call per ref (revalidated with
+ETags like every other GitHub GET) instead of one Contents API call per
+directory. File contents come from the Blobs API and are cached on disk under
+their blob SHA, so content shared by branches and commits is downloaded once;
+reads are windowed with `file_service.text_window` over an mmap of the blob.
+"""
+import base64
+import hashlib
+import mmap
+import os
+import threading
+
+from . import http_client
+from .file_service import SAMPLE_BYTES, detect_encoding, text_window
+from .github_fetch import API_ROOT, fetch
+from .singleflight import group
+
+
+BLOB_DIR = os.getenv("GITHUB_BLOB_CACHE", "github_blobs")
+BLOB_CACHE_MAX = int(os.getenv("GITHUB_BLOB_CACHE_MAX_MB", "256")) * 1024 * 1024
+# Trees API calls one walk of a truncated tree may make
+WALK_MAX_CALLS = int(os.getenv("GITHUB_TREE_WALK_MAX_CALLS", "200"))
+
+_TYPES = {"blob": "file", "tree": "dir", "commit": "submodule"}
+_flights = group("github_blobs")
+_size_lock = threading.Lock()
+_cache_bytes = None  # bytes under BLOB_DIR; scanned on the first download
+
+
+def _compact_tree(res):
+	entries = [{
+		"path": e.get("path"),
+		"type": "symlink" if e.get("mode") == "120000" else _TYPES.get(e.get("type"), e.get("type")),
+		"sha": e.get("sha"),
+		"size": e.get("size")
+	} for e in res.get("tree", [])]
+	return {"sha": res.get("sha"), "truncated": bool(res.get("truncated")), "entries": entries}
+
+
+def _listing(user: str, repo: str, tree_ish: str, recursive: bool, headers: dict | None):
+	url = f"{API_ROOT}/repos/{user}/{repo}/git/trees/{tree_ish}"
+	data, _ = fetch(url, {"recursive": 1} if recursive else None, headers, _compact_tree)
+	return data
+
+
+def tree(user: str, repo: str, ref: str | None = None, headers: dict | None = None):
+	"""Every path in the repository at `ref` (default branch): {sha, truncated, entries}, or GitHub's error payload."""
+	return _listing(user, repo, ref or "HEAD", True, headers)
+
+
+def walk(user: str, repo: str, ref: str | None = None, path: str = "", headers: dict | None = None):
+	"""Every entry under `path` when the recursive tree is too large for one response.
+
+	Subtrees are listed recursively one by one; a subtree that is truncated again is
+	listed one level at a time. Returns {truncated, entries} (truncated when a single
+	directory is too large or WALK_MAX_CALLS ran out) or GitHub's error payload.
+	"""
+	sha, prefix = ref or "HEAD", ""
+	for part in [p for p in path.strip("/").split("/") if p]:
+		listing = _listing(user, repo, sha, False, headers)
+		if "entries" not in listing:
+			return listing
+		entry = next((e for e in listing["entries"] if e["path"] == part and e["type"] == "dir"), None)
+		if entry is None:
+			return {"message": "Not Found"}
+		sha, prefix = entry["sha"], prefix + part + "/"
+	entries, truncated, calls = [], False, 0
+	# The recursive listing of the root is known to be truncated already
+	pending = [(sha, prefix, bool(prefix))]
+	while pending:
+		if calls >= WALK_MAX_CALLS:
+			truncated = True
+			break
+		sha, prefix, recursive = pending.pop()
+		listing = _listing(user, repo, sha, recursive, headers)
+		calls += 1
+		if "entries" not in listing:
+			return listing
+		if recursive and listing["truncated"]:
+			pending.append((sha, prefix, False))
+			continue
+		truncated = truncated or listing["truncated"]
+		for e in listing["entries"]:
+			entries.append({**e, "path": prefix + e["path"]})
+			if not recursive and e["type"] == "dir":
+				pending.append((e["sha"], prefix + e["path"] + "/", True))
+	entries.sort(key=lambda e: e["path"])
+	return {"truncated": truncated, "entries": entries}
+
+
+def list_dir(entries, path: str = "", recursive: bool = False):
+	"""Entries under directory `path` (all descendants when `recursive`)."""
+	prefix = path.strip("/")
+	out = []
+	for e in entries:
+		p = e["path"]
+		if prefix:
+			if not p.startswith(prefix + "/"):
+				continue
+			rest = p[len(prefix) + 1:]
+		else:
+			rest = p
+		if not recursive and "/" in rest:
+			continue
+		item = {"name": p.rsplit("/", 1)[-1], "path": p, "type": e["type"]}
+		if e["type"] == "file":
+			item["size"] = e["size"]
+		out.append(item)
+	return out
+
+
+def _blob_path(sha: str) -> str:
+	return os.path.join(BLOB_DIR, sha[:2], sha)
+
+
+def git_blob_sha(data: bytes) -> str:
+	return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def _evict(added: int, keep: str):
+	"""Keep BLOB_DIR under BLOB_CACHE_MAX by deleting the least recently read blobs (never `keep`)."""
+	global _cache_bytes
+	with _size_lock:
+		if _cache_bytes is None:
+			files = [os.path.join(d, f) for d, _, names in os.walk(BLOB_DIR) for f in names]
+			_cache_bytes = sum(os.path.getsize(f) for f in files)
+		else:
+			_cache_bytes += added
+		if _cache_bytes <= BLOB_CACHE_MAX:
+			return
+		files = sorted(
+			((os.stat(p), p) for p in (os.path.join(d, f) for d, _, names in os.walk(BLOB_DIR) for f in names)),
+			key=lambda sp: sp[0].st_mtime
+		)
+		for st, p in files:
+			if _cache_bytes <= BLOB_CACHE_MAX * 0.9:
+				break
+			if p == keep:
+				continue
+			try:
+				os.remove(p)
+				_cache_bytes -= st.st_size
+			except OSError:
+				pass
+
+
+def _download(user: str, repo: str, sha: str, headers: dict | None, path: str):
+	if os.path.exists(path):
+		return path
+	# The raw media type skips base64 (a third more bytes on the wire)
+	h = {**(headers or {}), "Accept": "application/vnd.github.raw+json"}
+	resp = http_client.get(f"{API_ROOT}/repos/{user}/{repo}/git/blobs/{sha}", headers=h)
+	if not resp.ok:
+		try:
+			message = resp.json().get("message")
+		except ValueError:
+			message = None
+		raise RuntimeError(message or f"GitHub returned HTTP {resp.status_code}")
+	data = resp.content
+	if resp.headers.get("Content-Type", "").startswith("application/json"):
+		payload = resp.json()
+		if payload.get("encoding") == "base64":
+			data = base64.b64decode(payload.get("content", ""))
+	if git_blob_sha(data) != sha:
+		raise RuntimeError("Blob content does not match its SHA")
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+	with open(tmp, "wb") as f:
+		f.write(data)
+	os.replace(tmp, path)
+	_evict(len(data), path)
+	return path
+
+
+def blob(user: str, repo: str, sha: str, headers: dict | None = None) -> str:
+	"""Local path of blob `sha`, downloading it on first use."""
+	path = _blob_path(sha)
+	if os.path.exists(path):
+		try:
+			os.utime(path)  # recency for eviction
+		except OSError:
+			pass
+		return path
+	return _flights.do(sha, lambda: _download(user, repo, sha, headers, path))
+
+
+def read_blob(path: str, **window):
+	"""Window of a cached blob as text: {content, start, end, truncated, size, encoding}, or {binary: True, size}."""
+	with open(path, "rb") as f:
+		size = os.fstat(f.fileno()).st_size
+		if size == 0:
+			return {"content": "", "start": 0, "end": 0, "truncated": False, "size": 0, "encoding": "utf-8"}
+		with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+			sample = buf[:SAMPLE_BYTES]
+			encoding = detect_encoding(sample, complete=size <= SAMPLE_BYTES)
+			if b"\0" in sample and not encoding.startswith("utf-16"):
+				return {"binary": True, "size": size}
+			result = text_window(buf, encoding, **window)
+	result.update({"size": size, "encoding": encoding})
+	return result
+
+
+def _contents_sha(user: str, repo: str, path: str, ref: str | None, headers: dict | None):
+	"""Blob SHA of a file via the Contents API (for paths missing from a truncated tree)."""
+	params = {"ref": ref} if ref else None
+	res, _ = fetch(f"{API_ROOT}/repos/{user}/{repo}/contents/{path}", params, headers)
+	return res.get("sha") if isinstance(res, dict) and res.get("type") == "file" else None
+
+
+def read_file(user: str, repo: str, path: str, ref: str | None = None, headers: dict | None = None, **window):
+	"""Windowed text of a repository file at `ref`, through the blob cache."""
+	path = path.strip("/")
+	listing = tree(user, repo, ref, headers)
+	if "entries" not in listing:
+		return {"path": path, "error": listing.get("message") or "GitHub request failed"}
+	entry = next((e for e in listing["entries"] if e["path"] == path), None)
+	if entry is not None:
+		sha = entry["sha"] if entry["type"] == "file" else None
+	else:
+		sha = _contents_sha(user, repo, path, ref, headers) if listing["truncated"] else None
+	if not sha:
+		return {"path": path, "error": "Not a file or content unavailable"}
+	for _ in range(2):
+		try:
+			return {"path": path, "sha": sha, **read_blob(blob(user, repo, sha, headers), **window)}
+		except FileNotFoundError:
+			pass  # evicted between lookup and open: download again
+		except Exception as e:
+			return {"path": path, "sha": sha, "error": str(e)}
+	return {"path": path, "sha": sha, "error": "Blob evicted while reading"}
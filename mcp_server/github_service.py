@@ -1,46 +1,127 @@
 import os
-import requests
+
+from . import http_client, store
+from .github_fetch import API_ROOT, fetch, fetch_all_pages, fetch_pages
+from .github_git import list_dir, read_file, tree, walk
+from .sync_service import max_age
 
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN", "your_token_here")
 HEADERS = {"Authorization": f"token {GITHUB_TOKEN}"} if GITHUB_TOKEN else {}
 
 
+def _compact_repos(res):
+	return [{"name": r.get("name"), "url": r.get("html_url")} for r in res] if isinstance(res, list) else []
+
+
+def _compact_commits(res):
+	items = res if isinstance(res, list) else []
+	return [{
+		"sha": c.get("sha"),
+		"msg": (c.get("commit", {}) or {}).get("message"),
+		"author": ((c.get("commit", {}) or {}).get("author", {}) or {}).get("name"),
+		"date": ((c.get("commit", {}) or {}).get("author", {}) or {}).get("date"),
+		"url": c.get("html_url")
+	} for c in items]
+
+
+def sync_commits(user: str, repo: str, max_pages: int | None = None, headers: dict | None = None):
+	"""Fetch the commit history (up to `max_pages` pages) and replace the local snapshot for user/repo.
+
+	Returns (commits or error payload, complete). The snapshot is only replaced with
+	the whole history: a failed page is recorded in sync_state, so the old history is
+	not served as current either, and a history cut short by `max_pages` is returned
+	without touching the snapshot.
+	"""
+	url = f"{API_ROOT}/repos/{user}/{repo}/commits"
+	res, complete = fetch_pages(url, headers=HEADERS if headers is None else headers, transform=_compact_commits, max_pages=max_pages)
+	if not isinstance(res, list):
+		message = res.get("message") if isinstance(res, dict) else None
+		store.mark_synced("github", f"{user}/{repo}", "error", message or "GitHub request failed")
+	elif complete:
+		store.save_commits(user, repo, res)
+	return res, complete
+
+
+def _stored_commits(user: str, repo: str, limit: int | None = None, offset: int = 0):
+	"""Commits from the snapshot store, or None if user/repo was never synced or is stale."""
+	try:
+		if store.has_snapshot("github", f"{user}/{repo}", max_age("github")):
+			return store.load_commits(user, repo, limit=limit, offset=offset)
+	except Exception:
+		pass
+	return None
+
+
 def register(server):
 	@server.tool("github_repos")
 	def github_repos(user: str):
-		url = f"https://api.github.com/users/{user}/repos"
-		res = requests.get(url, headers=HEADERS).json()
-		return [{"name": r.get("name"), "url": r.get("html_url")} for r in res if isinstance(res, list)]
+		url = f"{API_ROOT}/users/{user}/repos"
+		res = fetch_all_pages(url, headers=HEADERS, transform=_compact_repos)
+		return res if isinstance(res, list) else []
 
 	@server.tool("github_commits")
 	def github_commits(user: str, repo: str):
-		url = f"https://api.github.com/repos/{user}/{repo}/commits"
-		res = requests.get(url, headers=HEADERS).json()
+		url = f"{API_ROOT}/repos/{user}/{repo}/commits"
+		res, _ = fetch(url, {"per_page": 5}, headers=HEADERS, transform=_compact_commits)
 		items = res if isinstance(res, list) else []
-		return [{"sha": c.get("sha"), "msg": c.get("commit", {}).get("message")} for c in items[:5]]
+		return [{"sha": c.get("sha"), "msg": c.get("msg")} for c in items[:5]]
 
 	@server.tool("github_commits_paginated")
-	def github_commits_paginated(user: str, repo: str, page: int = 1, per_page: int = 100):
-		"""Fetch commits with pagination to allow full history retrieval."""
+	def github_commits_paginated(user: str, repo: str, page: int = 1, per_page: int = 100, fresh: bool = False):
+		"""Fetch commits with pagination to allow full history retrieval.
+
+		Served from the local snapshot when user/repo has been synced; fresh=true asks GitHub.
+		"""
 		if per_page > 100:
 			per_page = 100
-		url = f"https://api.github.com/repos/{user}/{repo}/commits?page={page}&per_page={per_page}"
-		res = requests.get(url, headers=HEADERS).json()
-		items = res if isinstance(res, list) else []
-		return [{
-			"sha": c.get("sha"),
-			"msg": (c.get("commit", {}) or {}).get("message"),
-			"author": ((c.get("commit", {}) or {}).get("author", {}) or {}).get("name"),
-			"date": ((c.get("commit", {}) or {}).get("author", {}) or {}).get("date"),
-			"url": c.get("html_url")
-		} for c in items]
+		if not fresh:
+			stored = _stored_commits(user, repo, limit=per_page, offset=(max(1, page) - 1) * per_page)
+			if stored is not None:
+				return stored
+		url = f"{API_ROOT}/repos/{user}/{repo}/commits"
+		res, _ = fetch(url, {"page": page, "per_page": per_page}, headers=HEADERS, transform=_compact_commits)
+		return res if isinstance(res, list) else []
+
+	@server.tool("github_commits_all")
+	def github_commits_all(user: str, repo: str, max_pages: int = 100, fresh: bool = False):
+		"""Fetch full commit history in one call (pages fetched concurrently, up to max_pages x 100).
+
+		Served from the local snapshot when user/repo has been synced; fresh=true asks GitHub.
+		"""
+		if not fresh:
+			stored = _stored_commits(user, repo, limit=max(1, max_pages) * 100)
+			if stored is not None:
+				return stored
+		res, _ = sync_commits(user, repo, max_pages=max_pages)
+		if isinstance(res, list):
+			return res
+		return {"error": (res or {}).get("message", "GitHub request failed") if isinstance(res, dict) else "GitHub request failed"}
 
 	@server.tool("github_list_files")
-	def github_list_files(user: str, repo: str, path: str = ""):
-		# Uses Contents API
-		url = f"https://api.github.com/repos/{user}/{repo}/contents/{path}"
-		res = requests.get(url, headers=HEADERS).json()
+	def github_list_files(user: str, repo: str, path: str = "", ref: str | None = None, recursive: bool = False):
+		"""Files and directories under `path` at `ref` (default branch); `recursive` lists the whole subtree.
+
+		One Git Trees API call covers the whole repository and is revalidated with its
+		ETag, so browsing further directories at the same ref costs no extra quota.
+		Repositories too large for one call are listed subtree by subtree; if even
+		that is cut short, {entries, truncated: true, warning} is returned instead.
+		"""
+		listing = tree(user, repo, ref, HEADERS)
+		if "entries" in listing and listing["truncated"] and recursive:
+			# Too large for one response: list the subtrees under `path` one by one
+			listing = walk(user, repo, ref, path, HEADERS)
+			if "entries" in listing and listing["truncated"]:
+				return {
+					"entries": list_dir(listing["entries"], path, recursive),
+					"truncated": True,
+					"warning": "Listing is incomplete: the tree is too large to list in full; narrow `path`."
+				}
+		if "entries" in listing and not (listing["truncated"] and not recursive):
+			return list_dir(listing["entries"], path, recursive)
+		# Error, or a tree too large for one response: fall back to the Contents API
+		url = f"{API_ROOT}/repos/{user}/{repo}/contents/{path}"
+		res = http_client.get(url, params={"ref": ref} if ref else None, headers=HEADERS).json()
 		items = res if isinstance(res, list) else []
 		return [
 			{"name": i.get("name"), "path": i.get("path"), "type": i.get("type")}
@@ -48,19 +129,35 @@ def register(server):
 		]
 
 	@server.tool("github_file_content")
-	def github_file_content(user: str, repo: str, path: str):
-		url = f"https://api.github.com/repos/{user}/{repo}/contents/{path}"
-		res = requests.get(url, headers=HEADERS).json()
-		if isinstance(res, dict) and res.get("encoding") == "base64":
-			import base64
-			content = base64.b64decode(res.get("content", "")).decode("utf-8", errors="ignore")
-			return {"path": path, "content": content}
-		return {"path": path, "error": "Not a file or content unavailable"}
+	def github_file_content(
+		user: str,
+		repo: str,
+		path: str,
+		ref: str | None = None,
+		offset: int | None = None,
+		length: int | None = None,
+		line_start: int | None = None,
+		line_count: int | None = None,
+		head: int | None = None,
+		tail: int | None = None
+	):
+		"""Read a repository file at `ref` (default branch), or one window of it.
+
+		Windows: byte `offset`/`length`; 1-based `line_start`/`line_count`; first
+		`head` or last `tail` lines. Without one, up to the first MAX_FETCH_BYTES are
+		returned. `truncated` says whether content continues past `end` (pass it back
+		as `offset`). Contents are cached locally by blob SHA, so unchanged files are
+		never downloaded again, whichever branch or commit they are read from.
+		"""
+		return read_file(
+			user, repo, path, ref, HEADERS, offset=offset, length=length,
+			line_start=line_start, line_count=line_count, head=head, tail=tail
+		)
 
 	@server.tool("github_issues")
 	def github_issues(user: str, repo: str, state: str = "open", limit: int = 10):
-		url = f"https://api.github.com/repos/{user}/{repo}/issues?state={state}&per_page={limit}"
-		res = requests.get(url, headers=HEADERS).json()
+		url = f"{API_ROOT}/repos/{user}/{repo}/issues?state={state}&per_page={limit}"
+		res = http_client.get(url, headers=HEADERS).json()
 		items = res if isinstance(res, list) else []
 		return [
 			{"number": i.get("number"), "title": i.get("title"), "state": i.get("state"), "url": i.get("html_url")}
@@ -69,8 +166,8 @@ def register(server):
 
 	@server.tool("github_issue")
 	def github_issue(user: str, repo: str, number: int):
-		url = f"https://api.github.com/repos/{user}/{repo}/issues/{number}"
-		res = requests.get(url, headers=HEADERS).json()
+		url = f"{API_ROOT}/repos/{user}/{repo}/issues/{number}"
+		res = http_client.get(url, headers=HEADERS).json()
 		if isinstance(res, dict):
 			return {
 				"number": res.get("number"),
@@ -0,0 +1,143 @@
+"""Shared outbound HTTP client.
+
+One pooled `requests.Session` per host (keep-alive, so repeat calls skip the
+TCP/TLS handshake), a per-host concurrency cap, default timeouts, and retries with
+jittered exponential backoff that honour `Retry-After` and GitHub's
+`X-RateLimit-*` headers.
+"""
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from . import metrics
+from .lazy import LazyModule
+
+# Imported on the first request; tools that never call out do not pay for it
+requests = LazyModule("requests")
+
+
+DEFAULT_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+# Longest we will sleep before a retry; rate-limit resets further out are returned as-is
+BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HOST_CONCURRENCY = int(os.getenv("HTTP_HOST_CONCURRENCY", "8"))
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_sessions = {}
+_semaphores = {}
+_lock = threading.Lock()
+
+
+def _origin(url: str) -> str:
+	parts = urlsplit(url)
+	return f"{parts.scheme}://{parts.netloc}"
+
+
+def session_for(url: str):
+	"""Return (session, semaphore) for the URL's origin, creating them on first use."""
+	origin = _origin(url)
+	with _lock:
+		session = _sessions.get(origin)
+		if session is None:
+			session = requests.Session()
+			adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+			session.mount("http://", adapter)
+			session.mount("https://", adapter)
+			_sessions[origin] = session
+			_semaphores[origin] = threading.BoundedSemaphore(HOST_CONCURRENCY)
+		return session, _semaphores[origin]
+
+
+def close_all():
+	with _lock:
+		for session in _sessions.values():
+			session.close()
+		_sessions.clear()
+		_semaphores.clear()
+
+
+def _backoff(attempt: int) -> float:
+	# Full jitter: uniform in [0, base * 2^attempt], capped
+	return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _server_delay(resp):
+	"""Seconds the server asked us to wait, or None if it did not say."""
+	retry_after = resp.headers.get("Retry-After")
+	if retry_after:
+		try:
+			return max(0.0, float(retry_after))
+		except ValueError:
+			try:
+				return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+			except Exception:
+				pass
+	if resp.headers.get("X-RateLimit-Remaining") == "0":
+		try:
+			return max(0.0, float(resp.headers.get("X-RateLimit-Reset", "")) - time.time())
+		except ValueError:
+			pass
+	return None
+
+
+def _should_retry(resp) -> bool:
+	if resp.status_code in RETRY_STATUSES:
+		return True
+	# GitHub reports primary and secondary rate limits as 403
+	return resp.status_code == 403 and (
+		"Retry-After" in resp.headers or resp.headers.get("X-RateLimit-Remaining") == "0"
+	)
+
+
+def request(method: str, url: str, *, timeout: float | None = None, retries: int | None = None, **kwargs):
+	"""Send a request through the pooled session for the URL's host.
+
+	Connection errors, timeouts, 429/5xx and rate-limited 403s are retried up to
+	`retries` times. The final response is returned whatever its status; the final
+	connection error is raised.
+	"""
+	session, semaphore = session_for(url)
+	upstream = metrics.upstream_name(url)
+	retries = MAX_RETRIES if retries is None else retries
+	timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+	attempt = 0
+	while True:
+		start = time.perf_counter()
+		try:
+			with semaphore:
+				resp = session.request(method, url, timeout=timeout, **kwargs)
+		except (requests.ConnectionError, requests.Timeout):
+			metrics.observe_upstream(upstream, time.perf_counter() - start, error=True)
+			if attempt >= retries:
+				raise
+			time.sleep(_backoff(attempt))
+			attempt += 1
+			continue
+		metrics.observe_upstream(upstream, time.perf_counter() - start, resp.status_code, metrics.response_bytes(resp))
+		if attempt >= retries or not _should_retry(resp):
+			return resp
+		delay = _server_delay(resp)
+		if delay is None:
+			delay = _backoff(attempt)
+		elif delay > BACKOFF_MAX:
+			return resp
+		else:
+			delay += random.uniform(0, BACKOFF_BASE)
+		resp.close()
+		time.sleep(delay)
+		attempt += 1
+
+
+def get(url: str, **kwargs):
+	return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs):
+	# POSTs are not idempotent; only retry them when the caller asks to
+	kwargs.setdefault("retries", 0)
+	return request("POST", url, **kwargs)
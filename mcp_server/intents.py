@@ -0,0 +1,252 @@
+"""Intents the app answers directly, grouped by service.
+
+Each handler receives the pattern match, the lowercased query and the original
+query, and returns (payload, status) or None to let the next candidate (and
+finally the LLM) handle it.
+"""
+import re
+
+from . import github_fetch
+from .file_service import list_local_text_files, read_local_text_window, search_local_text_files
+from .router import Router
+from .steam_service import all_owned_games, app_user_details, get_owned_count
+try:
+	from .ytmusic_service import list_liked_songs_free, liked_songs_all
+except Exception:
+	list_liked_songs_free = None
+	liked_songs_all = None
+try:
+	from .steam_service import playtime_for_name
+except Exception:
+	playtime_for_name = None
+try:
+	from .steam_enrich import breakdown
+except Exception:
+	breakdown = None
+try:
+	from .steam_achievements import achievement_stats
+except Exception:
+	achievement_stats = None
+
+
+router = Router()
+
+_HEAD_TAIL = re.compile(r"\b(first|head|last|tail)\s+(\d+)\s+lines?")
+_LINES = re.compile(r"\blines?\s+(\d+)(?:\s*(?:-|to)\s*(\d+))?")
+_BYTES = re.compile(r"\bbytes?\s+(\d+)\s*(?:-|to)\s*(\d+)")
+_LIMIT = re.compile(r"\b(?:first|top|list|show)\s+(\d+)\b|\b(\d+)\s+(?:of\s+)?(?:my\s+)?(?:liked|steam|games)\b")
+_APPIDS = re.compile(r"\b\d{3,7}\b")
+
+
+def _limit(lq: str, default: int) -> int:
+	m = _LIMIT.search(lq)
+	return int(m.group(1) or m.group(2)) if m else default
+
+
+def _wants_all(lq: str) -> bool:
+	return bool(re.search(r"\b(?:all|everything)\b", lq))
+
+
+def file_window(lq: str) -> dict:
+	"""Parse 'lines 10-20', 'line 5', 'first/last 20 lines', 'bytes 0-4096' from a query."""
+	m = _HEAD_TAIL.search(lq)
+	if m:
+		return {"head" if m.group(1) in ("first", "head") else "tail": int(m.group(2))}
+	m = _LINES.search(lq)
+	if m:
+		first = int(m.group(1))
+		last = int(m.group(2)) if m.group(2) else first
+		return {"line_start": first, "line_count": max(1, last - first + 1)}
+	m = _BYTES.search(lq)
+	if m:
+		return {"offset": int(m.group(1)), "length": max(0, int(m.group(2)) - int(m.group(1)))}
+	return {}
+
+
+# Notes
+
+@router.intent(
+	"notes.search",
+	[
+		r"(?:search|find)\s+(?:in\s+)?(?:my\s+)?notes?\s+(?:for\s+|about\s+)?(?P<q>.+)$",
+		r"(?:search|find)\s+(?P<q>.+?)\s+in\s+(?:my\s+)?notes?$",
+	],
+	keywords=("search", "find"), priority=2
+)
+def notes_search(m, lq, query):
+	return {"answer": search_local_text_files(m.group("q").strip().strip("?!."))}, 200
+
+
+@router.intent(
+	"notes.list",
+	[r"\b(?:list|show)\s+(?:(?:all|my|the|local)\s+)*notes?\b", r"\bwhat notes\b", r"^notes?\s+list\b"],
+	keywords=("note", "notes"), priority=1
+)
+def notes_list(m, lq, query):
+	return {"answer": list_local_text_files()}, 200
+
+
+@router.intent(
+	"notes.read",
+	[
+		r"(?:open|read|fetch|show)\s+(?P<name>[\w.-]+\.txt)",
+		r"(?:first|last|head|tail)\s+\d+\s+lines?\s+(?:of|from|in)\s+(?P<name>[\w.-]+\.txt)",
+	],
+	keywords=("txt",), priority=3
+)
+def notes_read(m, lq, query):
+	window = file_window(lq)
+	try:
+		res = read_local_text_window(m.group("name"), **window)
+	except Exception as e:
+		return {"error": str(e)}, 400
+	content = res.pop("content")
+	if window or res["truncated"]:
+		return {"answer": content, "window": res}, 200
+	return {"answer": content}, 200
+
+
+# Steam
+
+@router.intent(
+	"steam.playtime",
+	[r"how (?:many|much) (?:hours|time)\b.*\b(?:for|in|on)\s+(?P<name>(?!steam\b).+?)(?:\s+(?:on|in)\s+steam)?[?!.\s]*$"],
+	keywords=("hours", "time"), priority=2
+)
+def steam_playtime(m, lq, query):
+	if playtime_for_name is None:
+		return None
+	res = playtime_for_name(m.group("name").strip())
+	if isinstance(res, dict) and res.get("best_match"):
+		bm = res["best_match"]
+		return {"answer": f"You played {bm['name']} for {bm['hours']} hours ({bm['minutes']} minutes).", "details": res}, 200
+	return res, 200
+
+
+@router.intent(
+	"steam.count",
+	[r"\bhow many\s+(?:\w+\s+)?games\b", r"\bgames do i (?:own|have)\b", r"\bcount (?:my )?(?:steam )?games\b"],
+	keywords=("many", "own", "have", "games", "count"), priority=3
+)
+def steam_count(m, lq, query):
+	data = get_owned_count()
+	if isinstance(data, dict) and "count" in data:
+		return {"answer": f"You own {data['count']} games on Steam."}, 200
+	return {"answer": data}, 200
+
+
+@router.intent(
+	"steam.user_details",
+	[r"\buser details\b.*\bappids?\b"],
+	keywords=("appid", "appids"), priority=3
+)
+def steam_user_details(m, lq, query):
+	ids = _APPIDS.findall(lq)
+	if not ids:
+		return None
+	return {"answer": app_user_details(appids=",".join(ids))}, 200
+
+
+@router.intent(
+	"steam.games",
+	[r"\bsteam\b.*\b(?:games|list|library)\b", r"\b(?:list|show)\b.*\bsteam\b"],
+	keywords=("steam",), priority=1
+)
+def steam_games(m, lq, query):
+	if _wants_all(lq):
+		return {"answer": all_owned_games(images=False)}, 200
+	return {"answer": all_owned_games(limit=_limit(lq, 25), images=False)}, 200
+
+
+@router.intent(
+	"steam.breakdown",
+	[r"\b(?P<by>genres?|developers?|studios?|publishers?)\b.*\b(?:play|played|own|library|games?)\b",
+		r"\b(?:play|played|own|library|games?)\b.*\b(?P<by>genres?|developers?|studios?|publishers?)\b"],
+	keywords=("genre", "genres", "developer", "developers", "studio", "studios", "publisher", "publishers"), priority=3
+)
+def steam_breakdown(m, lq, query):
+	if breakdown is None:
+		return None
+	word = m.group("by")
+	by = "developer" if word.startswith(("developer", "studio")) else "publisher" if word.startswith("publisher") else "genre"
+	weight = "count" if re.search(r"\b(?:own|owned|how many|most games)\b", lq) else "playtime"
+	res = breakdown(by=by, weight=weight, limit=_limit(lq, 5))
+	if res.get("error"):
+		return {"answer": res}, 200
+	if not res["top"]:
+		return {"answer": "No Steam Store details are cached yet; run steam_enrich_library (or sync_now steam_store) first.", "details": res}, 200
+	if weight == "playtime":
+		items = ", ".join(f"{row[by]} ({row['hours']} h)" for row in res["top"])
+	else:
+		items = ", ".join(f"{row[by]} ({row['games']} game{'s' if row['games'] != 1 else ''})" for row in res["top"])
+	cov = res["coverage"]
+	pending = f" ({cov['pending']} still being fetched from the Steam Store)" if cov["pending"] else ""
+	return {"answer": f"Top {by}s by {weight}: {items}. Based on {cov['enriched']} of {cov['owned']} owned games{pending}.", "details": res}, 200
+
+
+@router.intent(
+	"steam.achievements",
+	[
+		# "achievements" alone is not enough ("notes about achievements in elden ring")
+		r"\bachievements?\b.*\b(?:completion|complete|completed|progress|rate|percent(?:age)?|unlocked|stats|statistics)\b",
+		r"\b(?:completion|progress|percent(?:age)?|unlocked|how many)\b.*\bachievements?\b",
+		r"\bcompletion (?:rate|percentage)\b",
+		r"\b100%\s*(?:complete|completed)?\b.*\bgames?\b",
+		r"\bgames?\b.*\b100%\s*(?:complete|completed|achievements?)\b",
+	],
+	keywords=("achievement", "achievements", "completion", "100"), priority=3
+)
+def steam_achievements(m, lq, query):
+	if achievement_stats is None:
+		return None
+	res = achievement_stats(top_n=None if _wants_all(lq) else 100, limit=_limit(lq, 5))
+	if res.get("error"):
+		return {"answer": res}, 200
+	closest = ", ".join(f"{g['name']} ({g['achieved']}/{g['total']})" for g in res["closest_to_complete"])
+	answer = (
+		f"You have unlocked {res['achieved']} of {res['total']} achievements ({res['overall_pct']}%) "
+		f"across {res['scope']['with_achievements']} games; {res['perfect_games']} are 100% complete."
+	)
+	if closest:
+		answer += f" Closest to 100%: {closest}."
+	if res["fetch"].get("running"):
+		answer += " A library refresh is still running, so this covers the games fetched so far."
+	return {"answer": answer, "details": res}, 200
+
+
+# YouTube Music
+
+@router.intent(
+	"ytm.liked",
+	[r"\bliked\b.*\bsongs?\b", r"\bsongs?\b.*\bliked\b", r"\b(?:ytm|youtube music)\b.*\bliked\b"],
+	keywords=("liked", "ytm", "music", "song", "songs"), priority=2
+)
+def ytm_liked(m, lq, query):
+	if liked_songs_all is not None and _wants_all(lq):
+		return {"answer": liked_songs_all()}, 200
+	if list_liked_songs_free is not None:
+		return {"answer": list_liked_songs_free(limit=_limit(lq, 5))}, 200
+	return {"error": "YT Music headers not configured. Set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}, 400
+
+
+# GitHub
+
+@router.intent(
+	"github.repos",
+	[r"github\s+(?:repos|repositories)\s+(?:for\s+)?(?:https?://github\.com/(?P<url_user>[\w-]+)|@?(?P<user>[\w-]+))"],
+	keywords=("github",), priority=3
+)
+def github_repos(m, lq, query):
+	username = m.group("url_user") or m.group("user")
+	try:
+		res = github_fetch.fetch_all_pages(f"{github_fetch.API_ROOT}/users/{username}/repos", {"sort": "updated"})
+	except Exception as e:
+		return {"error": str(e)}, 400
+	if not isinstance(res, list):
+		return {"answer": {"error": (res or {}).get("message", "GitHub request failed") if isinstance(res, dict) else "GitHub request failed"}}, 200
+	return {"answer": [{"name": r.get("name"), "url": r.get("html_url"), "stars": r.get("stargazers_count", 0)} for r in res]}, 200
+
+
+def route_intent(user_query: str):
+	"""Answer simple intents directly; returns (payload, status) or None for the LLM path."""
+	return router.route(user_query)
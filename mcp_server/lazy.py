@@ -0,0 +1,26 @@
+"""Deferred imports for heavy optional client libraries.
+
+The MCP server is spawned on demand, so everything imported while registering
+tools is paid before the first tool call. Modules wrapped in `LazyModule` are
+imported the first time one of their attributes is read.
+"""
+import importlib
+
+
+class LazyModule:
+	"""Stands in for module `name` until an attribute is first read."""
+
+	def __init__(self, name: str):
+		self._name = name
+		self._module = None
+
+	def __getattr__(self, attr):
+		module = self._module
+		if module is None:
+			# import_module holds the import lock, so concurrent first reads are safe
+			module = self._module = importlib.import_module(self._name)
+		return getattr(module, attr)
+
+	def __repr__(self):
+		state = "loaded" if self._module is not None else "not loaded"
+		return f"<LazyModule {self._name!r} ({state})>"
@@ -0,0 +1,164 @@
+"""LM Studio (OpenAI-compatible) chat completions, blocking or streamed."""
+import asyncio
+import json
+import os
+
+from . import async_http, http_client
+from .answer_cache import ENABLED as CACHE_ENABLED, cache, fingerprint
+from .name_index import normalize
+from .singleflight import group
+
+
+SYSTEM_PROMPT = "You are a helpful personal assistant."
+
+# The same question asked concurrently under the same context is generated once
+_flights = group("llm")
+
+
+def settings():
+	"""Return (base_url, api_key, model) from the environment at call time."""
+	return (
+		os.getenv("LM_STUDIO_BASE_URL", "http://localhost:1234"),
+		os.getenv("LM_STUDIO_API_KEY", "lm-studio"),
+		os.getenv("LM_STUDIO_MODEL", "local-model")
+	)
+
+
+def build_messages(user_query: str, ctx_prompt: str = ""):
+	return [
+		{"role": "system", "content": SYSTEM_PROMPT},
+		*([{"role": "system", "content": ctx_prompt}] if ctx_prompt else []),
+		{"role": "user", "content": user_query}
+	]
+
+
+def _request(messages, temperature: float, stream: bool):
+	"""(url, request kwargs) for a chat completion."""
+	base_url, api_key, model = settings()
+	body = {"model": model, "messages": messages, "temperature": temperature}
+	if stream:
+		body["stream"] = True
+	return f"{base_url}/v1/chat/completions", {
+		"timeout": float(os.getenv("LM_STUDIO_TIMEOUT", "120")),
+		"headers": {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+		"json": body
+	}
+
+
+def _post(messages, temperature: float, stream: bool):
+	url, kwargs = _request(messages, temperature, stream)
+	resp = http_client.post(url, stream=stream, **kwargs)
+	resp.raise_for_status()
+	return resp
+
+
+def _content(data) -> str:
+	return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+
+def _delta(line: str):
+	"""Content delta from one SSE line; None for keep-alives and non-content chunks, "" at [DONE]."""
+	if not line or not line.startswith("data:"):
+		return None
+	payload = line[5:].strip()
+	if payload == "[DONE]":
+		return ""
+	try:
+		chunk = json.loads(payload)
+	except ValueError:
+		return None
+	return ((chunk.get("choices") or [{}])[0].get("delta") or {}).get("content") or None
+
+
+def chat(messages, temperature: float = 0.2) -> str:
+	"""Blocking completion; returns the assistant message content."""
+	return _content(_post(messages, temperature, stream=False).json())
+
+
+def _scope(scope: str, temperature: float) -> str:
+	return f"{settings()[2]}|{round(float(temperature), 3)}|{scope}"
+
+
+def recent_answer(user_query: str, scope: str, temperature: float = 0.2):
+	"""(answer or None, cache metadata) for a repeated question, before any context is gathered.
+
+	`scope` is `context.context_scope` of the question; see `AnswerCache.get_recent`.
+	"""
+	if not CACHE_ENABLED:
+		return None, None
+	answer, meta, _ = cache.get_recent(user_query, _scope(scope, temperature))
+	return answer, meta
+
+
+def cache_put(user_query: str, fp: str, answer: str, scope: str | None = None, temperature: float = 0.2):
+	if CACHE_ENABLED:
+		cache.put(user_query, fp, answer, None if scope is None else _scope(scope, temperature))
+
+
+def cache_lookup(user_query: str, messages, temperature: float = 0.2):
+	"""(answer or None, cache metadata, fingerprint) for this question and prompt."""
+	fp = fingerprint(messages, settings()[2], temperature)
+	if not CACHE_ENABLED:
+		return None, {"hit": False, "disabled": True}, fp
+	answer, meta = cache.get(user_query, fp)
+	return answer, meta, fp
+
+
+def cached_chat(user_query: str, messages, temperature: float = 0.2, use_cache: bool = True, scope: str | None = None):
+	"""`chat` behind the answer cache; returns (answer, cache metadata). `scope` enables `recent_answer`."""
+	if not use_cache:
+		return chat(messages, temperature), {"hit": False, "bypassed": True}
+	answer, meta, fp = cache_lookup(user_query, messages, temperature)
+	if answer is not None:
+		return answer, meta
+	answer = _flights.do((fp, normalize(user_query)), lambda: chat(messages, temperature))
+	cache_put(user_query, fp, answer, scope, temperature)
+	return answer, meta
+
+
+def stream_chat(messages, temperature: float = 0.2):
+	"""Yield content deltas as LM Studio produces them (`stream: true` SSE)."""
+	resp = _post(messages, temperature, stream=True)
+	resp.encoding = "utf-8"
+	try:
+		for line in resp.iter_lines(decode_unicode=True):
+			delta = _delta(line)
+			if delta == "":
+				break
+			if delta:
+				yield delta
+	finally:
+		resp.close()
+
+
+# Async variants for the ASGI app
+
+async def achat(messages, temperature: float = 0.2) -> str:
+	url, kwargs = _request(messages, temperature, stream=False)
+	resp = await async_http.post(url, **kwargs)
+	resp.raise_for_status()
+	return _content(resp.json())
+
+
+async def acached_chat(user_query: str, messages, temperature: float = 0.2, use_cache: bool = True, scope: str | None = None):
+	if not use_cache:
+		return await achat(messages, temperature), {"hit": False, "bypassed": True}
+	# The answer cache does SQLite and disk I/O: keep it off the event loop
+	answer, meta, fp = await asyncio.to_thread(cache_lookup, user_query, messages, temperature)
+	if answer is not None:
+		return answer, meta
+	answer = await _flights.ado((fp, normalize(user_query)), lambda: achat(messages, temperature))
+	await asyncio.to_thread(cache_put, user_query, fp, answer, scope, temperature)
+	return answer, meta
+
+
+async def astream_chat(messages, temperature: float = 0.2):
+	url, kwargs = _request(messages, temperature, stream=True)
+	async with async_http.stream("POST", url, **kwargs) as resp:
+		resp.raise_for_status()
+		async for line in resp.aiter_lines():
+			delta = _delta(line)
+			if delta == "":
+				break
+			if delta:
+				yield delta
@@ -0,0 +1,312 @@
+"""Process metrics in the Prometheus text format.
+
+Counters and histograms for app routes, upstream calls (per service: count,
+latency, errors, bytes), context providers and MCP tools, plus collectors that
+read cache and single-flight stats at scrape time. `render()` produces the
+`/metrics` body.
+
+`request_timings()` starts a per-request breakdown: while it is active, upstream
+calls made by the request (also from worker threads started with
+`copy_context()`) are added to it, which is what the opt-in `timings` block of
+/ask reports.
+"""
+import contextvars
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from . import singleflight
+from .cache import TTLCache
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+	return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+	pairs = list(zip(names, values)) + list(extra)
+	if not pairs:
+		return ""
+	return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _num(v) -> str:
+	return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+	kind = "counter"
+
+	def __init__(self, name: str, help: str, labelnames=()):
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self._values = {}
+		self._lock = threading.Lock()
+		_registry.append(self)
+
+	def inc(self, amount: float = 1, **labels):
+		key = tuple(labels.get(n, "") for n in self.labelnames)
+		with self._lock:
+			self._values[key] = self._values.get(key, 0) + amount
+
+	def samples(self):
+		with self._lock:
+			items = list(self._values.items())
+		return [f"{self.name}{_labels(self.labelnames, key)} {_num(v)}" for key, v in items]
+
+
+class Histogram:
+	kind = "histogram"
+
+	def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+		self.name = name
+		self.help = help
+		self.labelnames = tuple(labelnames)
+		self.buckets = tuple(sorted(buckets))
+		self._values = {}  # labels -> [bucket counts..., count, sum]
+		self._lock = threading.Lock()
+		_registry.append(self)
+
+	def observe(self, value: float, **labels):
+		key = tuple(labels.get(n, "") for n in self.labelnames)
+		with self._lock:
+			row = self._values.get(key)
+			if row is None:
+				row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+			for i, bound in enumerate(self.buckets):
+				if value <= bound:
+					row[i] += 1
+			row[-2] += 1
+			row[-1] += value
+
+	def samples(self):
+		with self._lock:
+			items = [(key, list(row)) for key, row in self._values.items()]
+		out = []
+		for key, row in items:
+			for bound, n in zip(self.buckets, row):
+				out.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _num(float(bound)))])} {n}")
+			out.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', '+Inf')])} {row[-2]}")
+			out.append(f"{self.name}_count{_labels(self.labelnames, key)} {row[-2]}")
+			out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(row[-1])}")
+		return out
+
+
+_registry = []
+
+ROUTE_LATENCY = Histogram(
+	"hub_http_request_duration_seconds", "App route latency.", ("app", "route", "method", "status"))
+UPSTREAM_LATENCY = Histogram(
+	"hub_upstream_request_duration_seconds", "Upstream call latency.", ("upstream",))
+UPSTREAM_REQUESTS = Counter(
+	"hub_upstream_requests_total", "Upstream calls by outcome (ok, http_4xx, http_5xx, error).", ("upstream", "outcome"))
+UPSTREAM_BYTES = Counter(
+	"hub_upstream_response_bytes_total", "Upstream response body bytes.", ("upstream",))
+PROVIDER_LATENCY = Histogram(
+	"hub_context_provider_duration_seconds", "Context provider latency.", ("provider", "status"))
+TOOL_LATENCY = Histogram(
+	"hub_mcp_tool_duration_seconds", "MCP tool invocation latency.", ("tool", "outcome"))
+GITHUB_CONDITIONAL = Counter(
+	"hub_github_conditional_requests_total", "GitHub GETs by validator outcome (not_modified, modified, unconditional).", ("result",))
+LLM_CACHE = Counter(
+	"hub_llm_cache_requests_total", "LLM answer cache lookups by tier (memory, disk, semantic, miss).", ("tier",))
+
+
+# Upstream label by the host of each service's (overridable) base URL
+_BASES = (
+	("LM_STUDIO_BASE_URL", "http://localhost:1234", "lmstudio"),
+	("STEAM_API_BASE", "https://api.steampowered.com", "steam"),
+	("STEAM_STORE_BASE", "https://store.steampowered.com", "steam_store"),
+	("GITHUB_API_BASE", "https://api.github.com", "github"),
+	("GMAIL_API_ENDPOINT", "https://gmail.googleapis.com", "gmail"),
+)
+
+
+def upstream_name(url: str) -> str:
+	host = urlsplit(url).netloc
+	for env, default, name in _BASES:
+		if host == urlsplit(os.getenv(env) or default).netloc:
+			return name
+	return host
+
+
+class RequestTimings:
+	"""Upstream time spent on behalf of one request: {upstream: {calls, errors, ms}}."""
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.upstream = {}
+		self.phases = {}
+		self._lock = threading.Lock()
+
+	def add(self, upstream: str, seconds: float, error: bool):
+		with self._lock:
+			row = self.upstream.setdefault(upstream, {"calls": 0, "errors": 0, "ms": 0.0})
+			row["calls"] += 1
+			row["errors"] += int(error)
+			row["ms"] = round(row["ms"] + seconds * 1000, 1)
+
+	def phase(self, name: str, seconds: float):
+		self.phases[f"{name}_ms"] = round(seconds * 1000, 1)
+
+	def as_dict(self):
+		with self._lock:
+			upstream = {k: dict(v) for k, v in self.upstream.items()}
+		return {"total_ms": round((time.perf_counter() - self.started) * 1000, 1), **self.phases, "upstream": upstream}
+
+
+_current = contextvars.ContextVar("hub_request_timings", default=None)
+
+
+def request_timings() -> RequestTimings:
+	"""Start collecting a breakdown for the current request (context)."""
+	timings = RequestTimings()
+	_current.set(timings)
+	return timings
+
+
+def end_request_timings():
+	"""Stop attributing upstream calls in this context (pooled threads are reused across requests)."""
+	_current.set(None)
+
+
+def observe_upstream(upstream: str, seconds: float, status: int | None = None, nbytes: int | None = None, error: bool = False):
+	"""Record one upstream call; `status` None with `error` means it never got a response."""
+	if error or status is None:
+		outcome = "error"
+	elif status >= 500:
+		outcome = "http_5xx"
+	elif status >= 400:
+		outcome = "http_4xx"
+	else:
+		outcome = "ok"
+	UPSTREAM_LATENCY.observe(seconds, upstream=upstream)
+	UPSTREAM_REQUESTS.inc(upstream=upstream, outcome=outcome)
+	if nbytes:
+		UPSTREAM_BYTES.inc(nbytes, upstream=upstream)
+	timings = _current.get()
+	if timings is not None:
+		timings.add(upstream, seconds, outcome != "ok")
+
+
+def response_bytes(resp) -> int | None:
+	"""Body size of a requests/httpx response without forcing a streamed body to load."""
+	length = resp.headers.get("Content-Length")
+	if length and length.isdigit():
+		return int(length)
+	content = getattr(resp, "_content", None)
+	return len(content) if isinstance(content, bytes) else None
+
+
+class upstream_call:
+	"""Context manager timing a call made outside http_client (YT Music, Gmail client libraries)."""
+
+	def __init__(self, upstream: str):
+		self.upstream = upstream
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, exc_type, exc, tb):
+		observe_upstream(self.upstream, time.perf_counter() - self.start, status=None if exc_type else 200, error=exc_type is not None)
+		return False
+
+
+def instrument_tools(server):
+	"""Time every tool registered on a FastMCP server after this call."""
+	register = server.tool
+
+	def tool(*args, **kwargs):
+		decorator = register(*args, **kwargs)
+
+		def wrap(fn):
+			name = (args[0] if args and isinstance(args[0], str) else kwargs.get("name")) or fn.__name__
+
+			@functools.wraps(fn)
+			def timed(*a, **kw):
+				start = time.perf_counter()
+				outcome = "ok"
+				try:
+					result = fn(*a, **kw)
+					if isinstance(result, dict) and result.get("error"):
+						outcome = "error"
+					return result
+				except Exception:
+					outcome = "exception"
+					raise
+				finally:
+					TOOL_LATENCY.observe(time.perf_counter() - start, tool=name, outcome=outcome)
+			return decorator(timed)
+		return wrap
+	server.tool = tool
+	return server
+
+
+def _collected():
+	"""Gauge-like families read from other modules at scrape time."""
+	out = [
+		"# HELP hub_cache_requests_total TTL cache lookups by result (hit, stale, miss).",
+		"# TYPE hub_cache_requests_total counter",
+	]
+	for name, stats in TTLCache.named().items():
+		for result in ("hit", "stale", "miss"):
+			out.append(f"hub_cache_requests_total{_labels(('cache', 'result'), (name, result))} {stats[result]}")
+	out += [
+		"# HELP hub_cache_entries Entries held per TTL cache.",
+		"# TYPE hub_cache_entries gauge",
+	]
+	for name, stats in TTLCache.named().items():
+		out.append(f"hub_cache_entries{_labels(('cache',), (name,))} {stats['entries']}")
+	out += [
+		"# HELP hub_singleflight_calls_total Calls per single-flight group: executed upstream or coalesced.",
+		"# TYPE hub_singleflight_calls_total counter",
+	]
+	for name, stats in singleflight.stats().items():
+		for outcome in ("executed", "coalesced"):
+			out.append(f"hub_singleflight_calls_total{_labels(('group', 'outcome'), (name, outcome))} {stats[outcome]}")
+	return out
+
+
+def render() -> str:
+	lines = []
+	for metric in _registry:
+		lines.append(f"# HELP {metric.name} {metric.help}")
+		lines.append(f"# TYPE {metric.name} {metric.kind}")
+		lines.extend(metric.samples())
+	lines.extend(_collected())
+	return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Handler(BaseHTTPRequestHandler):
+	def do_GET(self):
+		if self.path.split("?")[0] != "/metrics":
+			self.send_error(404)
+			return
+		body = render().encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", CONTENT_TYPE)
+		self.send_header("Content-Length", str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, format, *args):
+		pass
+
+
+def serve(port: int, host: str = "127.0.0.1"):
+	"""Expose /metrics on its own port from a daemon thread (for the MCP server process)."""
+	httpd = ThreadingHTTPServer((host, port), _Handler)
+	httpd.daemon_threads = True
+	threading.Thread(target=httpd.serve_forever, name="metrics", daemon=True).start()
+	return httpd
@@ -0,0 +1,128 @@
+"""Fuzzy name search over a fixed list of names (e.g. a Steam library snapshot).
+
+Names are normalized once and indexed by character trigram. A query gathers
+candidates from the trigram postings (rarest first, up to a budget), keeps the
+best few by trigram overlap, scores those on trigram/token overlap, reranks the
+short list with an edit-distance ratio, and returns the top-k without sorting
+the whole library.
+"""
+import difflib
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import islice
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+# Dropped before NFKD, which would otherwise expand "™" into a trailing "tm"
+_MARKS = str.maketrans("", "", "\u2122\u00ae\u00a9")
+
+# Share of the query's trigrams a name must contain to be considered at all
+MIN_OVERLAP = 0.5
+# Postings entries one search walks at most: once the rarer trigrams have produced
+# this many, the more common ones (which cost the most and discriminate the least)
+# are skipped
+POSTINGS_BUDGET = 2000
+
+
+def normalize(text: str) -> str:
+	"""Lowercase, strip accents/trademark symbols and punctuation, collapse spaces."""
+	text = unicodedata.normalize("NFKD", (text or "").translate(_MARKS))
+	text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+	return _NON_ALNUM.sub(" ", text).strip()
+
+
+def trigrams(norm: str) -> frozenset:
+	padded = f"  {norm} "
+	return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class NameIndex:
+	"""Trigram inverted index; search results are (position, score) pairs."""
+
+	def __init__(self, names):
+		self._names = list(names)
+		self._norm = [normalize(n) for n in self._names]
+		self._grams = [trigrams(n) for n in self._norm]
+		self._tokens = [frozenset(n.split()) for n in self._norm]
+		self._padded = [f" {n} " for n in self._norm]
+		self._exact = {}
+		postings = defaultdict(list)
+		for i, (norm, grams) in enumerate(zip(self._norm, self._grams)):
+			if not norm:
+				continue
+			self._exact.setdefault(norm, []).append(i)
+			for g in grams:
+				postings[g].append(i)
+		self._postings = dict(postings)
+
+	def __len__(self):
+		return len(self._norm)
+
+	def _cheap_score(self, i: int, q: str, padded_q: str, qgrams: frozenset, qtokens: frozenset) -> float:
+		grams = self._grams[i]
+		score = 1.2 * len(qgrams & grams) / (len(qgrams) + len(grams))  # 0.6 * dice
+		if qtokens:
+			score += 0.4 * len(qtokens & self._tokens[i]) / len(qtokens)
+		if padded_q in self._padded[i]:
+			score += 0.3
+		elif self._norm[i].startswith(q):
+			score += 0.2
+		return score
+
+	def search(self, query: str, k: int = 5, candidates: int = 20, rerank: int = 5):
+		q = normalize(query)
+		if not q:
+			return []
+		exact = self._exact.get(q, [])
+		qgrams = trigrams(q)
+		postings = self._postings
+		grams = sorted((postings[g] for g in qgrams if g in postings), key=len)
+		# A name sharing at least MIN_OVERLAP of the query's trigrams must contain one
+		# of the rarest (len - needed + 1) of them, so only those postings are walked.
+		needed = max(1, math.ceil(len(grams) * MIN_OVERLAP))
+		counts = Counter()
+		walked = 0
+		for posting in grams[: len(grams) - needed + 1]:
+			if walked and walked + len(posting) > POSTINGS_BUDGET:
+				break
+			counts.update(posting)
+			walked += len(posting)
+		if not counts:
+			return []
+		# The candidates-th highest count, found on the bare values, bounds the pool
+		cut = heapq.nlargest(candidates, counts.values())[-1]
+		pool = [i for i, c in counts.items() if c > cut]
+		pool += islice((i for i, c in counts.items() if c == cut), candidates - len(pool))
+		pool += [i for i in exact if i not in pool]
+		padded_q = f" {q} "
+		qtokens = frozenset(q.split())
+		# An exact normalized match maxes every score, so it ranks first; names that are
+		# equal after normalization (case, accents, "™") tie there, and the raw match wins.
+		folded = query.strip().casefold()
+		raw = {i for i in exact if self._names[i] == query}
+		caseless = {i for i in exact if (self._names[i] or "").strip().casefold() == folded}
+
+		def rank(pair):
+			return pair[1], pair[0] in raw, pair[0] in caseless
+
+		cheap = heapq.nlargest(
+			max(k, rerank), ((i, self._cheap_score(i, q, padded_q, qgrams, qtokens)) for i in pool), key=rank
+		)
+		# Edit-distance rerank only over the short list, best cheap score first; seq2 (the
+		# query) is analysed once. The ratio adds at most 0.3, so once k results beat
+		# every remaining candidate's best case the rest are skipped.
+		matcher = difflib.SequenceMatcher(None, "", q, autojunk=False)
+		scored = []
+		for i, score in cheap:
+			if len(scored) >= k and 0.7 * score + 0.3 < heapq.nlargest(k, (s for _, s in scored))[-1]:
+				break
+			if self._norm[i] == q:
+				ratio = 1.0
+			else:
+				matcher.set_seq1(self._norm[i])
+				ratio = matcher.ratio()
+			scored.append((i, round(0.7 * score + 0.3 * ratio, 4)))
+		return heapq.nlargest(k, scored, key=rank)
@@ -0,0 +1,96 @@
+"""Declarative intent router for questions that can be answered without the LLM.
+
+Each `Intent` declares trigger keywords, precompiled patterns and a handler.
+Routing tokenizes the query once, uses a keyword -> intents index to pick the
+plausible candidates, scores every pattern match and runs handlers best-first
+until one returns a response.
+"""
+import re
+
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class Intent:
+	"""One routable intent.
+
+	`keywords`: tokens that make the intent a candidate (empty = always tried).
+	`patterns`: regexes (strings or compiled) searched against the lowercased query.
+	`handler(match, lq, query)` returns (payload, status), or None to decline.
+	`priority` breaks ties between intents whose patterns both match.
+	"""
+
+	def __init__(self, name: str, handler, patterns, keywords=(), priority: float = 0.0):
+		self.name = name
+		self.handler = handler
+		self.patterns = [re.compile(p) if isinstance(p, str) else p for p in patterns]
+		self.keywords = frozenset(keywords)
+		self.priority = priority
+
+	def score(self, lq: str, tokens: set):
+		"""(score, match) for the best pattern, or None if nothing matches."""
+		best = None
+		for p in self.patterns:
+			m = p.search(lq)
+			if m is None:
+				continue
+			# Prefer patterns that explain more of the query
+			s = self.priority + len(self.keywords & tokens) + (m.end() - m.start()) / max(1, len(lq))
+			if best is None or s > best[0]:
+				best = (s, m)
+		return best
+
+
+class Router:
+	def __init__(self, intents=()):
+		self.intents = []
+		self._by_keyword = {}
+		self._always = []
+		for intent in intents:
+			self.add(intent)
+
+	def add(self, intent: Intent):
+		self.intents.append(intent)
+		if not intent.keywords:
+			self._always.append(intent)
+		for kw in intent.keywords:
+			self._by_keyword.setdefault(kw, []).append(intent)
+		return intent
+
+	def intent(self, name: str, patterns, keywords=(), priority: float = 0.0):
+		"""Decorator form of `add` for handler functions."""
+		def wrap(fn):
+			self.add(Intent(name, fn, patterns, keywords, priority))
+			return fn
+		return wrap
+
+	def candidates(self, tokens: set):
+		"""Intents with at least one keyword in `tokens`, plus keyword-less ones (in order, no repeats)."""
+		out = dict.fromkeys(self._always)
+		for tok in tokens:
+			for intent in self._by_keyword.get(tok, ()):
+				out[intent] = None
+		return out
+
+	def match(self, query: str):
+		"""All matching intents as [(score, intent, match)], best first."""
+		return self._match(query.lower())
+
+	def _match(self, lq: str):
+		tokens = set(_TOKEN.findall(lq))
+		scored = []
+		for intent in self.candidates(tokens):
+			res = intent.score(lq, tokens)
+			if res is not None:
+				scored.append((res[0], intent, res[1]))
+		scored.sort(key=lambda item: item[0], reverse=True)
+		return scored
+
+	def route(self, query: str):
+		"""Run the best matching handler; returns (payload, status) or None for the LLM path."""
+		lq = query.lower()
+		for _, intent, m in self._match(lq):
+			res = intent.handler(m, lq, query)
+			if res is not None:
+				return res
+		return None
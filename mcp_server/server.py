@@ -1,39 +1,31 @@
 from mcp.server.fastmcp import FastMCP
-from dotenv import load_dotenv, find_dotenv
-import io
-from . import file_service, github_service, email_service, steam_service, summarize_service, ytmusic_service
-
-
-def _load_env_robust():
-	try:
-		path = find_dotenv()
-		if path:
-			load_dotenv(dotenv_path=path, encoding="utf-8")
-		else:
-			load_dotenv(encoding="utf-8")
-		return
-	except UnicodeDecodeError:
-		pass
-	for enc in ("utf-8-sig", "utf-16", "latin-1"):
-		try:
-			from pathlib import Path
-			cand = find_dotenv() or ".env"
-			with open(cand, "rb") as f:
-				text = f.read().decode(enc)
-			load_dotenv(stream=io.StringIO(text))
-			return
-		except Exception:
-			continue
-
-
-_load_env_robust()
+import logging
+import os
+
+from .env import load_env
+
+
+# Before the services are imported: several read their settings at import time
+load_env()
+
+from . import file_service, github_service, email_service, metrics, steam_achievements, steam_enrich, steam_service, summarize_service, sync_service, ytmusic_service  # noqa: E402
+
 server = FastMCP("personal-hub-server")
+log = logging.getLogger("personal-hub")
+# Tool invocations are timed into hub_mcp_tool_duration_seconds
+metrics.instrument_tools(server)
 
 # Register all services
-for svc in [file_service, github_service, email_service, steam_service, summarize_service, ytmusic_service]:
+for svc in [file_service, github_service, email_service, steam_service, steam_enrich, steam_achievements, summarize_service, ytmusic_service, sync_service]:
 	svc.register(server)
-	print(f"Registered service: {svc.__name__}")
+	# stdout carries the MCP protocol; diagnostics go to stderr
+	log.info("Registered service: %s", svc.__name__)
 
 
 if __name__ == "__main__":
+	logging.basicConfig(level=logging.INFO)
+	sync_service.start_background_sync()
+	# Optional Prometheus endpoint for this process (tool timings live here)
+	if os.getenv("MCP_METRICS_PORT"):
+		metrics.serve(int(os.getenv("MCP_METRICS_PORT")))
 	server.run()
\ No newline at end of file
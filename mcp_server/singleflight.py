@@ -0,0 +1,117 @@
+"""Request coalescing for identical concurrent upstream calls.
+
+While a call for a key is in flight, later callers with the same key wait for it
+and share its result (or its exception) instead of issuing their own request.
+Nothing is kept once the call finishes; caching stays the job of `TTLCache`.
+"""
+import asyncio
+import threading
+
+
+class _Call:
+	def __init__(self):
+		self.done = threading.Event()
+		self.result = None
+		self.error = None
+		self.waiters = 0
+
+
+class Group:
+	"""Single-flight group; `do` for blocking callers, `ado` for coroutines."""
+
+	def __init__(self, name: str):
+		self.name = name
+		self._calls = {}
+		self._acalls = {}  # (loop, key) -> asyncio.Future
+		self._lock = threading.Lock()
+		self.calls = 0
+		self.executed = 0
+		self.coalesced = 0
+
+	def do(self, key, fn):
+		with self._lock:
+			self.calls += 1
+			call = self._calls.get(key)
+			if call is not None:
+				call.waiters += 1
+				self.coalesced += 1
+				leader = False
+			else:
+				call = self._calls[key] = _Call()
+				self.executed += 1
+				leader = True
+		if not leader:
+			call.done.wait()
+			if call.error is not None:
+				raise call.error
+			return call.result
+		try:
+			call.result = fn()
+			return call.result
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				self._calls.pop(key, None)
+			call.done.set()
+
+	async def ado(self, key, coro_fn):
+		loop = asyncio.get_running_loop()
+		with self._lock:
+			self.calls += 1
+			fut = self._acalls.get((loop, key))
+			if fut is None:
+				fut = self._acalls[(loop, key)] = loop.create_future()
+				self.executed += 1
+				leader = True
+			else:
+				self.coalesced += 1
+				leader = False
+		if not leader:
+			# shield: a cancelled waiter must not cancel the shared call
+			return await asyncio.shield(fut)
+		try:
+			result = await coro_fn()
+		except asyncio.CancelledError:
+			fut.cancel()
+			raise
+		except BaseException as e:
+			fut.set_exception(e)
+			fut.exception()  # mark retrieved when nobody was waiting
+			raise
+		else:
+			fut.set_result(result)
+			return result
+		finally:
+			with self._lock:
+				self._acalls.pop((loop, key), None)
+
+	def stats(self):
+		with self._lock:
+			return {
+				"calls": self.calls,
+				"executed": self.executed,
+				"coalesced": self.coalesced,
+				"in_flight": len(self._calls) + len(self._acalls)
+			}
+
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+
+def group(name: str) -> Group:
+	"""The process-wide group called `name`, created on first use."""
+	with _groups_lock:
+		g = _groups.get(name)
+		if g is None:
+			g = _groups[name] = Group(name)
+		return g
+
+
+def stats():
+	"""{group name: {calls, executed, coalesced, in_flight}} for every group."""
+	with _groups_lock:
+		groups = list(_groups.values())
+	return {g.name: g.stats() for g in groups}
@@ -0,0 +1,164 @@
+"""Achievement completion across the owned Steam library.
+
+GetPlayerAchievements answers one app per call, so library-wide questions fetch
+many apps at once: a worker pool behind a token bucket (STEAM_API_RATE calls per
+second). Per-app counts are cached in the local store together with the game's
+last-played time and playtime from the owned-games snapshot; a game is refetched
+only when either changed, i.e. when it was played since the previous fetch.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import http_client, store
+from .steam_enrich import TokenBucket
+from .steam_service import API_BASE, _env, owned_library
+
+
+ACHIEVEMENTS_URL = f"{API_BASE}/ISteamUserStats/GetPlayerAchievements/v0001/"
+WORKERS = int(os.getenv("STEAM_ACHIEVEMENT_WORKERS", "8"))
+SAVE_EVERY = 50
+
+_bucket = TokenBucket(float(os.getenv("STEAM_API_RATE", "5")), int(os.getenv("STEAM_API_BURST", "20")))
+# One refresh at a time; concurrent callers are answered from the cached counts
+_refresh_lock = threading.Lock()
+
+
+def fetch_counts(api_key: str, steam_id: str, appid: int):
+	"""(status, achieved, total, last_unlock); status "none" for apps without achievements.
+
+	Raises for answers that must not be cached (private profile, rate limits, outages).
+	"""
+	_bucket.acquire()
+	resp = http_client.get(ACHIEVEMENTS_URL, params={"key": api_key, "steamid": steam_id, "appid": appid})
+	try:
+		stats = (resp.json() or {}).get("playerstats") or {}
+	except ValueError:
+		stats = {}
+	if resp.status_code == 200 and stats.get("success") is not False:
+		rows = stats.get("achievements") or []
+		unlocked = [a.get("unlocktime") or 0 for a in rows if a.get("achieved")]
+		return ("ok" if rows else "none"), len(unlocked), len(rows), max(unlocked, default=0)
+	# Apps without stats answer 400 {"playerstats": {"error": "Requested app has no stats", "success": false}}
+	if resp.status_code in (200, 400) and "no stats" in (stats.get("error") or "").lower():
+		return "none", 0, 0, 0
+	raise RuntimeError(stats.get("error") or f"HTTP {resp.status_code}")
+
+
+def _current(row, last_played: int, playtime: int) -> bool:
+	return row is not None and row["last_played"] == last_played and row["playtime"] == playtime
+
+
+def refresh(library, positions, fresh: bool = False, deadline: float | None = None):
+	"""Fetch counts for the games at `positions` that were played since they were cached.
+
+	Returns (cached rows by appid, {cached, fetched, failed}). While another refresh
+	runs (e.g. the whole-library sync job) nothing is fetched and the counts cached so
+	far are returned with "running": True, instead of waiting for it. Fetches not
+	started by `deadline` (a time.monotonic() value) are left for the next refresh.
+	"""
+	api_key, steam_id = _env()
+	if not _refresh_lock.acquire(blocking=False):
+		cached = store.load_achievements(steam_id)
+		stale = sum(1 for i in positions if not _current(cached.get(library.appids[i]), library.last_played[i], library.forever[i]))
+		return cached, {"cached": len(positions) - stale, "fetched": 0, "failed": 0, "running": True}
+	try:
+		cached = store.load_achievements(steam_id)
+		todo = [
+			i for i in positions
+			if fresh or not _current(cached.get(library.appids[i]), library.last_played[i], library.forever[i])
+		]
+		fetched = failed = deferred = 0
+		pending = []
+		if todo:
+			with ThreadPoolExecutor(max_workers=min(WORKERS, len(todo)), thread_name_prefix="steam-achievements") as pool:
+				futures = {pool.submit(fetch_counts, api_key, steam_id, library.appids[i]): i for i in todo}
+				for future in as_completed(futures):
+					if deadline is not None and time.monotonic() >= deadline:
+						for f in futures:
+							f.cancel()
+					if future.cancelled():
+						deferred += 1
+						continue
+					i = futures[future]
+					try:
+						status, achieved, total, last_unlock = future.result()
+					except Exception:
+						failed += 1
+						continue
+					row = {
+						"appid": library.appids[i], "last_played": library.last_played[i], "playtime": library.forever[i],
+						"status": status, "achieved": achieved, "total": total, "last_unlock": last_unlock
+					}
+					cached[row["appid"]] = row
+					pending.append(row)
+					fetched += 1
+					if len(pending) >= SAVE_EVERY:
+						store.save_achievements(steam_id, pending)
+						pending = []
+			store.save_achievements(steam_id, pending)
+	finally:
+		_refresh_lock.release()
+	return cached, {"cached": len(positions) - len(todo), "fetched": fetched, "failed": failed, "deferred": deferred}
+
+
+def _pct(achieved: int, total: int) -> float:
+	return round(achieved * 100.0 / total, 1) if total else 0.0
+
+
+def achievement_stats(top_n: int | None = None, limit: int = 10, fresh: bool = False, deadline: float | None = None):
+	"""Completion statistics over the `top_n` most played owned games (all when None or 0)."""
+	api_key, steam_id = _env()
+	if not api_key or not steam_id:
+		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
+	library = owned_library()
+	if isinstance(library, dict):
+		return library
+	start = time.perf_counter()
+	positions = library.by_playtime[:top_n].tolist() if top_n else library.by_playtime.tolist()
+	cached, fetch = refresh(library, positions, fresh=fresh, deadline=deadline)
+	fetch["ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+	games = []
+	no_achievements = 0
+	for i in positions:
+		row = cached.get(library.appids[i])
+		if row is None:
+			continue
+		if row["status"] != "ok":
+			no_achievements += 1
+			continue
+		games.append({
+			"appid": library.appids[i],
+			"name": library.names[i],
+			"achieved": row["achieved"],
+			"total": row["total"],
+			"pct": _pct(row["achieved"], row["total"])
+		})
+	achieved = sum(g["achieved"] for g in games)
+	total = sum(g["total"] for g in games)
+	started = [g for g in games if 0 < g["achieved"] < g["total"]]
+	return {
+		"scope": {"owned": len(library), "considered": len(positions), "with_achievements": len(games), "without_achievements": no_achievements},
+		"fetch": fetch,
+		"achieved": achieved,
+		"total": total,
+		"overall_pct": _pct(achieved, total),
+		"average_game_pct": round(sum(g["pct"] for g in games) / len(games), 1) if games else 0.0,
+		"perfect_games": sum(1 for g in games if g["achieved"] == g["total"]),
+		"untouched_games": sum(1 for g in games if g["achieved"] == 0),
+		"closest_to_complete": sorted(started, key=lambda g: (-g["pct"], g["total"] - g["achieved"]))[:max(0, limit)],
+		"most_complete": sorted(games, key=lambda g: (-g["pct"], -g["total"]))[:max(0, limit)]
+	}
+
+
+def register(server):
+	@server.tool("steam_achievement_stats")
+	def steam_achievement_stats(top_n: int = 100, limit: int = 10, fresh: bool = False):
+		"""Achievement completion across the most played owned games (top_n=0: whole library).
+
+		Returns totals, completion percentages and the games closest to 100%, not raw
+		achievement rows. Only games played since their last fetch are refetched.
+		"""
+		return achievement_stats(top_n=top_n, limit=limit, fresh=fresh)
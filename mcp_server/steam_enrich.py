@@ -0,0 +1,221 @@
+"""Steam Store metadata (genres, developers, type) for the whole owned library.
+
+Store app details hardly ever change, so results are kept in the local store for
+STEAM_APPDETAILS_TTL seconds (apps the store does not know for
+STEAM_APPDETAILS_MISS_TTL). Missing entries are fetched one appid per call by a
+small worker pool behind a token bucket: the store allows roughly 200 appdetails
+calls per 5 minutes, so a large library is filled over several runs of the
+`steam_store` sync job, each capped at STEAM_ENRICH_MAX_FETCH calls. While games
+remain the job runs again after SYNC_STEAM_STORE_BACKLOG_INTERVAL rather than its
+usual interval, and breakdowns report how many games are still `pending`.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from . import http_client, store
+from .steam_service import STORE_BASE, owned_library
+
+
+APPDETAILS_URL = f"{STORE_BASE}/api/appdetails"
+DETAILS_TTL = float(os.getenv("STEAM_APPDETAILS_TTL", str(30 * 86400)))
+MISS_TTL = float(os.getenv("STEAM_APPDETAILS_MISS_TTL", "86400"))
+WORKERS = int(os.getenv("STEAM_STORE_WORKERS", "4"))
+RATE = float(os.getenv("STEAM_STORE_RATE", "0.6"))  # calls per second
+BURST = int(os.getenv("STEAM_STORE_BURST", "10"))
+MAX_FETCH = int(os.getenv("STEAM_ENRICH_MAX_FETCH", "200"))
+SAVE_EVERY = 20
+
+BREAKDOWNS = {
+	"genre": lambda d: d.get("genres") or [],
+	"developer": lambda d: d.get("developers") or [],
+	"publisher": lambda d: d.get("publishers") or [],
+	"type": lambda d: [d["type"]] if d.get("type") else [],
+}
+
+
+class TokenBucket:
+	"""Blocking rate limiter shared by the worker threads: `rate` calls/s, bursts of `burst`."""
+
+	def __init__(self, rate: float, burst: int):
+		self.rate = max(rate, 1e-6)
+		self.burst = max(1, burst)
+		self._tokens = float(self.burst)
+		self._at = time.monotonic()
+		self._lock = threading.Lock()
+
+	def acquire(self):
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+				self._at = now
+				if self._tokens >= 1:
+					self._tokens -= 1
+					return
+				wait = (1 - self._tokens) / self.rate
+			time.sleep(wait)
+
+
+_bucket = TokenBucket(RATE, BURST)
+# One enrichment run at a time (sync job, tool calls)
+_running = threading.Lock()
+
+
+def _compact(info: dict):
+	return {
+		"name": info.get("name"),
+		"type": info.get("type"),
+		"genres": [g.get("description") for g in info.get("genres", [])],
+		"developers": info.get("developers"),
+		"publishers": info.get("publishers"),
+		"required_age": info.get("required_age"),
+		"is_free": info.get("is_free"),
+		"short_description": info.get("short_description"),
+		"header_image": info.get("header_image")
+	}
+
+
+def fetch_details(appid: int):
+	"""(success, details) from the store; raises on transport errors and error statuses so they are not cached."""
+	_bucket.acquire()
+	resp = http_client.get(APPDETAILS_URL, params={"appids": appid})
+	resp.raise_for_status()
+	data = (resp.json() or {}).get(str(appid)) or {}
+	if data.get("success"):
+		return True, _compact(data.get("data") or {})
+	return False, None
+
+
+def _fresh(entry, now: float) -> bool:
+	return entry is not None and now - entry["fetched_at"] < (DETAILS_TTL if entry["success"] else MISS_TTL)
+
+
+def app_details(appid: int, fresh: bool = False):
+	"""Store details for one app, from the local cache when it is recent enough."""
+	entry = None if fresh else store.load_app_details([appid]).get(appid)
+	if not _fresh(entry, time.time()):
+		try:
+			success, details = fetch_details(appid)
+		except Exception as e:
+			return {"error": str(e)}
+		store.save_app_details([(appid, success, details)])
+		entry = {"success": success, "details": details}
+	return entry["details"] if entry["success"] else {"error": "Not found"}
+
+
+def enrich(appids, max_fetch: int | None = None, deadline: float | None = None):
+	"""Fetch store details for the appids without a fresh cached entry, at most `max_fetch` of them.
+
+	Calls not started by `deadline` (a time.monotonic() value) are left for the next run.
+	"""
+	if not _running.acquire(blocking=False):
+		return {"status": "running"}
+	try:
+		start = time.perf_counter()
+		appids = list(dict.fromkeys(appids))
+		cached = store.load_app_details()
+		now = time.time()
+		todo = [a for a in appids if not _fresh(cached.get(a), now)]
+		batch = todo[:MAX_FETCH if max_fetch is None else max(0, max_fetch)]
+		found = missing = failed = 0
+		pending = []
+		if batch:
+			with ThreadPoolExecutor(max_workers=min(WORKERS, len(batch)), thread_name_prefix="steam-store") as pool:
+				futures = {pool.submit(fetch_details, appid): appid for appid in batch}
+				for future in as_completed(futures):
+					if deadline is not None and time.monotonic() >= deadline:
+						for f in futures:
+							f.cancel()
+					if future.cancelled():
+						continue
+					try:
+						success, details = future.result()
+					except Exception:
+						failed += 1
+						continue
+					if success:
+						found += 1
+					else:
+						missing += 1
+					pending.append((futures[future], success, details))
+					if len(pending) >= SAVE_EVERY:
+						store.save_app_details(pending)
+						pending = []
+			store.save_app_details(pending)
+		return {
+			"status": "ok",
+			"owned": len(appids),
+			"cached": len(appids) - len(todo),
+			"fetched": found,
+			"not_found": missing,
+			"failed": failed,
+			"remaining": len(todo) - found - missing,
+			"ms": round((time.perf_counter() - start) * 1000, 1)
+		}
+	finally:
+		_running.release()
+
+
+def enrich_owned_games(max_fetch: int | None = None, deadline: float | None = None):
+	library = owned_library()
+	if isinstance(library, dict):
+		return library
+	# Most played first: they dominate playtime breakdowns while the cache fills
+	return enrich([library.appids[i] for i in library.by_playtime], max_fetch, deadline)
+
+
+def breakdown(by: str = "genre", weight: str = "playtime", limit: int = 15):
+	"""Owned games grouped by a store field (cached details only): games and playtime per value."""
+	if by not in BREAKDOWNS:
+		return {"error": f"Unknown breakdown '{by}'", "options": list(BREAKDOWNS)}
+	if weight not in ("playtime", "count"):
+		return {"error": f"Unknown weight '{weight}'", "options": ["playtime", "count"]}
+	library = owned_library()
+	if isinstance(library, dict):
+		return library
+	cached = store.load_app_details()
+	values = BREAKDOWNS[by]
+	totals = defaultdict(lambda: [0, 0])
+	enriched = pending = 0
+	for i, appid in enumerate(library.appids):
+		entry = cached.get(appid)
+		if entry is None:
+			pending += 1
+			continue
+		if not entry["success"]:
+			continue
+		enriched += 1
+		for value in values(entry["details"]):
+			row = totals[value]
+			row[0] += 1
+			row[1] += library.forever[i]
+	rank = (lambda kv: (-kv[1][1], -kv[1][0])) if weight == "playtime" else (lambda kv: (-kv[1][0], -kv[1][1]))
+	top = [
+		{by: value, "games": games, "minutes": minutes, "hours": round(minutes / 60.0, 1)}
+		for value, (games, minutes) in sorted(totals.items(), key=rank)[:max(0, limit)]
+	]
+	coverage = {
+		"owned": len(library), "enriched": enriched, "not_in_store": len(library) - enriched - pending,
+		"pending": pending, "pct": round(enriched * 100.0 / len(library), 1) if len(library) else 0.0
+	}
+	return {"by": by, "weight": weight, "coverage": coverage, "top": top}
+
+
+def register(server):
+	@server.tool("steam_library_breakdown")
+	def steam_library_breakdown(by: str = "genre", weight: str = "playtime", limit: int = 15):
+		"""Aggregate owned games by genre, developer, publisher or type.
+
+		Ranked by playtime or game count. Uses cached store details; `coverage` says
+		how many owned games have them and how many are still `pending` (filled by
+		the steam_store sync job, or run steam_enrich_library).
+		"""
+		return breakdown(by=by, weight=weight, limit=limit)
+
+	@server.tool("steam_enrich_library")
+	def steam_enrich_library(max_fetch: int = MAX_FETCH):
+		"""Fetch store details (genres, developers, type) for owned games not cached yet, rate-limited."""
+		return enrich_owned_games(max_fetch=max_fetch)
@@ -0,0 +1,92 @@
+"""Columnar snapshot of a Steam owned-games response.
+
+GetOwnedGames returns one dict per game; a library of thousands of games held as
+dicts costs a few hundred bytes per game and every "top N" or total re-sorts or
+re-scans them. `Library` keeps the numeric fields in typed arrays and the strings
+(interned) in parallel lists, and computes the orderings by lifetime and recent
+playtime and the totals once when the snapshot is built. Snapshots are immutable
+and shared between threads.
+"""
+import sys
+import threading
+from array import array
+
+from .name_index import NameIndex
+
+
+def _int(value) -> int:
+	try:
+		return int(value or 0)
+	except (TypeError, ValueError):
+		return 0
+
+
+def _intern(value):
+	return sys.intern(value) if isinstance(value, str) else value
+
+
+class Library:
+	"""Owned games as columns; positions index every column."""
+
+	__slots__ = (
+		"count", "appids", "names", "forever", "recent", "last_played", "icons", "logos",
+		"by_playtime", "by_recent", "total_minutes", "recent_minutes", "_positions", "_index", "_lock"
+	)
+
+	def __init__(self, games, game_count: int | None = None):
+		self.count = game_count
+		self.appids = array("q", (_int(g.get("appid")) for g in games))
+		self.forever = array("q", (_int(g.get("playtime_forever")) for g in games))
+		self.recent = array("q", (_int(g.get("playtime_2weeks")) for g in games))
+		self.last_played = array("q", (_int(g.get("rtime_last_played")) for g in games))
+		self.names = [_intern(g.get("name")) for g in games]
+		self.icons = [_intern(g.get("img_icon_url")) for g in games]
+		self.logos = [_intern(g.get("img_logo_url")) for g in games]
+		self._positions = {appid: i for i, appid in enumerate(self.appids)}
+		forever, recent = self.forever, self.recent
+		self.by_playtime = array("l", sorted(range(len(forever)), key=lambda i: -forever[i]))
+		self.by_recent = array("l", sorted((i for i in range(len(recent)) if recent[i]), key=lambda i: -recent[i]))
+		self.total_minutes = sum(forever)
+		self.recent_minutes = sum(recent)
+		self._index = None
+		self._lock = threading.Lock()
+
+	@classmethod
+	def from_response(cls, resp: dict):
+		return cls(resp.get("games", []) or [], resp.get("game_count"))
+
+	def __len__(self):
+		return len(self.appids)
+
+	def position(self, appid) -> int | None:
+		return self._positions.get(_int(appid))
+
+	def game(self, i: int, images: bool = True):
+		"""One game in the shape the tools have always returned."""
+		item = {
+			"appid": self.appids[i],
+			"name": self.names[i],
+			"playtime_forever_min": self.forever[i],
+			"playtime_2weeks_min": self.recent[i]
+		}
+		if images:
+			item["img_icon_url"] = self.icons[i]
+			item["img_logo_url"] = self.logos[i]
+		return item
+
+	def games(self, limit: int | None = None, images: bool = True):
+		"""Games in response order."""
+		return [self.game(i, images) for i in range(len(self.appids))[:limit]]
+
+	def top(self, limit: int, recent: bool = False):
+		"""Positions of the `limit` most played games (lifetime, or last two weeks)."""
+		order = self.by_recent if recent else self.by_playtime
+		return order[:max(0, limit)].tolist()
+
+	def name_index(self) -> NameIndex:
+		"""Fuzzy name index over this snapshot, built on first use."""
+		if self._index is None:
+			with self._lock:
+				if self._index is None:
+					self._index = NameIndex([n or "" for n in self.names])
+		return self._index
@@ -1,10 +1,37 @@
+import asyncio
 import os
-import requests
+
+from . import async_http, http_client, store
+from .cache import TTLCache
+from .singleflight import group
+from .steam_library import Library
+from .sync_service import max_age as snapshot_max_age
+
+
+# Overridable for local stubs (benchmarks) and proxies
+API_BASE = os.getenv("STEAM_API_BASE", "https://api.steampowered.com").rstrip("/")
+STORE_BASE = os.getenv("STEAM_STORE_BASE", "https://store.steampowered.com").rstrip("/")
+OWNED_GAMES_URL = f"{API_BASE}/IPlayerService/GetOwnedGames/v0001/"
+
+# GetOwnedGames snapshots (as columnar `Library` objects) keyed on (steamid,
+# include_appinfo). Owned libraries change
+# rarely, so serve from memory for STEAM_CACHE_TTL seconds and refresh in the
+# background for a further STEAM_CACHE_STALE_TTL seconds.
+_owned_cache = TTLCache(
+	ttl=float(os.getenv("STEAM_CACHE_TTL", "3600")),
+	stale_ttl=float(os.getenv("STEAM_CACHE_STALE_TTL", "86400")),
+	maxsize=int(os.getenv("STEAM_CACHE_MAXSIZE", "16")),
+	name="steam_owned"
+)
+
+
+# Concurrent identical GetOwnedGames calls share one upstream request
+_flights = group("steam")
 
 
 def _get(url: str, params: dict | None = None):
 	try:
-		return requests.get(url, params=params, timeout=20).json()
+		return http_client.get(url, params=params).json()
 	except Exception as e:
 		return {"error": str(e)}
 
@@ -14,62 +41,124 @@ def _env():
 	return os.getenv("STEAM_API_KEY"), os.getenv("STEAM_ID")
 
 
+def _owned_params(api_key: str, steam_id: str, include_appinfo: bool):
+	params = {"key": api_key, "steamid": steam_id, "format": "json"}
+	if include_appinfo:
+		params["include_appinfo"] = 1
+		params["include_played_free_games"] = 1
+	return params
+
+
+def _owned_result(res):
+	if not isinstance(res, dict) or res.get("error"):
+		raise RuntimeError((res or {}).get("error") if isinstance(res, dict) else "Unexpected Steam response")
+	return Library.from_response(res.get("response", {}) or {})
+
+
+def _fetch_owned_games(api_key: str, steam_id: str, include_appinfo: bool):
+	return _flights.do(
+		("owned", steam_id, include_appinfo),
+		lambda: _owned_result(_get(OWNED_GAMES_URL, _owned_params(api_key, steam_id, include_appinfo)))
+	)
+
+
+async def _afetch_owned_games(api_key: str, steam_id: str, include_appinfo: bool):
+	async def fetch():
+		try:
+			res = (await async_http.get(OWNED_GAMES_URL, params=_owned_params(api_key, steam_id, include_appinfo))).json()
+		except Exception as e:
+			res = {"error": str(e)}
+		return _owned_result(res)
+	return await _flights.ado(("owned", steam_id, include_appinfo), fetch)
+
+
+def owned_library(include_appinfo: bool = True):
+	"""Return the cached owned-games `Library`, or an error dict."""
+	api_key, steam_id = _env()
+	if not api_key or not steam_id:
+		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
+	try:
+		return _owned_cache.get(
+			(steam_id, bool(include_appinfo)),
+			lambda: _fetch_owned_games(api_key, steam_id, include_appinfo)
+		)
+	except Exception as e:
+		return {"error": str(e)}
+
+
+def refresh_owned_games():
+	"""Fetch owned games live, then update the memory cache and the snapshot store."""
+	api_key, steam_id = _env()
+	if not api_key or not steam_id:
+		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
+	try:
+		library = _fetch_owned_games(api_key, steam_id, True)
+	except Exception as e:
+		return {"error": str(e)}
+	_owned_cache.set((steam_id, True), library)
+	store.save_steam_games(steam_id, library.games())
+	return library
+
+
+def _snapshot_games(steam_id: str, limit: int | None, images: bool, max_age: float | None = None):
+	"""Owned games from the snapshot store, or None if there is none (younger than `max_age`)."""
+	try:
+		if store.has_snapshot("steam", steam_id, max_age):
+			games = store.load_steam_games(steam_id, limit=limit)
+			return games if images else [_map_game_row(g) for g in games]
+	except Exception:
+		pass  # unreadable store: the caller goes to the live API
+	return None
+
+
+def all_owned_games(fresh: bool = False, limit: int | None = None, images: bool = True):
+	"""Owned games from the snapshot store; fetched live when `fresh`, never synced or stale."""
+	api_key, steam_id = _env()
+	if not api_key or not steam_id:
+		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
+	if not fresh:
+		games = _snapshot_games(steam_id, limit, images, snapshot_max_age("steam"))
+		if games is not None:
+			return games
+	library = refresh_owned_games()
+	if isinstance(library, dict):
+		# Live refresh failed: a stale snapshot beats no answer
+		games = None if fresh else _snapshot_games(steam_id, limit, images)
+		return library if games is None else games
+	return library.games(limit, images=images)
+
+
+def invalidate_owned_games(steam_id: str | None = None):
+	"""Drop cached owned-games data for one account, or for every account."""
+	if steam_id is None:
+		_owned_cache.invalidate()
+	else:
+		_owned_cache.invalidate(predicate=lambda key: key[0] == steam_id)
+
+
+def _map_game_row(row):
+	return {k: row[k] for k in ("appid", "name", "playtime_forever_min", "playtime_2weeks_min")}
+
+
 def register(server):
 	@server.tool("steam_games")
 	def steam_games(limit: int = 10000):
-		url = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-		api_key, steam_id = _env()
-		if not api_key or not steam_id:
-			return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
-		params = {
-			"key": api_key,
-			"steamid": steam_id,
-			"format": "json",
-			"include_appinfo": 1,
-			"include_played_free_games": 1
-		}
-		res = _get(url, params)
-		games = res.get("response", {}).get("games", [])
-		items = []
-		for g in games[:limit]:
-			items.append({
-				"appid": g.get("appid"),
-				"name": g.get("name"),
-				"playtime_forever_min": g.get("playtime_forever", 0),
-				"playtime_2weeks_min": g.get("playtime_2weeks", 0),
-				"img_icon_url": g.get("img_icon_url"),
-				"img_logo_url": g.get("img_logo_url")
-			})
-		return items
+		library = owned_library()
+		if isinstance(library, dict):
+			return library
+		return library.games(limit)
 
 	@server.tool("steam_all_games")
-	def steam_all_games():
-		"""Return the full list of owned games (no truncation)."""
-		url = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-		api_key, steam_id = _env()
-		if not api_key or not steam_id:
-			return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
-		params = {
-			"key": api_key,
-			"steamid": steam_id,
-			"format": "json",
-			"include_appinfo": 1,
-			"include_played_free_games": 1
-		}
-		res = _get(url, params)
-		games = res.get("response", {}).get("games", [])
-		return [{
-			"appid": g.get("appid"),
-			"name": g.get("name"),
-			"playtime_forever_min": g.get("playtime_forever", 0),
-			"playtime_2weeks_min": g.get("playtime_2weeks", 0),
-			"img_icon_url": g.get("img_icon_url"),
-			"img_logo_url": g.get("img_logo_url")
-		} for g in games]
+	def steam_all_games(fresh: bool = False):
+		"""Return the full list of owned games (no truncation).
+
+		Served from the local snapshot; pass fresh=true to refetch from Steam.
+		"""
+		return all_owned_games(fresh=fresh)
 
 	@server.tool("steam_recent_games")
 	def steam_recent_games(limit: int = 10):
-		url = "https://api.steampowered.com/IPlayerService/GetRecentlyPlayedGames/v0001/"
+		url = f"{API_BASE}/IPlayerService/GetRecentlyPlayedGames/v0001/"
 		api_key, steam_id = _env()
 		if not api_key or not steam_id:
 			return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
@@ -84,29 +173,14 @@ def register(server):
 		} for g in games[:limit]]
 
 	@server.tool("steam_app_details")
-	def steam_app_details(appid: int):
-		# Public store endpoint for basic app details
-		url = "https://store.steampowered.com/api/appdetails"
-		res = _get(url, {"appids": appid})
-		data = res.get(str(appid), {}) if isinstance(res, dict) else {}
-		if data.get("success"):
-			info = data.get("data", {})
-			return {
-				"name": info.get("name"),
-				"type": info.get("type"),
-				"genres": [g.get("description") for g in info.get("genres", [])],
-				"developers": info.get("developers"),
-				"publishers": info.get("publishers"),
-				"required_age": info.get("required_age"),
-				"is_free": info.get("is_free"),
-				"short_description": info.get("short_description"),
-				"header_image": info.get("header_image")
-			}
-		return {"error": "Not found"}
+	def steam_app_details(appid: int, fresh: bool = False):
+		"""Store details for one app; cached locally (see steam_enrich_library), fresh=true refetches."""
+		from .steam_enrich import app_details
+		return app_details(appid, fresh=fresh)
 
 	@server.tool("steam_player_achievements")
 	def steam_player_achievements(appid: int, language: str = "en"):
-		url = "https://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v0001/"
+		url = f"{API_BASE}/ISteamUserStats/GetPlayerAchievements/v0001/"
 		api_key, steam_id = _env()
 		if not api_key or not steam_id:
 			return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
@@ -125,41 +199,27 @@ def register(server):
 	@server.tool("steam_game_stats")
 	def steam_game_stats(appid: int):
 		# Compose stats from owned games and app details
-		owned = steam_games(limit=5000)
-		match = next((g for g in owned if g.get("appid") == appid), None)
+		library = owned_library()
+		i = None if isinstance(library, dict) else library.position(appid)
+		match = None if i is None else library.game(i)
 		details = steam_app_details(appid)
 		return {"appid": appid, "owned_playtime": match, "details": details}
 
 	@server.tool("steam_context_snapshot")
 	def steam_context_snapshot(limit: int = 25):
 		"""Return compact Steam context for the model: count and top games."""
-		owned_full = list_owned_games(limit=5000)
-		if isinstance(owned_full, dict) and owned_full.get("error"):
-			return owned_full
-		def safe_int(x):
-			try:
-				return int(x or 0)
-			except Exception:
-				return 0
-		ordered = sorted(
-			owned_full,
-			key=lambda g: safe_int(g.get("playtime_forever_min")),
-			reverse=True
-		)
-		top = []
-		for g in ordered[:limit]:
-			top.append({
-				"appid": g.get("appid"),
-				"name": g.get("name"),
-				"minutes_lifetime": safe_int(g.get("playtime_forever_min")),
-				"minutes_recent": safe_int(g.get("playtime_2weeks_min"))
-			})
-		total_minutes = sum(safe_int(g.get("playtime_forever_min")) for g in owned_full)
-		count_info = get_owned_count()
-		count_val = count_info.get("count") if isinstance(count_info, dict) else None
+		library = owned_library()
+		if isinstance(library, dict):
+			return library
+		top = [{
+			"appid": library.appids[i],
+			"name": library.names[i],
+			"minutes_lifetime": library.forever[i],
+			"minutes_recent": library.recent[i]
+		} for i in library.top(limit)]
 		return {
-			"count": count_val,
-			"total_playtime_min": total_minutes,
+			"count": library.count,
+			"total_playtime_min": library.total_minutes,
 			"top_games": top
 		}
 
@@ -171,23 +231,24 @@ def register(server):
 		if not cookie_header:
 			return {"error": "Missing Steam Store cookie.", "how_to": "Provide cookie param or set STEAM_STORE_COOKIE env with your logged-in Steam cookies."}
 		headers["Cookie"] = cookie_header
-		url = "https://store.steampowered.com/api/appuserdetails"
-		res = _get(url, {"appids": appids}) if not headers else requests.get(url, params={"appids": appids}, headers=headers, timeout=20).json()
-		return res
+		url = f"{STORE_BASE}/api/appuserdetails"
+		try:
+			return http_client.get(url, params={"appids": appids}, headers=headers).json()
+		except Exception as e:
+			return {"error": str(e)}
 
 	@server.tool("steam_owned_count")
 	def steam_owned_count():
-		url = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-		api_key, steam_id = _env()
-		if not api_key or not steam_id:
-			return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
-		params = {
-			"key": api_key,
-			"steamid": steam_id,
-			"format": "json"
-		}
-		res = _get(url, params)
-		return {"count": res.get("response", {}).get("game_count", 0)}
+		library = owned_library(include_appinfo=False)
+		if isinstance(library, dict):
+			return library
+		return {"count": library.count or 0}
+
+	@server.tool("steam_cache_invalidate")
+	def steam_cache_invalidate():
+		"""Forget cached owned-games data so the next call refetches it from Steam."""
+		invalidate_owned_games()
+		return {"ok": True}
 
 	@server.tool("steam_playtime_for")
 	def steam_playtime_for(query: str):
@@ -195,78 +256,16 @@ def register(server):
 
 		Returns best_match plus candidates.
 		"""
-		if not query or not isinstance(query, str):
-			return {"error": "Provide a non-empty query string"}
-		owned = steam_all_games()
-		if isinstance(owned, dict) and owned.get("error"):
-			return owned
-		ql = query.strip().lower()
-		def score(name: str) -> int:
-			n = (name or "").lower()
-			if ql == n:
-				return 100
-			if ql in n:
-				return 80
-			# simple token overlap
-			qset = set(ql.split())
-			nset = set(n.split())
-			return 50 + len(qset & nset)
-		scored = sorted(owned, key=lambda g: score(g.get("name") or ""), reverse=True)
-		best = scored[0] if scored else None
-		def to_hours(mins: int) -> float:
-			try:
-				return round((mins or 0) / 60.0, 2)
-			except Exception:
-				return 0.0
-		candidates = []
-		for g in scored[:5]:
-			m = int(g.get("playtime_forever_min") or 0)
-			candidates.append({
-				"appid": g.get("appid"),
-				"name": g.get("name"),
-				"minutes": m,
-				"hours": to_hours(m)
-			})
-		if best:
-			mins = int(best.get("playtime_forever_min") or 0)
-			return {
-				"query": query,
-				"best_match": {
-					"appid": best.get("appid"),
-					"name": best.get("name"),
-					"minutes": mins,
-					"hours": to_hours(mins)
-				},
-				"candidates": candidates
-			}
-		return {"query": query, "error": "No owned games matched"}
+		return playtime_for_name(query)
 
 
 # Public helpers for direct app usage
 
 def list_owned_games(limit: int = 50):
-	url = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
-	api_key, steam_id = _env()
-	if not api_key or not steam_id:
-		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
-	params = {
-		"key": api_key,
-		"steamid": steam_id,
-		"format": "json",
-		"include_appinfo": 1,
-		"include_played_free_games": 1
-	}
-	res = _get(url, params)
-	games = res.get("response", {}).get("games", [])
-	items = []
-	for g in games[:limit]:
-		items.append({
-			"appid": g.get("appid"),
-			"name": g.get("name"),
-			"playtime_forever_min": g.get("playtime_forever", 0),
-			"playtime_2weeks_min": g.get("playtime_2weeks", 0)
-		})
-	return items
+	library = owned_library()
+	if isinstance(library, dict):
+		return library
+	return library.games(limit, images=False)
 
 
 def app_user_details(appids: str, cookie: str | None = None):
@@ -275,77 +274,91 @@ def app_user_details(appids: str, cookie: str | None = None):
 	if not cookie_header:
 		return {"error": "Missing Steam Store cookie.", "how_to": "Provide cookie param or set STEAM_STORE_COOKIE env with your logged-in Steam cookies."}
 	headers["Cookie"] = cookie_header
-	url = "https://store.steampowered.com/api/appuserdetails"
+	url = f"{STORE_BASE}/api/appuserdetails"
 	try:
-		return requests.get(url, params={"appids": appids}, headers=headers, timeout=20).json()
+		return http_client.get(url, params={"appids": appids}, headers=headers).json()
 	except Exception as e:
 		return {"error": str(e)}
 
 
 def get_owned_count():
 	"""Return dict with owned game count for direct app usage."""
-	url = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
+	return _count(owned_library(include_appinfo=False))
+
+
+def _count(library):
+	if isinstance(library, dict):
+		return library
+	if library.count is None:
+		return {"error": "Steam API returned no game_count. Check profile privacy and account linkage."}
+	return {"count": library.count}
+
+
+# Async variants for the ASGI app; upstream calls go through async_http
+
+async def aowned_library(include_appinfo: bool = True):
 	api_key, steam_id = _env()
 	if not api_key or not steam_id:
 		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
-	params = {
-		"key": api_key,
-		"steamid": steam_id,
-		"format": "json"
-	}
-	res = _get(url, params)
-	resp = res.get("response", {}) if isinstance(res, dict) else {}
-	if "game_count" not in resp:
-		return {"error": "Steam API returned no game_count. Check profile privacy and account linkage.", "raw": resp}
-	return {"count": resp.get("game_count", 0)}
-
-
-def playtime_for_name(query: str):
+	try:
+		return await _owned_cache.aget(
+			(steam_id, bool(include_appinfo)),
+			lambda: _afetch_owned_games(api_key, steam_id, include_appinfo)
+		)
+	except Exception as e:
+		return {"error": str(e)}
+
+
+async def aall_owned_games(fresh: bool = False, limit: int | None = None, images: bool = True):
+	api_key, steam_id = _env()
+	if not api_key or not steam_id:
+		return {"error": "STEAM_API_KEY or STEAM_ID not set in process env."}
+	if not fresh:
+		games = await asyncio.to_thread(_snapshot_games, steam_id, limit, images, snapshot_max_age("steam"))
+		if games is not None:
+			return games
+	try:
+		library = await _afetch_owned_games(api_key, steam_id, True)
+	except Exception as e:
+		games = None if fresh else await asyncio.to_thread(_snapshot_games, steam_id, limit, images)
+		return {"error": str(e)} if games is None else games
+	_owned_cache.set((steam_id, True), library)
+	await asyncio.to_thread(store.save_steam_games, steam_id, library.games())
+	return library.games(limit, images=images)
+
+
+async def aget_owned_count():
+	return _count(await aowned_library(include_appinfo=False))
+
+
+def _to_hours(mins: int) -> float:
+	try:
+		return round((mins or 0) / 60.0, 2)
+	except Exception:
+		return 0.0
+
+
+def playtime_for_name(query: str, limit: int = 5):
 	"""Return best-match playtime for a given game name using owned games (fuzzy).
 
 	Returns {query, best_match: {name, appid, minutes, hours}, candidates: [...]} or error.
 	"""
 	if not query or not isinstance(query, str):
 		return {"error": "Provide a non-empty query string"}
-	owned = list_owned_games(limit=10000)
-	if isinstance(owned, dict) and owned.get("error"):
-		return owned
-	ql = query.strip().lower()
-	def score(name: str) -> int:
-		n = (name or "").lower()
-		if ql == n:
-			return 100
-		if ql in n:
-			return 80
-		qset = set(ql.split())
-		nset = set(n.split())
-		return 50 + len(qset & nset)
-	scored = sorted(owned, key=lambda g: score(g.get("name") or ""), reverse=True)
-	best = scored[0] if scored else None
-	def to_hours(mins: int) -> float:
-		try:
-			return round((mins or 0) / 60.0, 2)
-		except Exception:
-			return 0.0
+	library = owned_library()
+	if isinstance(library, dict):
+		return library
 	candidates = []
-	for g in scored[:5]:
-		m = int(g.get("playtime_forever_min") or 0)
+	for i, score in library.name_index().search(query, k=limit):
+		m = library.forever[i]
 		candidates.append({
-			"appid": g.get("appid"),
-			"name": g.get("name"),
+			"appid": library.appids[i],
+			"name": library.names[i],
 			"minutes": m,
-			"hours": to_hours(m)
+			"hours": _to_hours(m),
+			"score": score
 		})
-	if best:
-		mins = int(best.get("playtime_forever_min") or 0)
-		return {
-			"query": query,
-			"best_match": {
-				"appid": best.get("appid"),
-				"name": best.get("name"),
-				"minutes": mins,
-				"hours": to_hours(mins)
-			},
-			"candidates": candidates
-		}
-	return {"query": query, "error": "No owned games matched"}
\ No newline at end of file
+	if candidates:
+		best = {k: v for k, v in candidates[0].items() if k != "score"}
+		return {"query": query, "best_match": best, "candidates": candidates}
+	return {"query": query, "error": "No owned games matched"}
@@ -0,0 +1,404 @@
+"""Local SQLite snapshot store for synced service data.
+
+One table per service snapshot plus `sync_state`, which records when each
+(source, scope) was last synced. Each thread gets its own connection; the database
+runs in WAL mode so the Flask app and the MCP server can share one file.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+DB_PATH = os.getenv("HUB_DB_PATH", "hub.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+	source TEXT NOT NULL,
+	scope TEXT NOT NULL,
+	synced_at REAL NOT NULL,
+	status TEXT NOT NULL,
+	error TEXT,
+	PRIMARY KEY (source, scope)
+);
+CREATE TABLE IF NOT EXISTS sync_lease (
+	source TEXT PRIMARY KEY,
+	owner TEXT NOT NULL,
+	expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steam_games (
+	steamid TEXT NOT NULL,
+	appid INTEGER NOT NULL,
+	name TEXT,
+	playtime_forever_min INTEGER,
+	playtime_2weeks_min INTEGER,
+	img_icon_url TEXT,
+	img_logo_url TEXT,
+	PRIMARY KEY (steamid, appid)
+);
+CREATE TABLE IF NOT EXISTS ytm_liked_songs (
+	position INTEGER PRIMARY KEY,
+	youtube_id TEXT,
+	title TEXT,
+	artist TEXT,
+	album TEXT,
+	duration TEXT,
+	liked_date TEXT,
+	url TEXT
+);
+CREATE TABLE IF NOT EXISTS github_commits (
+	owner TEXT NOT NULL,
+	repo TEXT NOT NULL,
+	position INTEGER NOT NULL,
+	sha TEXT,
+	msg TEXT,
+	author TEXT,
+	date TEXT,
+	url TEXT,
+	PRIMARY KEY (owner, repo, position)
+);
+CREATE TABLE IF NOT EXISTS llm_answers (
+	key TEXT PRIMARY KEY,
+	fingerprint TEXT NOT NULL,
+	query TEXT NOT NULL,
+	answer TEXT NOT NULL,
+	created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_answers_created ON llm_answers (created_at);
+CREATE TABLE IF NOT EXISTS steam_app_details (
+	appid INTEGER PRIMARY KEY,
+	success INTEGER NOT NULL,
+	details TEXT,
+	fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steam_achievements (
+	steamid TEXT NOT NULL,
+	appid INTEGER NOT NULL,
+	last_played INTEGER NOT NULL,
+	playtime INTEGER NOT NULL,
+	status TEXT NOT NULL,
+	achieved INTEGER NOT NULL,
+	total INTEGER NOT NULL,
+	last_unlock INTEGER,
+	fetched_at REAL NOT NULL,
+	PRIMARY KEY (steamid, appid)
+);
+CREATE TABLE IF NOT EXISTS gmail_messages (
+	position INTEGER PRIMARY KEY,
+	id TEXT NOT NULL,
+	thread_id TEXT,
+	sender TEXT,
+	subject TEXT,
+	date TEXT,
+	snippet TEXT
+);
+"""
+
+STEAM_COLUMNS = ("appid", "name", "playtime_forever_min", "playtime_2weeks_min", "img_icon_url", "img_logo_url")
+YTM_COLUMNS = ("title", "artist", "album", "duration", "liked_date", "youtube_id", "url")
+COMMIT_COLUMNS = ("sha", "msg", "author", "date", "url")
+EMAIL_COLUMNS = ("id", "thread_id", "sender", "subject", "date", "snippet")
+
+_local = threading.local()
+
+
+def connect() -> sqlite3.Connection:
+	"""Return this thread's connection, creating the schema on first use."""
+	conn = getattr(_local, "conn", None)
+	if conn is None or getattr(_local, "path", None) != DB_PATH:
+		conn = sqlite3.connect(DB_PATH, timeout=30)
+		conn.row_factory = sqlite3.Row
+		conn.execute("PRAGMA journal_mode=WAL")
+		conn.execute("PRAGMA synchronous=NORMAL")
+		conn.executescript(SCHEMA)
+		_migrate(conn)
+		_local.conn = conn
+		_local.path = DB_PATH
+	return conn
+
+
+# Columns added after a table was first shipped: table -> ((column, type), ...)
+ADDED_COLUMNS = {
+	"gmail_messages": (("thread_id", "TEXT"), ("sender", "TEXT"), ("subject", "TEXT"), ("date", "TEXT")),
+}
+
+
+def _migrate(conn: sqlite3.Connection):
+	for table, columns in ADDED_COLUMNS.items():
+		have = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+		for name, kind in columns:
+			if name not in have:
+				conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {kind}")
+
+
+def _replace(table: str, where: str, where_params: tuple, columns: tuple, rows, extra: dict | None = None):
+	"""Atomically swap every row matching `where` for `rows` (dicts keyed by `columns`)."""
+	extra = extra or {}
+	cols = tuple(extra) + columns
+	sql = f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})"
+	conn = connect()
+	with conn:
+		conn.execute(f"DELETE FROM {table} WHERE {where}", where_params)
+		conn.executemany(sql, (tuple(extra.values()) + tuple(r.get(c) for c in columns) for r in rows))
+
+
+def _select(sql: str, params: tuple = ()):
+	return [dict(row) for row in connect().execute(sql, params)]
+
+
+def _page(offset: int, limit: int | None):
+	return " LIMIT ? OFFSET ?", (-1 if limit is None else limit, max(0, offset))
+
+
+def mark_synced(source: str, scope: str = "", status: str = "ok", error: str | None = None):
+	"""Record a sync attempt; only status "ok" makes a snapshot servable."""
+	conn = connect()
+	with conn:
+		conn.execute(
+			"INSERT OR REPLACE INTO sync_state (source, scope, synced_at, status, error) VALUES (?, ?, ?, ?, ?)",
+			(source, scope, time.time(), status, error)
+		)
+
+
+def sync_state(source: str | None = None, scope: str | None = None):
+	"""All sync_state rows, or the one row for (source, scope) (None if never synced)."""
+	if source is None:
+		return _select("SELECT * FROM sync_state ORDER BY source, scope")
+	rows = _select("SELECT * FROM sync_state WHERE source = ? AND scope = ?", (source, scope or ""))
+	return rows[0] if rows else None
+
+
+def has_snapshot(source: str, scope: str = "", max_age: float | None = None) -> bool:
+	"""True if (source, scope) was synced successfully, within the last `max_age` seconds if given."""
+	rows = _select(
+		"SELECT 1 FROM sync_state WHERE source = ? AND scope = ? AND status = 'ok' AND synced_at >= ?",
+		(source, scope, 0.0 if max_age is None else time.time() - max_age)
+	)
+	return bool(rows)
+
+
+def snapshot_version() -> float:
+	"""Time of the latest sync of any source; changes whenever snapshot data may have."""
+	rows = _select("SELECT MAX(synced_at) AS at FROM sync_state")
+	return rows[0]["at"] or 0.0
+
+
+def acquire_lease(source: str, owner: str, ttl: float) -> bool:
+	"""Take (or renew) the lease on running `source`'s sync job for `ttl` seconds.
+
+	False while another owner holds an unexpired lease, so processes sharing the
+	database never run the same job at once.
+	"""
+	now = time.time()
+	conn = connect()
+	with conn:
+		cur = conn.execute(
+			"INSERT INTO sync_lease (source, owner, expires_at) VALUES (?, ?, ?) "
+			"ON CONFLICT (source) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+			"WHERE sync_lease.owner = excluded.owner OR sync_lease.expires_at < ?",
+			(source, owner, now + ttl, now)
+		)
+	return cur.rowcount == 1
+
+
+def release_lease(source: str, owner: str):
+	conn = connect()
+	with conn:
+		conn.execute("DELETE FROM sync_lease WHERE source = ? AND owner = ?", (source, owner))
+
+
+# Steam
+
+def save_steam_games(steamid: str, games):
+	_replace("steam_games", "steamid = ?", (steamid,), STEAM_COLUMNS, games, {"steamid": steamid})
+	mark_synced("steam", steamid)
+
+
+def load_steam_games(steamid: str, limit: int | None = None, offset: int = 0):
+	page, params = _page(offset, limit)
+	cols = ", ".join(STEAM_COLUMNS)
+	return _select(f"SELECT {cols} FROM steam_games WHERE steamid = ? ORDER BY rowid{page}", (steamid, *params))
+
+
+def save_app_details(rows):
+	"""Upsert (appid, success, details dict or None) Steam Store results."""
+	now = time.time()
+	conn = connect()
+	with conn:
+		conn.executemany(
+			"INSERT OR REPLACE INTO steam_app_details (appid, success, details, fetched_at) VALUES (?, ?, ?, ?)",
+			((appid, int(bool(success)), None if details is None else json.dumps(details), now) for appid, success, details in rows)
+		)
+
+
+def load_app_details(appids=None):
+	"""{appid: {success, details, fetched_at}} for the given appids, or for every cached app."""
+	if appids is None:
+		rows = connect().execute("SELECT * FROM steam_app_details")
+	else:
+		appids = list(appids)
+		if not appids:
+			return {}
+		rows = connect().execute(f"SELECT * FROM steam_app_details WHERE appid IN ({', '.join('?' for _ in appids)})", appids)
+	return {
+		row["appid"]: {"success": bool(row["success"]), "details": json.loads(row["details"]) if row["details"] else None, "fetched_at": row["fetched_at"]}
+		for row in rows
+	}
+
+
+ACHIEVEMENT_COLUMNS = ("appid", "last_played", "playtime", "status", "achieved", "total", "last_unlock")
+
+
+def save_achievements(steamid: str, rows):
+	"""Upsert per-app achievement counts (dicts keyed by ACHIEVEMENT_COLUMNS)."""
+	cols = ("steamid",) + ACHIEVEMENT_COLUMNS + ("fetched_at",)
+	now = time.time()
+	conn = connect()
+	with conn:
+		conn.executemany(
+			f"INSERT OR REPLACE INTO steam_achievements ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+			((steamid,) + tuple(r.get(c) for c in ACHIEVEMENT_COLUMNS) + (now,) for r in rows)
+		)
+
+
+def load_achievements(steamid: str):
+	"""{appid: row} of cached achievement counts for one account."""
+	rows = _select(f"SELECT {', '.join(ACHIEVEMENT_COLUMNS)}, fetched_at FROM steam_achievements WHERE steamid = ?", (steamid,))
+	return {row["appid"]: row for row in rows}
+
+
+# YouTube Music
+
+def save_liked_songs(songs):
+	rows = [{**s, "position": i} for i, s in enumerate(songs)]
+	_replace("ytm_liked_songs", "1 = 1", (), ("position",) + YTM_COLUMNS, rows)
+	mark_synced("ytmusic")
+	mark_synced("ytmusic", "full")
+
+
+def load_liked_songs(limit: int | None = None, offset: int = 0):
+	page, params = _page(offset, limit)
+	return _select(f"SELECT {', '.join(YTM_COLUMNS)} FROM ytm_liked_songs ORDER BY position{page}", params)
+
+
+def load_liked_songs_after(position: int | None = None, limit: int = 100):
+	"""Keyset page of liked songs (newest first) after `position`; rows include `position`.
+
+	Positions only ever decrease for newly liked songs, so a cursor stays valid across syncs.
+	"""
+	cols = ", ".join(("position",) + YTM_COLUMNS)
+	if position is None:
+		return _select(f"SELECT {cols} FROM ytm_liked_songs ORDER BY position LIMIT ?", (limit,))
+	return _select(f"SELECT {cols} FROM ytm_liked_songs WHERE position > ? ORDER BY position LIMIT ?", (position, limit))
+
+
+def newest_liked_ids(limit: int = 200):
+	rows = connect().execute(
+		"SELECT youtube_id FROM ytm_liked_songs WHERE youtube_id IS NOT NULL ORDER BY position LIMIT ?", (limit,)
+	)
+	return [row[0] for row in rows]
+
+
+def count_liked_songs() -> int:
+	return connect().execute("SELECT COUNT(*) FROM ytm_liked_songs").fetchone()[0]
+
+
+def prepend_liked_songs(songs):
+	"""Insert newly liked songs (newest first) ahead of the snapshot, dropping older copies."""
+	songs = list(songs)
+	conn = connect()
+	with conn:
+		if songs:
+			top = conn.execute("SELECT MIN(position) FROM ytm_liked_songs").fetchone()[0]
+			start = (0 if top is None else top) - len(songs)
+			ids = [(s.get("youtube_id"),) for s in songs if s.get("youtube_id")]
+			conn.executemany("DELETE FROM ytm_liked_songs WHERE youtube_id = ?", ids)
+			cols = ("position",) + YTM_COLUMNS
+			conn.executemany(
+				f"INSERT INTO ytm_liked_songs ({', '.join(cols)}) VALUES ({', '.join('?' for _ in cols)})",
+				((start + i,) + tuple(s.get(c) for c in YTM_COLUMNS) for i, s in enumerate(songs))
+			)
+	mark_synced("ytmusic")
+
+
+# GitHub
+
+def save_commits(owner: str, repo: str, commits):
+	rows = [{**c, "position": i} for i, c in enumerate(commits)]
+	_replace(
+		"github_commits", "owner = ? AND repo = ?", (owner, repo),
+		("position",) + COMMIT_COLUMNS, rows, {"owner": owner, "repo": repo}
+	)
+	mark_synced("github", f"{owner}/{repo}")
+
+
+def load_commits(owner: str, repo: str, limit: int | None = None, offset: int = 0):
+	page, params = _page(offset, limit)
+	return _select(
+		f"SELECT {', '.join(COMMIT_COLUMNS)} FROM github_commits WHERE owner = ? AND repo = ? ORDER BY position{page}",
+		(owner, repo, *params)
+	)
+
+
+# Gmail
+
+def save_emails(emails):
+	rows = [{**e, "position": i} for i, e in enumerate(emails)]
+	_replace("gmail_messages", "1 = 1", (), ("position",) + EMAIL_COLUMNS, rows)
+	mark_synced("gmail")
+
+
+def upsert_emails(emails, keep: int | None = None):
+	"""Put `emails` (newest first) at the top of the snapshot, keeping the older rows not among them.
+
+	The snapshot keeps its size (or `keep` rows), so a short fresh page never shortens it.
+	"""
+	ids = {e["id"] for e in emails}
+	conn = connect()
+	with conn:
+		old = [dict(r) for r in conn.execute(f"SELECT {', '.join(EMAIL_COLUMNS)} FROM gmail_messages ORDER BY position")]
+		merged = list(emails) + [e for e in old if e["id"] not in ids]
+		merged = merged[:max(len(old), len(emails)) if keep is None else keep]
+		conn.execute("DELETE FROM gmail_messages")
+		conn.executemany(
+			f"INSERT INTO gmail_messages (position, {', '.join(EMAIL_COLUMNS)}) VALUES (?{', ?' * len(EMAIL_COLUMNS)})",
+			((i, *(e.get(c) for c in EMAIL_COLUMNS)) for i, e in enumerate(merged))
+		)
+	mark_synced("gmail")
+
+
+def load_emails(limit: int | None = None, offset: int = 0):
+	page, params = _page(offset, limit)
+	return _select(f"SELECT {', '.join(EMAIL_COLUMNS)} FROM gmail_messages ORDER BY position{page}", params)
+
+
+# LLM answers
+
+def save_answer(key: str, fingerprint: str, query: str, answer: str, max_rows: int | None = None):
+	conn = connect()
+	with conn:
+		conn.execute(
+			"INSERT OR REPLACE INTO llm_answers (key, fingerprint, query, answer, created_at) VALUES (?, ?, ?, ?, ?)",
+			(key, fingerprint, query, answer, time.time())
+		)
+		if max_rows:
+			conn.execute(
+				"DELETE FROM llm_answers WHERE key IN (SELECT key FROM llm_answers ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+				(max_rows,)
+			)
+
+
+def load_answer(key: str, max_age: float):
+	"""(answer, age in seconds) for a cached answer younger than max_age, else None."""
+	row = connect().execute("SELECT answer, created_at FROM llm_answers WHERE key = ?", (key,)).fetchone()
+	if row is None:
+		return None
+	age = time.time() - row["created_at"]
+	return (row["answer"], age) if age < max_age else None
+
+
+def purge_answers(max_age: float):
+	conn = connect()
+	with conn:
+		conn.execute("DELETE FROM llm_answers WHERE created_at < ?", (time.time() - max_age,))
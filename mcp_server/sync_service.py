@@ -0,0 +1,251 @@
+"""Background sync of remote service data into the local snapshot store.
+
+Each source refreshes on its own interval (env SYNC_<SOURCE>_INTERVAL, seconds)
+and gets a time budget per run (env SYNC_<SOURCE>_BUDGET); the long Steam jobs stop
+fetching when it runs out and continue on the next run, so they cannot hold up the
+other sources. Sources without credentials are skipped. Every process serving the
+hub may run the scheduler: a job only runs under a lease row in the store and when
+no process ran it within its interval, so each job still runs once per interval. Tools and routes read the snapshots via
+`store`, falling back to a live fetch when a source was never synced or its
+snapshot is older than HUB_SNAPSHOT_STALE_FACTOR (default 2) sync intervals.
+"""
+import os
+import secrets
+import threading
+import time
+
+from . import store
+
+
+def _sync_steam(deadline: float):
+	from .steam_service import _env, refresh_owned_games
+	if not all(_env()):
+		return "skipped"
+	res = refresh_owned_games()
+	if isinstance(res, dict) and res.get("error"):
+		raise RuntimeError(res["error"])
+	return "ok"
+
+
+def _sync_steam_store(deadline: float):
+	from .steam_service import _env
+	if not all(_env()):
+		return "skipped"
+	from .steam_enrich import enrich_owned_games
+	res = enrich_owned_games(deadline=deadline)
+	if res.get("error"):
+		raise RuntimeError(res["error"])
+	# "partial" schedules another pass after the backlog interval (also when a
+	# steam_enrich_library call is filling the cache right now)
+	return "partial" if res.get("remaining") or res.get("status") == "running" else "ok"
+
+
+def _sync_steam_achievements(deadline: float):
+	from .steam_service import _env
+	if not all(_env()):
+		return "skipped"
+	from .steam_achievements import achievement_stats
+	res = achievement_stats(deadline=deadline)
+	if res.get("error"):
+		raise RuntimeError(res["error"])
+	return "ok"
+
+
+def _sync_ytmusic(deadline: float):
+	from .ytmusic_service import _ytm, sync_liked_songs
+	if _ytm() is None:
+		return "skipped"
+	res = sync_liked_songs()
+	if isinstance(res, dict) and res.get("error"):
+		raise RuntimeError(res["error"])
+	return "ok"
+
+
+def _sync_github(deadline: float):
+	user, repo = os.getenv("GITHUB_USER"), os.getenv("GITHUB_REPO")
+	if not (user and repo):
+		return "skipped"
+	from .github_fetch import default_headers
+	from .github_service import sync_commits
+	res, complete = sync_commits(user, repo, headers=default_headers())
+	if not isinstance(res, list):
+		raise RuntimeError((res or {}).get("message", "GitHub request failed") if isinstance(res, dict) else "GitHub request failed")
+	if not complete:
+		raise RuntimeError(f"{user}/{repo} has more than {len(res)} commits (GITHUB_MAX_PAGES); snapshot not saved")
+	return "ok"
+
+
+def _sync_gmail(deadline: float):
+	if not os.path.exists(os.getenv("GMAIL_TOKEN_FILE", "token.json")):
+		return "skipped"
+	from .email_service import sync_emails
+	sync_emails(max_results=int(os.getenv("SYNC_GMAIL_MAX", "25")))
+	return "ok"
+
+
+# source -> (job, default interval, default time budget per run; seconds)
+JOBS = {
+	"steam": (_sync_steam, 3600, 60),
+	"steam_store": (_sync_steam_store, 21600, 300),
+	"steam_achievements": (_sync_steam_achievements, 21600, 300),
+	"ytmusic": (_sync_ytmusic, 1800, 120),
+	"github": (_sync_github, 900, 60),
+	"gmail": (_sync_gmail, 300, 60),
+}
+
+# Sources whose job reports "partial" while a backlog remains, and the
+# default seconds until their next pass then
+BACKLOG_INTERVALS = {"steam_store": 300}
+
+JOB_SCOPE = "job"
+# Extra lease time past the budget, for work that was in flight when it ran out
+LEASE_MARGIN = 60.0
+
+_status = {}  # source -> {"status", "at", "ms", "error"?}
+_lock = threading.Lock()
+_thread = None
+_owner = f"{os.getpid()}-{secrets.token_hex(4)}"  # this process; leases are held per thread
+
+
+def _seconds(source: str, name: str, default: float) -> float:
+	try:
+		return float(os.getenv(f"SYNC_{source.upper()}_{name}", default))
+	except ValueError:
+		return float(default)
+
+
+def interval(source: str) -> float:
+	return _seconds(source, "INTERVAL", JOBS[source][1])
+
+
+def backlog_interval(source: str) -> float:
+	return _seconds(source, "BACKLOG_INTERVAL", BACKLOG_INTERVALS.get(source, JOBS[source][1]))
+
+
+def budget(source: str) -> float:
+	"""Seconds one run of `source` may spend fetching before it stops and leaves the rest for later."""
+	return _seconds(source, "BUDGET", JOBS[source][2])
+
+
+def max_age(source: str) -> float:
+	"""Age in seconds past which the snapshot of `source` is not served."""
+	try:
+		factor = float(os.getenv("HUB_SNAPSHOT_STALE_FACTOR", "2"))
+	except ValueError:
+		factor = 2.0
+	return interval(source) * factor
+
+
+def run_job(source: str, due: bool = False):
+	"""Run one source's sync now; returns its status entry.
+
+	Returns {"status": "running"} while another thread or process holds the job's
+	lease, and with `due` {"status": "not_due"} if it ran within its interval.
+	"""
+	job = JOBS[source][0]
+	limit = budget(source)
+	owner = f"{_owner}/{threading.get_ident()}"
+	try:
+		leased = store.acquire_lease(source, owner, limit + LEASE_MARGIN)
+	except Exception:
+		leased = True  # no usable store: nothing to coordinate with
+	if not leased:
+		return {"status": "running"}
+	try:
+		if due and time.time() < _next_due(source):
+			return {"status": "not_due"}
+		return _run(source, job, limit)
+	finally:
+		try:
+			store.release_lease(source, owner)
+		except Exception:
+			pass
+
+
+def _run(source: str, job, limit: float):
+	start = time.perf_counter()
+	try:
+		entry = {"status": job(time.monotonic() + limit)}
+	except Exception as e:
+		entry = {"status": "error", "error": str(e)}
+	entry.update({"at": time.time(), "ms": round((time.perf_counter() - start) * 1000, 1)})
+	with _lock:
+		_status[source] = entry
+	try:
+		# Scope "job" tracks runs; the snapshot rows of a source keep their own scopes
+		store.mark_synced(source, JOB_SCOPE, entry["status"], entry.get("error"))
+	except Exception:
+		pass
+	return entry
+
+
+def status():
+	with _lock:
+		jobs = {name: dict(entry) for name, entry in _status.items()}
+	try:
+		snapshots = store.sync_state()
+	except Exception as e:
+		snapshots = {"error": str(e)}
+	return {"running": _thread is not None and _thread.is_alive(), "jobs": jobs, "snapshots": snapshots}
+
+
+def _last_run(source: str):
+	try:
+		return store.sync_state(source, JOB_SCOPE)
+	except Exception:
+		return None
+
+
+def _next_due(source: str) -> float:
+	"""When `source` is next due, from its last run by any process (sooner while a backlog remains)."""
+	row = _last_run(source)
+	if row is None:
+		return 0.0
+	return row["synced_at"] + (backlog_interval(source) if row["status"] == "partial" else interval(source))
+
+
+def _loop(poll: float):
+	# Resume the schedule of the previous process instead of running every job at startup
+	next_run = {name: _next_due(name) for name in JOBS}
+	while True:
+		for name in JOBS:
+			if time.time() >= next_run[name]:
+				entry = run_job(name, due=True)
+				if entry["status"] == "running":
+					next_run[name] = time.time() + poll
+				elif entry["status"] == "partial":
+					next_run[name] = time.time() + backlog_interval(name)
+				elif entry["status"] == "not_due":  # another process ran it
+					next_run[name] = _next_due(name)
+				else:
+					next_run[name] = time.time() + interval(name)
+		time.sleep(poll)
+
+
+def start_background_sync(poll: float = 5.0):
+	"""Start the sync scheduler thread once per process (disable with HUB_SYNC=0)."""
+	global _thread
+	if _thread is not None and _thread.is_alive():
+		return True
+	if os.getenv("HUB_SYNC", "1") in ("0", "false", "no"):
+		return False
+	with _lock:
+		if _thread is not None and _thread.is_alive():
+			return True
+		_thread = threading.Thread(target=_loop, args=(poll,), name="hub-sync", daemon=True)
+		_thread.start()
+	return True
+
+
+def register(server):
+	@server.tool("sync_status")
+	def sync_status():
+		"""Show when each source was last synced into the local snapshot store."""
+		return status()
+
+	@server.tool("sync_now")
+	def sync_now(source: str):
+		"""Sync one source (steam, steam_store, steam_achievements, ytmusic, github, gmail) into the local store immediately."""
+		if source not in JOBS:
+			return {"error": f"Unknown source '{source}'", "sources": list(JOBS)}
+		return run_job(source)
@@ -0,0 +1,272 @@
+"""Streaming reader for Google Takeout YouTube / YouTube Music history files.
+
+Takeout exports are one large JSON array (or an object holding arrays under keys
+like "items"), often hundreds of MB. `TakeoutStream` decodes one array element at
+a time with `json.JSONDecoder.raw_decode` over a fixed-size text buffer, so memory
+stays proportional to the chunk size rather than the file. `position()` returns a
+resumable cursor (parser state plus byte offset).
+
+Bytes are decoded with "surrogateescape", so every buffered character maps back to
+the exact input bytes it came from and cursors stay correct past a BOM or invalid
+UTF-8; the escaped bytes become U+FFFD in the returned values.
+"""
+import codecs
+import json
+import os
+import re
+import secrets
+import threading
+from collections import OrderedDict
+
+
+CHUNK_SIZE = int(os.getenv("TAKEOUT_CHUNK_SIZE", str(1 << 20)))
+ARRAY_KEYS = ("items", "likes", "myActivity", "records")
+MAX_ELEMENT_CHARS = int(os.getenv("TAKEOUT_MAX_ELEMENT_CHARS", str(64 << 20)))
+MAX_SESSIONS = 8
+
+_WS = re.compile(r"[ \t\n\r]*")
+_ESCAPED = re.compile("[\udc80-\udcff]+")
+_decoder = json.JSONDecoder()
+
+# dedup session token -> youtube_ids already returned on earlier pages
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+class TakeoutStream:
+	"""Iterate the elements of a Takeout JSON file without loading it.
+
+	`cursor` is a value previously returned by `position()`; iteration then resumes
+	right after the last element consumed.
+	"""
+
+	def __init__(self, path: str, cursor: str | None = None, chunk_size: int | None = None):
+		self.path = path
+		self.chunk_size = chunk_size or CHUNK_SIZE
+		self.mode, offset = _parse_cursor(cursor)
+		self._file = open(path, "rb")
+		if offset == 0 and self._file.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+			offset = len(codecs.BOM_UTF8)
+		self._file.seek(offset)
+		self._base = offset  # byte offset of self._buf[0]
+		self._buf = ""
+		self._pos = 0
+		self._eof = False
+		self._escaped = False  # invalid bytes seen: values need _unescape
+		self._text = codecs.getincrementaldecoder("utf-8")("surrogateescape")
+
+	def close(self):
+		self._file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def position(self) -> str:
+		"""Cursor for the current position: '<mode>:<byte offset>'."""
+		return f"{self.mode}:{self._base + len(self._buf[:self._pos].encode('utf-8', 'surrogateescape'))}"
+
+	def _fill(self) -> bool:
+		data = self._file.read(self.chunk_size)
+		self._base += len(self._buf[:self._pos].encode("utf-8", "surrogateescape"))
+		text = self._text.decode(data, final=not data)
+		if not self._escaped and _ESCAPED.search(text):
+			self._escaped = True
+		self._buf = self._buf[self._pos:] + text
+		self._pos = 0
+		self._eof = not data
+		return bool(data)
+
+	def _peek(self) -> str:
+		"""Next non-whitespace character ('' at end of file), without consuming it."""
+		while True:
+			self._pos = _WS.match(self._buf, self._pos).end()
+			if self._pos < len(self._buf):
+				return self._buf[self._pos]
+			if not self._fill():
+				return ""
+
+	def _expect(self, char: str):
+		if self._peek() != char:
+			raise ValueError(f"Malformed Takeout JSON near byte {self.position().split(':')[1]}: expected '{char}'")
+		self._pos += 1
+
+	def _value(self):
+		self._peek()
+		while True:
+			try:
+				value, end = _decoder.raw_decode(self._buf, self._pos)
+			except json.JSONDecodeError as e:
+				if len(self._buf) - self._pos > MAX_ELEMENT_CHARS:
+					raise ValueError(f"Takeout element near byte {self.position().split(':')[1]} is malformed or too large") from e
+				if self._eof or not self._fill():
+					raise ValueError(f"Malformed Takeout JSON: {e.msg}") from e
+				continue
+			# A number or literal ending exactly at the buffer edge may continue in the next chunk
+			if end == len(self._buf) and not self._eof and self._fill():
+				continue
+			self._pos = end
+			return _unescape(value) if self._escaped else value
+
+	def _array(self):
+		while True:
+			c = self._peek()
+			if c == ",":
+				self._pos += 1
+			elif c == "]":
+				self._pos += 1
+				return
+			elif c == "":
+				raise ValueError("Truncated Takeout JSON: unterminated array")
+			else:
+				yield self._value()
+
+	def _object(self):
+		"""Walk the top-level object, streaming arrays under ARRAY_KEYS and skipping other values."""
+		while True:
+			c = self._peek()
+			if c == ",":
+				self._pos += 1
+				continue
+			if c in ("}", ""):
+				return
+			key = self._value()
+			self._expect(":")
+			if key in ARRAY_KEYS and self._peek() == "[":
+				self._pos += 1
+				self.mode = "o"
+				yield from self._array()
+				self.mode = "k"
+			else:
+				self._value()
+
+	def __iter__(self):
+		if self.mode == "end":
+			return
+		if self.mode == "a":
+			yield from self._array()
+		elif self.mode == "o":
+			yield from self._array()
+			self.mode = "k"
+			yield from self._object()
+		elif self.mode == "k":
+			yield from self._object()
+		else:
+			c = self._peek()
+			if c == "[":
+				self._pos += 1
+				self.mode = "a"
+				yield from self._array()
+			elif c == "{":
+				self._pos += 1
+				self.mode = "k"
+				yield from self._object()
+			elif c:
+				raise ValueError("Takeout JSON must be an array or an object")
+		self.mode = "end"
+
+
+def _unescape(value):
+	"""Replace surrogate-escaped invalid bytes with U+FFFD, as errors="replace" would."""
+	if isinstance(value, str):
+		return _ESCAPED.sub("\ufffd", value)
+	if isinstance(value, list):
+		return [_unescape(v) for v in value]
+	if isinstance(value, dict):
+		return {_unescape(k): _unescape(v) for k, v in value.items()}
+	return value
+
+
+def _parse_cursor(cursor: str | None):
+	if not cursor:
+		return "start", 0
+	mode, _, offset = cursor.partition(":")
+	if mode not in ("a", "o", "k", "end") or not offset.isdigit():
+		raise ValueError(f"Invalid cursor '{cursor}'")
+	return mode, int(offset)
+
+
+def to_liked_song(item):
+	"""Map one Takeout activity record to the liked-song schema (None if not a record)."""
+	if not isinstance(item, dict):
+		return None
+	title = item.get("title") or item.get("titleUrl") or item.get("mediaTitle")
+	artists = [f.get("name") for f in (item.get("subtitles") or []) if isinstance(f, dict) and f.get("name")]
+	video_id = None
+	url = item.get("titleUrl") or item.get("url")
+	if url and "watch?v=" in url:
+		video_id = url.split("watch?v=", 1)[1].split("&", 1)[0] or None
+	return {
+		"title": title,
+		"artist": ", ".join(artists) if artists else None,
+		"album": None,
+		"duration": None,
+		"liked_date": item.get("time") or item.get("creationTime"),
+		"youtube_id": video_id,
+		"url": url
+	}
+
+
+def _matches(song, since: str | None, until: str | None, artist: str | None) -> bool:
+	# Takeout times are ISO 8601 UTC, so plain string comparison orders them; `until`
+	# is compared on its own length so "2024-05" includes all of May.
+	when = song.get("liked_date") or ""
+	if since and when < since:
+		return False
+	if until and when[:len(until)] > until:
+		return False
+	if artist and artist not in (song.get("artist") or "").lower():
+		return False
+	return True
+
+
+def _session(token: str | None):
+	"""Return (token, seen-ids set) for a dedup session, starting a new one if unknown."""
+	with _sessions_lock:
+		if token and token in _sessions:
+			_sessions.move_to_end(token)
+			return token, _sessions[token]
+		token = secrets.token_hex(6)
+		_sessions[token] = set()
+		while len(_sessions) > MAX_SESSIONS:
+			_sessions.popitem(last=False)
+		return token, _sessions[token]
+
+
+def parse_takeout(path: str, cursor: str | None = None, limit: int = 500, since: str | None = None,
+		until: str | None = None, artist: str | None = None, dedup: bool = True):
+	"""Return one batch of liked songs from a Takeout file plus `next_cursor` (None when done).
+
+	Dedup keeps the first record per youtube_id across the whole paging session;
+	the seen ids are held in memory for the last MAX_SESSIONS cursors in use.
+	"""
+	limit = max(1, limit)
+	token = None
+	if cursor and "@" in cursor:
+		cursor, token = cursor.split("@", 1)
+	token, seen = _session(token) if dedup else (None, None)
+	artist = artist.lower() if artist else None
+	songs = []
+	scanned = 0
+	with TakeoutStream(path, cursor) as stream:
+		for item in stream:
+			scanned += 1
+			song = to_liked_song(item)
+			if song is None or not _matches(song, since, until, artist):
+				continue
+			vid = song["youtube_id"]
+			if seen is not None and vid:
+				if vid in seen:
+					continue
+				seen.add(vid)
+			songs.append(song)
+			if len(songs) >= limit:
+				break
+		done = stream.mode == "end"
+		next_cursor = None if done else stream.position() + (f"@{token}" if token else "")
+	if done and token:
+		with _sessions_lock:
+			_sessions.pop(token, None)
+	return {"liked_songs": songs, "next_cursor": next_cursor, "scanned": scanned}
@@ -1,5 +1,13 @@
 import os
 import json
+import threading
+import time
+
+from . import metrics, store
+from .cache import TTLCache
+from .singleflight import group
+from .sync_service import max_age
+from .takeout import parse_takeout
 
 
 def _load_headers():
@@ -24,15 +32,76 @@ def _load_headers():
 	return None
 
 
-def _ytm():
+def _headers_source():
+	"""Cheap identity of the configured headers: the env JSON itself, or the file's path/mtime/size."""
+	data = os.getenv("YTMUSIC_HEADERS_JSON")
+	if data:
+		return ("env", data)
+	path = os.getenv("YTMUSIC_HEADERS_FILE", "headers_auth.json")
 	try:
-		from ytmusicapi import YTMusic
-		headers = _load_headers()
-		if not headers:
-			return None
-		return YTMusic(headers)
-	except Exception:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return ("file", os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+# (headers source, YTMusic client or None); rebuilt only when the source changes
+_client = (None, None)
+_client_lock = threading.Lock()
+# ytmusicapi mutates per-instance request state, so calls on the shared client are serialized
+_call_lock = threading.RLock()
+
+# Incremental sync: first fetch size, how many of the newest known ids act as stop
+# markers, and how often a full resync (which also drops unliked songs) is forced
+SYNC_FIRST_PAGE = int(os.getenv("YTM_SYNC_FIRST_PAGE", "100"))
+SYNC_ANCHORS = int(os.getenv("YTM_SYNC_ANCHORS", "200"))
+FULL_SYNC_INTERVAL = float(os.getenv("YTM_FULL_SYNC_INTERVAL", "86400"))
+
+# Liked-song results keyed on ("free", limit) / ("all",); cleared when the client is rebuilt
+_liked_cache = TTLCache(
+	ttl=float(os.getenv("YTM_CACHE_TTL", "300")),
+	stale_ttl=float(os.getenv("YTM_CACHE_STALE_TTL", "0")),
+	maxsize=int(os.getenv("YTM_CACHE_MAXSIZE", "16")),
+	name="ytmusic_liked"
+)
+
+
+def _ytm():
+	"""Return the shared YTMusic client (None without usable headers)."""
+	global _client
+	source = _headers_source()
+	if source is None:
 		return None
+	cached_source, client = _client
+	if cached_source == source:
+		return client
+	with _client_lock:
+		if _client[0] == source:
+			return _client[1]
+		try:
+			from ytmusicapi import YTMusic
+			headers = _load_headers()
+			client = YTMusic(headers) if headers else None
+		except Exception:
+			client = None
+		if _client[0] is not None:
+			_liked_cache.invalidate()
+		_client = (source, client)
+		return client
+
+
+_flights = group("ytmusic")
+
+
+def _fetch_liked(ytm, limit: int):
+	# Concurrent identical requests share one upstream call
+	return _flights.do(("liked", id(ytm), limit), lambda: _fetch_liked_now(ytm, limit))
+
+
+def _fetch_liked_now(ytm, limit: int):
+	with _call_lock, metrics.upstream_call("ytmusic"):
+		data = ytm.get_liked_songs(limit=limit)
+	return [_map_track(t) for t in (data or {}).get("tracks", [])[:limit]]
 
 
 def _map_track(t):
@@ -72,97 +141,182 @@ def register(server):
 
 		Requires YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON to be set.
 		"""
-		ytm = _ytm()
-		if ytm is None:
-			return {"error": "Missing YTMusic auth headers.", "how_to": "Export headers via ytmusicapi.setup and set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}
-		try:
-			data = ytm.get_liked_songs(limit=limit)
-			tracks = (data or {}).get("tracks", [])
-			return [_map_track(t) for t in tracks[:limit]]
-		except Exception as e:
-			return {"error": str(e)}
+		return list_liked_songs_free(limit=limit)
 
 	@server.tool("ytm_liked_songs_all")
-	def ytm_liked_songs_all():
-		"""Fetch the full liked songs list (no truncation best-effort)."""
-		ytm = _ytm()
-		if ytm is None:
-			return {"error": "Missing YTMusic auth headers.", "how_to": "Export headers via ytmusicapi.setup and set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}
-		try:
-			# Use a very high limit to traverse continuations (ytmusicapi handles paging)
-			data = ytm.get_liked_songs(limit=10000)
-			tracks = (data or {}).get("tracks", [])
-			return [_map_track(t) for t in tracks]
-		except Exception as e:
-			return {"error": str(e)}
+	def ytm_liked_songs_all(cursor: str = "", page_size: int = 500, fresh: bool = False):
+		"""Page through the full liked songs list, newest first.
+
+		Pass the returned next_cursor to get the following page (null on the last one).
+		Served from the local snapshot; fresh=true syncs new likes from YouTube Music first.
+		"""
+		return liked_songs_page(cursor or None, page_size=page_size, fresh=fresh and not cursor)
+
+	@server.tool("ytm_liked_songs_sync")
+	def ytm_liked_songs_sync(full: bool = False):
+		"""Sync liked songs into the local snapshot (incremental unless full=true)."""
+		return sync_liked_songs(full=full)
 
 	@server.tool("ytm_takeout_parse")
-	def ytm_takeout_parse(file_path: str):
-		"""Parse Google Takeout JSON for YouTube/YouTube Music likes into model-friendly schema."""
+	def ytm_takeout_parse(file_path: str, cursor: str = "", limit: int = 500, since: str = "",
+			until: str = "", artist: str = "", dedup: bool = True):
+		"""Parse Google Takeout JSON for YouTube/YouTube Music likes into model-friendly schema.
+
+		The file is streamed; results come in batches of `limit`. Pass the returned
+		next_cursor to continue (null when done). Optional filters: since/until (ISO
+		dates, e.g. 2024-01-01), artist (substring); dedup drops repeated youtube_ids.
+		"""
 		try:
-			with open(file_path, "r", encoding="utf-8") as f:
-				blob = json.load(f)
-		except Exception as e:
+			return parse_takeout(
+				file_path, cursor=cursor or None, limit=limit, since=since or None,
+				until=until or None, artist=artist or None, dedup=dedup
+			)
+		except FileNotFoundError as e:
 			return {"error": f"Failed to read {file_path}: {e}"}
-		items = []
-		def push(item):
-			if not isinstance(item, dict):
-				return
-			title = item.get("title") or item.get("titleUrl") or item.get("mediaTitle")
-			artists = []
-			for f in (item.get("subtitles") or []):
-				name = f.get("name")
-				if name:
-					artists.append(name)
-			video_id = None
-			url = item.get("titleUrl") or item.get("url")
-			if url and "watch?v=" in url:
-				try:
-					video_id = url.split("watch?v=", 1)[1].split("&", 1)[0]
-				except Exception:
-					video_id = None
-			items.append({
-				"title": title,
-				"artist": ", ".join(artists) if artists else None,
-				"album": None,
-				"duration": None,
-				"liked_date": item.get("time") or item.get("creationTime"),
-				"youtube_id": video_id,
-				"url": url
-			})
-		if isinstance(blob, list):
-			for it in blob:
-				push(it)
-		elif isinstance(blob, dict):
-			for key in ("items", "likes", "myActivity", "records"):
-				arr = blob.get(key)
-				if isinstance(arr, list):
-					for it in arr:
-						push(it)
-		return {"liked_songs": items}
+		except ValueError as e:
+			return {"error": str(e)}
 
 
 # Public helpers for direct app usage
 
+MISSING_HEADERS = {"error": "Missing YTMusic auth headers.", "how_to": "Export headers via ytmusicapi.setup and set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}
+
+
 def list_liked_songs_free(limit: int = 50):
 	ytm = _ytm()
 	if ytm is None:
-		return {"error": "Missing YTMusic auth headers.", "how_to": "Export headers via ytmusicapi.setup and set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}
+		return dict(MISSING_HEADERS)
 	try:
-		data = ytm.get_liked_songs(limit=limit)
-		tracks = (data or {}).get("tracks", [])
-		return [_map_track(t) for t in tracks[:limit]]
+		return _liked_cache.get(("free", limit), lambda: _fetch_liked(ytm, limit))
 	except Exception as e:
 		return {"error": str(e)}
 
 
-def list_liked_songs_all():
+def list_liked_songs_all(fresh: bool = False):
+	"""Every liked song (limit 10000); `fresh` skips the in-memory cache."""
+	ytm = _ytm()
+	if ytm is None:
+		return dict(MISSING_HEADERS)
+	try:
+		if fresh:
+			items = _fetch_liked(ytm, 10000)
+			_liked_cache.set(("all",), items)
+			return items
+		return _liked_cache.get(("all",), lambda: _fetch_liked(ytm, 10000))
+	except Exception as e:
+		return {"error": str(e)}
+
+
+def invalidate_liked_songs():
+	"""Drop cached liked-song results (the client itself is kept)."""
+	_liked_cache.invalidate()
+
+
+def _full_sync_due() -> bool:
+	state = store.sync_state("ytmusic", "full")
+	return state is None or time.time() - state["synced_at"] >= FULL_SYNC_INTERVAL
+
+
+def sync_liked_songs(full: bool = False):
+	"""Bring the local liked-songs snapshot up to date; returns a summary or an error dict.
+
+	Incremental by default: fetch the newest `SYNC_FIRST_PAGE` likes (growing the limit
+	geometrically) until a song already in the snapshot shows up, then prepend only
+	what is new. Unlikes are only noticed by a full resync, which runs when `full`
+	is set, when there is no snapshot, or every YTM_FULL_SYNC_INTERVAL seconds.
+	"""
 	ytm = _ytm()
 	if ytm is None:
-		return {"error": "Missing YTMusic auth headers.", "how_to": "Export headers via ytmusicapi.setup and set YTMUSIC_HEADERS_FILE or YTMUSIC_HEADERS_JSON."}
+		return dict(MISSING_HEADERS)
+	known = set()
+	if not full:
+		try:
+			if store.has_snapshot("ytmusic") and not _full_sync_due():
+				known = set(store.newest_liked_ids(SYNC_ANCHORS))
+		except Exception:
+			known = set()
+	limit = SYNC_FIRST_PAGE if known else 10000
+	try:
+		while True:
+			tracks = _fetch_liked(ytm, limit)
+			if known:
+				boundary = next((i for i, t in enumerate(tracks) if t.get("youtube_id") in known), None)
+				if boundary is not None:
+					store.prepend_liked_songs(tracks[:boundary])
+					invalidate_liked_songs()
+					return {"mode": "incremental", "added": boundary, "fetched": len(tracks), "total": store.count_liked_songs()}
+			if len(tracks) < limit or limit >= 10000:
+				break
+			limit = min(limit * 4, 10000)
+	except Exception as e:
+		return {"error": str(e)}
+	store.save_liked_songs(tracks)
+	invalidate_liked_songs()
+	_liked_cache.set(("all",), tracks)
+	return {"mode": "full", "added": len(tracks), "fetched": len(tracks), "total": len(tracks)}
+
+
+def _ensure_snapshot(fresh: bool = False):
+	"""Sync first when `fresh`, never synced or stale; returns an error dict or None."""
+	try:
+		if not fresh and store.has_snapshot("ytmusic", max_age=max_age("ytmusic")):
+			return None
+	except Exception:
+		pass
+	res = sync_liked_songs()
+	if res.get("error") and not fresh:
+		try:
+			if store.has_snapshot("ytmusic"):
+				return None  # sync failed: a stale snapshot beats no answer
+		except Exception:
+			pass
+	return res if res.get("error") else None
+
+
+def iter_liked_songs(page_size: int = 500, fresh: bool = False):
+	"""Yield liked songs (newest first) from the local snapshot, one page in memory at a time."""
+	err = _ensure_snapshot(fresh)
+	if err:
+		raise RuntimeError(err["error"])
+	position = None
+	while True:
+		rows = store.load_liked_songs_after(position, page_size)
+		for row in rows:
+			position = row.pop("position")
+			yield row
+		if len(rows) < page_size:
+			return
+
+
+def liked_songs_page(cursor: str | None = None, page_size: int = 500, fresh: bool = False):
+	"""One page of liked songs plus an opaque `next_cursor` (None on the last page)."""
+	err = _ensure_snapshot(fresh)
+	if err:
+		return err
+	page_size = max(1, min(page_size, 5000))
+	try:
+		after = int(cursor) if cursor else None
+	except ValueError:
+		return {"error": f"Invalid cursor '{cursor}'"}
+	try:
+		rows = store.load_liked_songs_after(after, page_size + 1)
+		total = store.count_liked_songs()
+	except Exception as e:
+		return {"error": str(e)}
+	more = len(rows) > page_size
+	rows = rows[:page_size]
+	next_cursor = str(rows[-1]["position"]) if more and rows else None
+	for row in rows:
+		del row["position"]
+	return {"liked_songs": rows, "next_cursor": next_cursor, "total": total}
+
+
+def liked_songs_all(fresh: bool = False):
+	"""Every liked song from the snapshot store; synced first when `fresh`, never synced or stale."""
+	err = _ensure_snapshot(fresh)
+	if err:
+		return err
 	try:
-		data = ytm.get_liked_songs(limit=10000)
-		tracks = (data or {}).get("tracks", [])
-		return [_map_track(t) for t in tracks]
+		return store.load_liked_songs()
 	except Exception as e:
 		return {"error": str(e)}
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Services read these at import time; keep tests off the real store and network
+os.environ.setdefault("HUB_SYNC", "0")
+os.environ.setdefault("HUB_DB_PATH", os.path.join(os.environ.get("TMPDIR", "/tmp"), f"hub-tests-{os.getpid()}.db"))
@@ -0,0 +1,61 @@
+import pytest
+
+import app as flask_app
+from mcp_server import lmstudio, store
+from mcp_server.answer_cache import AnswerCache
+
+
+def test_recent_answer_needs_the_same_scope():
+	cache = AnswerCache(disk=False)
+	cache.put("How many games?", "fp1", "42", scope="steam@1")
+	answer, meta, fp = cache.get_recent("how many games", "steam@1")
+	assert answer == "42" and fp == "fp1" and meta["hit"]
+	assert cache.get_recent("how many games", "steam@2") == (None, None, None)
+	cache.put("How many games?", "fp2", "43", scope="steam@1")
+	assert cache.get_recent("how many games", "steam@1")[0] == "43"
+
+
+@pytest.fixture
+def client(monkeypatch):
+	calls = {"context": 0, "llm": 0}
+
+	def gather(query, providers=None):
+		calls["context"] += 1
+		return {"notes": {"matches": []}}, {"notes": {"status": "ok", "ms": 1.0}}
+
+	def chat(messages, temperature=0.2):
+		calls["llm"] += 1
+		return "an answer"
+
+	monkeypatch.setattr(flask_app, "gather_context", gather)
+	monkeypatch.setattr(flask_app, "route_intent", lambda q: None)
+	monkeypatch.setattr(lmstudio, "chat", chat)
+	monkeypatch.setattr(lmstudio, "cache", AnswerCache(disk=False))
+	monkeypatch.setattr(lmstudio, "CACHE_ENABLED", True)
+	return flask_app.app.test_client(), calls
+
+
+def test_repeat_skips_context_gathering(client):
+	http, calls = client
+	first = http.post("/ask", data={"query": "what did I write about tomatoes"}).get_json()
+	second = http.post("/ask", data={"query": "What did I write about tomatoes?"}).get_json()
+	assert first["answer"] == second["answer"] == "an answer"
+	assert second["cache"]["hit"] and "context_age_s" in second["cache"]
+	assert calls == {"context": 1, "llm": 1}
+
+
+def test_sync_invalidates_the_shortcut(client):
+	http, calls = client
+	http.post("/ask", data={"query": "what did I write about basil"})
+	store.mark_synced("notes-test", "", "ok")
+	again = http.post("/ask", data={"query": "what did I write about basil"}).get_json()
+	assert again["cache"]["hit"]  # same context, so still no LM Studio call
+	assert calls == {"context": 2, "llm": 1}
+
+
+def test_stream_repeat_skips_context_gathering(client):
+	http, calls = client
+	http.post("/ask", data={"query": "notes about peppers"})
+	body = http.post("/ask/stream", data={"query": "notes about peppers"}).get_data(as_text=True)
+	assert "event: token" in body and "an answer" in body
+	assert calls == {"context": 1, "llm": 1}
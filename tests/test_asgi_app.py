@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+from starlette.testclient import TestClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_does_not_import_the_flask_app():
+	code = "import sys, asgi_app; print('app' in sys.modules, 'flask' in sys.modules)"
+	out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+	assert out.stdout.split() == ["False", "False"]
+
+
+def test_stream_falls_back_with_shared_payload(monkeypatch):
+	import asgi_app
+	from mcp_server import lmstudio
+
+	async def gather(query, providers=None):
+		return {}, {}
+
+	async def broken(messages, temperature=0.2):
+		raise RuntimeError("LM Studio is down")
+		yield
+
+	monkeypatch.setattr(asgi_app, "route_intent", lambda q: None)
+	monkeypatch.setattr(asgi_app, "agather_context", gather)
+	monkeypatch.setattr(lmstudio, "astream_chat", broken)
+	with TestClient(asgi_app.app) as client:
+		body = client.post("/ask/stream", data={"query": "anything new", "nocache": "1"}).text
+	assert "event: error" in body and "LM Studio is down" in body and body.endswith("event: done\ndata: {}\n\n")
@@ -0,0 +1,13 @@
+import pytest
+
+from mcp_server.context import select_providers
+
+
+@pytest.mark.parametrize("query, providers", [
+	("what genres are my steam games", ["steam"]),
+	("which genres do i listen to most", ["ytmusic"]),
+	("what music genres do i like", ["ytmusic"]),
+	("what did i commit to my github repo", ["github"]),
+])
+def test_selects_only_relevant_providers(query, providers):
+	assert select_providers(query) == providers
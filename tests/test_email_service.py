@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from benchmarks.bench_gmail import fake_gmail, make_mailbox
+from mcp_server import email_service, store
+
+MAILBOX = make_mailbox(120)
+
+
+@pytest.fixture
+def gmail(tmp_path, monkeypatch):
+	token = tmp_path / "token.json"
+	token.write_text(json.dumps({
+		"token": "stub", "refresh_token": "stub", "client_id": "stub", "client_secret": "stub", "expiry": "2099-01-01T00:00:00Z"
+	}))
+	monkeypatch.setenv("GMAIL_TOKEN_FILE", str(token))
+	with fake_gmail(MAILBOX, 0) as server:
+		monkeypatch.setattr(email_service, "API_ENDPOINT", server.url + "/")
+		monkeypatch.setattr(email_service, "_service", (None, None, None))
+		yield server
+
+
+def _ids(emails):
+	return [e["id"] for e in emails]
+
+
+def test_metadata_is_fetched_in_batches(gmail, monkeypatch):
+	monkeypatch.setattr(email_service, "BATCH_SIZE", 20)
+	gmail.reset_stats()
+	res = email_service.list_emails(max_results=50)
+	# One list call plus ceil(50 / 20) batch calls, not one GET per message
+	assert gmail.requests == 1 + 3
+	assert _ids(res["emails"]) == [m["id"] for m in MAILBOX[:50]]
+	first = res["emails"][0]
+	assert first["sender"] == "Sender 0 <s0@example.com>"
+	assert first["subject"] == "Subject 0"
+	assert first["thread_id"] == MAILBOX[0]["threadId"]
+	assert res["next_page_token"] == "50"
+
+
+def test_batch_reports_missing_messages(gmail):
+	emails = email_service._get_metadata(email_service._gmail(), [MAILBOX[0]["id"], "nope"])
+	assert emails[0]["subject"] == "Subject 0"
+	assert emails[1]["id"] == "nope" and "error" in emails[1]
+
+
+def test_live_paging_with_gmail_tokens(gmail):
+	first = email_service.list_emails(max_results=30)
+	second = email_service.list_emails(max_results=30, page_token=first["next_page_token"])
+	assert _ids(first["emails"] + second["emails"]) == [m["id"] for m in MAILBOX[:60]]
+
+
+def test_snapshot_pages_continue_live(gmail):
+	email_service.sync_emails(max_results=25)
+	gmail.reset_stats()
+	seen, token = [], None
+	while len(seen) < 70:
+		page = email_service.read_page(max_results=10, page_token=token)
+		assert page["emails"]
+		seen.extend(_ids(page["emails"]))
+		token = page["next_page_token"]
+	assert seen[:70] == [m["id"] for m in MAILBOX[:70]]
+	# Past the 25 synced messages the pages came from Gmail
+	assert gmail.requests > 0
+
+
+def test_snapshot_page_makes_no_upstream_calls(gmail):
+	email_service.sync_emails(max_results=25)
+	gmail.reset_stats()
+	page = email_service.read_page(max_results=10)
+	assert _ids(page["emails"]) == [m["id"] for m in MAILBOX[:10]]
+	assert page["next_page_token"] == "snapshot:10"
+	assert gmail.requests == 0
+
+
+def test_fresh_first_page_does_not_shorten_snapshot(gmail):
+	email_service.sync_emails(max_results=25)
+	fresh = email_service.read_page(max_results=5, fresh=True)
+	assert _ids(fresh["emails"]) == [m["id"] for m in MAILBOX[:5]]
+	assert _ids(store.load_emails()) == [m["id"] for m in MAILBOX[:25]]
+
+
+def test_error_rows_are_not_stored(gmail, monkeypatch):
+	email_service.sync_emails(max_results=25)
+	get_metadata = email_service._get_metadata
+
+	def flaky(service, ids):
+		return [{"id": e["id"], "error": "rate limited"} if e["id"] == MAILBOX[2]["id"] else e for e in get_metadata(service, ids)]
+
+	monkeypatch.setattr(email_service, "_get_metadata", flaky)
+	email_service.read_page(max_results=5, fresh=True)
+	email_service.sync_emails(max_results=25)
+	rows = store.load_emails()
+	assert len(rows) == 25 and MAILBOX[2]["id"] in _ids(rows)
+	assert all(r["subject"] for r in rows)
@@ -0,0 +1,111 @@
+import codecs
+
+import pytest
+
+from mcp_server import file_service
+from mcp_server.file_service import text_window
+
+LINES = "".join(f"line {n}\n" for n in range(1, 11))
+
+
+@pytest.mark.parametrize("encoding, data", [
+	("utf-8", LINES.encode("utf-8")),
+	("utf-8", codecs.BOM_UTF8 + LINES.encode("utf-8")),
+	("utf-16-le", codecs.BOM_UTF16_LE + LINES.encode("utf-16-le")),
+	("utf-16-be", LINES.encode("utf-16-be")),
+])
+def test_line_windows(encoding, data):
+	assert text_window(data, encoding, line_start=3, line_count=2)["content"] == "line 3\nline 4\n"
+	assert text_window(data, encoding, head=2)["content"] == "line 1\nline 2\n"
+	assert text_window(data, encoding, tail=2)["content"] == "line 9\nline 10\n"
+	assert text_window(data, encoding, line_start=10)["content"] == "line 10\n"
+	assert text_window(data, encoding)["content"] == LINES
+
+
+def test_utf16_detected_without_bom():
+	assert file_service.detect_encoding(LINES.encode("utf-16-le")) == "utf-16-le"
+	assert file_service.detect_encoding(LINES.encode("utf-16-be")) == "utf-16-be"
+
+
+def test_multibyte_character_is_not_split_at_the_edges():
+	data = "aé€😀b".encode("utf-8")  # 1 + 2 + 3 + 4 + 1 bytes
+	for start in range(len(data)):
+		for length in range(1, len(data) - start + 1):
+			res = text_window(data, "utf-8", offset=start, length=length)
+			assert "�" not in res["content"]
+			assert data[res["start"]:res["end"]].decode("utf-8") == res["content"]
+
+
+def test_truncated_window_continues_from_end():
+	data = ("ab€" * 1000).encode("utf-8")
+	parts, offset = [], 0
+	while offset < len(data):
+		res = text_window(data, "utf-8", offset=offset, max_bytes=100)
+		assert res["end"] - res["start"] <= 100
+		assert res["truncated"] == (len(data) - offset > 100)
+		parts.append(res["content"])
+		offset = res["end"]
+	assert "".join(parts) == "ab€" * 1000
+
+
+def test_truncated_tail_keeps_the_end():
+	data = LINES.encode("utf-16-le")
+	res = text_window(data, "utf-16-le", tail=10, max_bytes=20)
+	assert res["truncated"] and res["end"] == len(data)
+	assert LINES.endswith(res["content"])
+
+
+def test_snippet_reads_a_bounded_prefix(tmp_path, monkeypatch):
+	(tmp_path / "big.txt").write_text("intro\n" + "filler\n" * 1000 + "needle late\n")
+	(tmp_path / "small.txt").write_text("intro\nneedle early\n")
+	monkeypatch.setattr(file_service, "SNIPPET_SCAN_BYTES", 1024)
+	monkeypatch.setattr(file_service, "read_local_text_file", None)  # never reads a whole note
+	hits = {h["name"]: h["snippet"] for h in file_service.search_local_text_files("needle", notes_dir=str(tmp_path))}
+	assert hits["small.txt"] == "needle early"
+	assert hits["big.txt"].startswith("intro\nfiller")  # the match is past the scanned prefix
+
+
+def _index(tmp_path):
+	return file_service.NotesIndex(str(tmp_path))
+
+
+def test_bm25_ranks_the_best_note_first(tmp_path):
+	(tmp_path / "a.txt").write_text("garden tomatoes and basil\n" + "weather notes\n" * 20)
+	(tmp_path / "b.txt").write_text("tomatoes tomatoes tomatoes in the garden\n")
+	(tmp_path / "c.txt").write_text("meeting notes about budgets\n")
+	index = _index(tmp_path)
+	assert index.refresh() == 3
+	ranked = index.search("garden tomatoes")
+	assert [name for name, _ in ranked] == ["b.txt", "a.txt"]
+	assert ranked[0][1] > ranked[1][1] > 0
+
+
+def test_refresh_picks_up_added_changed_and_deleted_notes(tmp_path):
+	(tmp_path / "a.txt").write_text("alpha\n")
+	(tmp_path / "b.txt").write_text("beta\n")
+	index = _index(tmp_path)
+	index.refresh()
+	(tmp_path / "c.txt").write_text("gamma\n")
+	(tmp_path / "a.txt").write_text("alpha changed to delta\n")
+	(tmp_path / "b.txt").unlink()
+	assert index.refresh() == 3
+	assert [n for n, _ in index.search("delta")] == ["a.txt"]
+	assert [n for n, _ in index.search("gamma")] == ["c.txt"]
+	assert index.search("beta") == []
+	assert index.refresh() == 0
+	# The persisted index is reloaded without re-reading unchanged notes
+	assert _index(tmp_path).refresh() == 0
+
+
+def test_search_rescans_only_when_stale(tmp_path, monkeypatch):
+	(tmp_path / "a.txt").write_text("alpha\n")
+	index = _index(tmp_path)
+	index.search("alpha")
+	scans = []
+	refresh = index.refresh
+	monkeypatch.setattr(index, "refresh", lambda: scans.append(1) or refresh())
+	index.search("alpha")
+	assert scans == []
+	monkeypatch.setattr(file_service, "REFRESH_INTERVAL", 0)
+	index.search("alpha")
+	assert scans == [1]
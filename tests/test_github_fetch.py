@@ -0,0 +1,38 @@
+import pytest
+
+from benchmarks.stub_server import StubServer
+from mcp_server import github_fetch
+
+
+@pytest.fixture
+def stub():
+	seen = []
+
+	def repo(handler):
+		auth = handler.headers.get("Authorization")
+		seen.append((auth, handler.headers.get("If-None-Match")))
+		if handler.headers.get("If-None-Match") == '"v1"':
+			return 304, {"ETag": '"v1"'}, b""
+		return 200, {"ETag": '"v1"'}, {"owner": auth}
+
+	def broken(handler):
+		return 502, {"Content-Type": "text/html"}, "<html>Bad gateway</html>"
+
+	with StubServer(routes={"/repo": repo, "/broken": broken}) as server:
+		yield server.url, seen
+
+
+def test_validators_are_kept_per_token(stub):
+	url, seen = stub
+	a = github_fetch.fetch(f"{url}/repo", headers={"Authorization": "token a"})[0]
+	b = github_fetch.fetch(f"{url}/repo", headers={"Authorization": "token b"})[0]
+	assert a == {"owner": "token a"} and b == {"owner": "token b"}
+	assert seen == [("token a", None), ("token b", None)]
+	assert github_fetch.fetch(f"{url}/repo", headers={"Authorization": "token a"})[0] == a
+	assert seen[-1] == ("token a", '"v1"')
+
+
+def test_non_json_error_body_is_an_error_payload(stub):
+	url, _ = stub
+	data, last_page = github_fetch.fetch(f"{url}/broken", headers={})
+	assert data == {"message": "GitHub returned HTTP 502"} and last_page == 1
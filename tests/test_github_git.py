@@ -0,0 +1,137 @@
+import hashlib
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from mcp_server import github_git, github_service
+
+
+def _sha(data: bytes) -> str:
+	return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+FILES = {
+	"README.md": b"# demo\n",
+	"src/app.py": b"".join(b"line %d\n" % i for i in range(1, 201)),
+	"src/lib/util.py": b"def f():\n\treturn 1\n",
+	"docs/guide/intro.md": b"# demo\n",  # same content as README.md
+	"docs/api.md": b"api\n",
+}
+
+
+def _trees():
+	"""Tree objects by sha: {sha: [(name, type, sha, size)]}, plus the root sha."""
+	dirs = {"": {}}
+	for path in FILES:
+		parts = path.split("/")
+		for i in range(1, len(parts)):
+			dirs.setdefault("/".join(parts[:i]), {})
+	for path, data in FILES.items():
+		parent, _, name = path.rpartition("/")
+		dirs[parent][name] = ("blob", _sha(data), len(data))
+	shas = {}
+	for d in sorted(dirs, key=lambda d: -d.count("/") - bool(d)):
+		sha = hashlib.sha1(("tree:" + d).encode()).hexdigest()
+		shas[d] = sha
+		if d:
+			parent, _, name = d.rpartition("/")
+			dirs[parent][name] = ("tree", sha, None)
+	return {shas[d]: dirs[d] for d in dirs}, shas[""]
+
+
+@pytest.fixture
+def github(tmp_path, monkeypatch):
+	trees, root = _trees()
+	blobs = {_sha(data): data for data in FILES.values()}
+	calls = {"recursive": [], "flat": [], "blobs": []}
+	truncate = set()  # tree shas whose recursive listing is "too large"
+
+	def listing(sha, recursive, prefix=""):
+		out = []
+		for name, (kind, child, size) in sorted(trees[sha].items()):
+			out.append({"path": prefix + name, "mode": "040000" if kind == "tree" else "100644", "type": kind, "sha": child, "size": size})
+			if recursive and kind == "tree":
+				out.extend(listing(child, True, prefix + name + "/"))
+		return out
+
+	def route(handler):
+		parts = urlsplit(handler.path)
+		segments = parts.path.strip("/").split("/")
+		if segments[3:5] == ["git", "trees"]:
+			sha = root if segments[5] in ("HEAD", "main") else segments[5]
+			recursive = "recursive" in parse_qs(parts.query)
+			calls["recursive" if recursive else "flat"].append(sha)
+			if recursive and sha in truncate:
+				return 200, {}, {"sha": sha, "truncated": True, "tree": listing(sha, False)[:1]}
+			return 200, {}, {"sha": sha, "truncated": False, "tree": listing(sha, recursive)}
+		if segments[3:5] == ["git", "blobs"]:
+			calls["blobs"].append(segments[5])
+			return 200, {"Content-Type": "application/vnd.github.raw+json"}, blobs[segments[5]]
+		return 404, {}, {"message": "Not Found"}
+
+	with StubServer(prefix_routes=[("/", route)]) as stub:
+		monkeypatch.setattr(github_git, "API_ROOT", stub.url)
+		monkeypatch.setattr(github_git, "BLOB_DIR", str(tmp_path / "blobs"))
+		monkeypatch.setattr(github_git, "_cache_bytes", None)
+		tools = {}
+
+		class Server:
+			def tool(self, name):
+				def register(fn):
+					tools[name] = fn
+					return fn
+				return register
+
+		github_service.register(Server())
+		yield tools, calls, truncate, trees, root
+
+
+def _paths(items):
+	return sorted(i["path"] for i in items)
+
+
+def test_recursive_listing_is_one_call(github):
+	tools, calls, *_ = github
+	items = tools["github_list_files"]("u", "r", recursive=True)
+	assert [p for p in _paths(items) if "." in p] == sorted(FILES)
+	assert len(calls["recursive"]) == 1 and not calls["flat"]
+	assert _paths(tools["github_list_files"]("u", "r", path="src")) == ["src/app.py", "src/lib"]
+
+
+def test_truncated_tree_is_walked_by_subtree(github):
+	tools, calls, truncate, trees, root = github
+	truncate.add(root)
+	docs = trees[root]["docs"][1]
+	truncate.add(docs)  # a subtree that is still too large is listed level by level
+	items = tools["github_list_files"]("u", "r", recursive=True)
+	assert isinstance(items, list)
+	assert [p for p in _paths(items) if "." in p] == sorted(FILES)
+	assert "docs/guide" in _paths(items)
+
+
+def test_walk_reports_truncation_when_out_of_calls(github, monkeypatch):
+	tools, calls, truncate, trees, root = github
+	truncate.add(root)
+	monkeypatch.setattr(github_git, "WALK_MAX_CALLS", 2)
+	res = tools["github_list_files"]("u", "r", recursive=True)
+	assert res["truncated"] is True and res["warning"]
+	assert len(res["entries"]) < len(FILES) + 4
+
+
+def test_blobs_are_downloaded_once_per_sha(github):
+	tools, calls, *_ = github
+	a = tools["github_file_content"]("u", "r", "README.md")
+	b = tools["github_file_content"]("u", "r", "docs/guide/intro.md", ref="main")
+	assert a["content"] == b["content"] == "# demo\n"
+	assert a["sha"] == b["sha"]
+	assert calls["blobs"] == [a["sha"]]
+
+
+def test_line_window(github):
+	tools, *_ = github
+	res = tools["github_file_content"]("u", "r", "src/app.py", line_start=10, line_count=2)
+	assert res["content"] == "line 10\nline 11\n"
+	assert res["end"] < res["size"]
+	assert tools["github_file_content"]("u", "r", "src/app.py", tail=1)["content"] == "line 200\n"
+	assert "error" in tools["github_file_content"]("u", "r", "src")
@@ -0,0 +1,57 @@
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from benchmarks.stub_server import StubServer
+from mcp_server import github_service, store
+
+COMMITS = 350
+
+
+@pytest.fixture
+def github(monkeypatch):
+	user, repo = "u", f"history-{id(monkeypatch)}"
+
+	def commits(handler):
+		query = parse_qs(urlsplit(handler.path).query)
+		page, per_page = int(query.get("page", ["1"])[0]), int(query.get("per_page", ["30"])[0])
+		last = -(-COMMITS // per_page)
+		start = (page - 1) * per_page
+		rows = [{"sha": f"{n:040x}", "commit": {"message": f"commit {n}"}} for n in range(start, min(start + per_page, COMMITS))]
+		url = f"http://{handler.headers['Host']}{urlsplit(handler.path).path}"
+		return 200, {"Link": f'<{url}?per_page={per_page}&page={last}>; rel="last"'}, rows
+
+	with StubServer(prefix_routes=[(f"/repos/{user}/{repo}/commits", commits)]) as stub:
+		monkeypatch.setattr(github_service, "API_ROOT", stub.url)
+		tools = {}
+
+		class Server:
+			def tool(self, name):
+				def register(fn):
+					tools[name] = fn
+					return fn
+				return register
+
+		github_service.register(Server())
+		yield tools, user, repo
+
+
+def test_full_history_is_snapshotted(github):
+	tools, user, repo = github
+	assert len(tools["github_commits_all"](user, repo, fresh=True)) == COMMITS
+	assert store.has_snapshot("github", f"{user}/{repo}")
+	assert len(tools["github_commits_paginated"](user, repo, page=4)) == COMMITS - 300
+
+
+def test_short_history_does_not_replace_snapshot(github):
+	tools, user, repo = github
+	tools["github_commits_all"](user, repo, fresh=True)
+	assert len(tools["github_commits_all"](user, repo, max_pages=1, fresh=True)) == 100
+	assert len(tools["github_commits_paginated"](user, repo, page=2)) == 100
+	assert len(tools["github_commits_all"](user, repo, max_pages=2)) == 200
+
+
+def test_short_history_is_not_snapshotted(github):
+	tools, user, repo = github
+	tools["github_commits_all"](user, repo, max_pages=1, fresh=True)
+	assert not store.has_snapshot("github", f"{user}/{repo}")
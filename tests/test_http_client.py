@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from benchmarks.stub_server import StubServer, json_route
+from mcp_server import http_client
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+	"""Record backoff sleeps instead of waiting."""
+	calls = []
+	monkeypatch.setattr(http_client.time, "sleep", calls.append)
+	return calls
+
+
+def scripted(*responses):
+	"""Route answering with the given (status, headers) in order, then 200 forever."""
+	queue = list(responses)
+
+	def route(handler):
+		status, headers = queue.pop(0) if queue else (200, {})
+		return status, headers, {"status": status}
+	return route
+
+
+def test_keeps_one_connection_per_host():
+	with StubServer({"/ok": json_route({"ok": True})}) as stub:
+		for _ in range(20):
+			assert http_client.get(stub.url + "/ok").json() == {"ok": True}
+		assert stub.requests == 20
+		assert stub.connections == 1
+
+
+def test_concurrent_requests_reuse_pooled_connections():
+	with StubServer({"/ok": json_route({"ok": True})}) as stub:
+		with ThreadPoolExecutor(max_workers=4) as pool:
+			list(pool.map(lambda _: http_client.get(stub.url + "/ok").status_code, range(40)))
+		assert stub.requests == 40
+		assert stub.connections <= min(4, http_client.POOL_SIZE)
+
+
+def test_retries_server_errors_with_backoff(sleeps):
+	with StubServer({"/flaky": scripted((503, {}), (502, {}))}) as stub:
+		resp = http_client.get(stub.url + "/flaky", retries=3)
+		assert resp.status_code == 200
+		assert stub.requests == 3
+	assert len(sleeps) == 2
+	assert 0 <= sleeps[0] <= http_client.BACKOFF_BASE
+	assert 0 <= sleeps[1] <= http_client.BACKOFF_BASE * 2
+
+
+def test_returns_last_response_when_retries_run_out(sleeps):
+	with StubServer({"/down": scripted(*[(500, {})] * 10)}) as stub:
+		resp = http_client.get(stub.url + "/down", retries=2)
+		assert resp.status_code == 500
+		assert stub.requests == 3
+
+
+def test_honours_retry_after(sleeps):
+	with StubServer({"/limited": scripted((429, {"Retry-After": "2"}))}) as stub:
+		assert http_client.get(stub.url + "/limited", retries=1).status_code == 200
+	assert 2 <= sleeps[0] <= 2 + http_client.BACKOFF_BASE
+
+
+def test_does_not_wait_past_backoff_max(sleeps):
+	wait = str(int(http_client.BACKOFF_MAX) + 60)
+	with StubServer({"/limited": scripted((429, {"Retry-After": wait}))}) as stub:
+		resp = http_client.get(stub.url + "/limited", retries=3)
+		assert resp.status_code == 429
+		assert stub.requests == 1
+	assert sleeps == []
+
+
+def test_github_rate_limit_403_is_retried_other_403_is_not(sleeps):
+	limited = (403, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(http_client.time.time()) + 1)})
+	with StubServer({"/limited": scripted(limited), "/forbidden": scripted((403, {}))}) as stub:
+		assert http_client.get(stub.url + "/limited", retries=1).status_code == 200
+		assert http_client.get(stub.url + "/forbidden", retries=3).status_code == 403
+		assert stub.requests == 3
+
+
+def test_post_is_not_retried_by_default(sleeps):
+	with StubServer({"/submit": scripted((503, {}))}) as stub:
+		assert http_client.post(stub.url + "/submit").status_code == 503
+		assert stub.requests == 1
+	assert sleeps == []
+
+
+def test_connection_errors_are_retried_then_raised(sleeps):
+	stub = StubServer().start()
+	url = stub.url
+	stub.stop()
+	with pytest.raises(requests.ConnectionError):
+		http_client.get(url + "/gone", retries=2, timeout=2)
+	assert len(sleeps) == 2
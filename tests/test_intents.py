@@ -0,0 +1,20 @@
+import pytest
+
+from mcp_server.intents import router
+
+
+@pytest.mark.parametrize("query, intent", [
+	("how many games do i own", "steam.count"),
+	("what games do i have", "steam.count"),
+	("what is my achievement completion rate?", "steam.achievements"),
+	("how many achievements have i unlocked", "steam.achievements"),
+	("which games are 100% complete", "steam.achievements"),
+	("list my steam games", "steam.games"),
+])
+def test_routes_to_intent(query, intent):
+	matches = router.match(query)
+	assert matches and matches[0][1].name == intent
+
+
+def test_mentioning_achievements_is_not_enough():
+	assert all(m[1].name != "steam.achievements" for m in router.match("read the notes about achievements in elden ring"))
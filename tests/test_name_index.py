@@ -0,0 +1,33 @@
+import pytest
+
+from mcp_server import name_index
+from mcp_server.name_index import NameIndex
+
+
+@pytest.mark.parametrize("names, query", [
+	(["Portal 2™", "Portal 2", "Portal"], "Portal 2"),
+	(["Portal 2", "Portal 2™", "Portal"], "Portal 2™"),
+	(["PORTAL 2", "Pórtal 2", "Portal 2"], "Portal 2"),
+])
+def test_raw_match_wins_normalized_tie(names, query):
+	hits = NameIndex(names).search(query, k=3)
+	assert names[hits[0][0]] == query
+
+
+def test_closest_name_ranks_first():
+	names = ["Half-Life", "Half-Life 2", "Portal", "Portal 2"]
+	hits = NameIndex(names).search("half life 2", k=2)
+	assert names[hits[0][0]] == "Half-Life 2"
+
+
+def test_common_trigrams_are_skipped_past_the_budget(monkeypatch):
+	monkeypatch.setattr(name_index, "POSTINGS_BUDGET", 50)
+	names = [f"Star Wars Episode {i}" for i in range(500)] + ["Stardew Valley"]
+	hits = NameIndex(names).search("stardew valey", k=3)
+	assert names[hits[0][0]] == "Stardew Valley"
+
+
+def test_rerank_stops_once_top_k_is_settled():
+	names = ["Portal 2", "Portal", "Portal Knights", "Portal Stories Mel", "Porta Prod"]
+	index = NameIndex(names)
+	assert index.search("portal 2", k=1, rerank=5) == index.search("portal 2", k=5, rerank=5)[:1]
@@ -0,0 +1,21 @@
+from types import SimpleNamespace
+
+from mcp_server import steam_enrich, store
+
+
+class Library(SimpleNamespace):
+	def __len__(self):
+		return len(self.appids)
+
+
+def test_breakdown_reports_pending_games(monkeypatch):
+	library = Library(appids=[901, 902, 903, 904], forever=[600, 120, 60, 30])
+	monkeypatch.setattr(steam_enrich, "owned_library", lambda: library)
+	store.save_app_details([
+		(901, True, {"genres": ["RPG"], "type": "game"}),
+		(902, True, {"genres": ["RPG", "Indie"], "type": "game"}),
+		(903, False, None),
+	])
+	res = steam_enrich.breakdown(by="genre")
+	assert res["coverage"] == {"owned": 4, "enriched": 2, "not_in_store": 1, "pending": 1, "pct": 50.0}
+	assert res["top"][0] == {"genre": "RPG", "games": 2, "minutes": 720, "hours": 12.0}
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from mcp_server import store, sync_service
+
+
+@pytest.fixture
+def job(monkeypatch):
+	source = f"test-{id(monkeypatch)}"
+	calls = []
+	started, release = threading.Event(), threading.Event()
+
+	def run(deadline):
+		calls.append(deadline)
+		started.set()
+		release.wait(5)
+		return "ok"
+
+	monkeypatch.setitem(sync_service.JOBS, source, (run, 600, 30))
+	yield source, calls, started, release
+	release.set()
+
+
+def test_job_runs_once_while_leased(job):
+	source, calls, started, release = job
+	worker = threading.Thread(target=sync_service.run_job, args=(source,))
+	worker.start()
+	assert started.wait(5)
+	assert sync_service.run_job(source)["status"] == "running"
+	release.set()
+	worker.join(5)
+	assert len(calls) == 1
+	assert store.sync_state(source, sync_service.JOB_SCOPE)["status"] == "ok"
+
+
+def test_due_run_skips_a_job_another_process_just_ran(job):
+	source, calls, started, release = job
+	release.set()
+	store.mark_synced(source, sync_service.JOB_SCOPE, "ok")
+	assert sync_service.run_job(source, due=True)["status"] == "not_due"
+	assert sync_service.run_job(source)["status"] == "ok"
+	assert len(calls) == 1
+
+
+def test_lease_expires(job):
+	source, *_ = job
+	assert store.acquire_lease(source, "other", -1)
+	assert store.acquire_lease(source, "me", 10)
+	assert not store.acquire_lease(source, "other", 10)
+	store.release_lease(source, "me")
+	assert store.acquire_lease(source, "other", 10)
+
+
+def test_partial_run_is_due_again_after_the_backlog_interval(job, monkeypatch):
+	source, calls, started, release = job
+	release.set()
+	monkeypatch.setitem(sync_service.BACKLOG_INTERVALS, source, 0)
+	store.mark_synced(source, sync_service.JOB_SCOPE, "partial")
+	assert sync_service.run_job(source, due=True)["status"] == "ok"
+	assert sync_service.run_job(source, due=True)["status"] == "not_due"
+	assert len(calls) == 1
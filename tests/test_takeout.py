@@ -0,0 +1,64 @@
+import codecs
+import json
+
+import pytest
+
+from mcp_server.takeout import TakeoutStream, parse_takeout
+
+
+def _records(n):
+	return [
+		{"title": f"Liked Song {i}", "titleUrl": f"https://music.youtube.com/watch?v=vid{i:04d}", "time": f"2024-01-01T00:00:{i % 60:02d}Z"}
+		for i in range(n)
+	]
+
+
+def _page_all(path, limit, **kwargs):
+	songs, cursor = [], None
+	while True:
+		page = parse_takeout(path, cursor=cursor, limit=limit, **kwargs)
+		songs.extend(page["liked_songs"])
+		cursor = page["next_cursor"]
+		if cursor is None:
+			return songs
+
+
+@pytest.mark.parametrize("bom", [b"", codecs.BOM_UTF8])
+@pytest.mark.parametrize("chunk", [64, 4096])
+def test_resume_pages_through_whole_file(tmp_path, monkeypatch, bom, chunk):
+	monkeypatch.setattr("mcp_server.takeout.CHUNK_SIZE", chunk)
+	path = tmp_path / "liked.json"
+	path.write_bytes(bom + json.dumps(_records(50), ensure_ascii=False).encode("utf-8"))
+	songs = _page_all(str(path), 7, dedup=False)
+	assert [s["youtube_id"] for s in songs] == [f"vid{i:04d}" for i in range(50)]
+
+
+def test_cursor_counts_input_bytes_past_invalid_utf8(tmp_path):
+	records = _records(20)
+	raw = json.dumps(records).encode("utf-8").replace(b"Liked Song 3", b"Liked \xff\xfeSong 3")
+	path = tmp_path / "liked.json"
+	path.write_bytes(codecs.BOM_UTF8 + raw)
+	songs = _page_all(str(path), 3, dedup=False)
+	assert len(songs) == 20
+	assert songs[3]["title"] == "Liked \ufffdSong 3"
+	assert songs[4]["title"] == "Liked Song 4"
+
+
+def test_position_is_byte_offset_after_element(tmp_path):
+	data = codecs.BOM_UTF8 + '[{"title": "Zoë"}, {"title": "b"}]'.encode("utf-8")
+	path = tmp_path / "t.json"
+	path.write_bytes(data)
+	with TakeoutStream(str(path)) as stream:
+		items = iter(stream)
+		assert next(items) == {"title": "Zoë"}
+		mode, offset = stream.position().split(":")
+	assert mode == "a"
+	assert data[int(offset):].lstrip().startswith(b", {")
+	with TakeoutStream(str(path), f"{mode}:{offset}") as stream:
+		assert list(stream) == [{"title": "b"}]
+
+
+def test_object_with_items_key(tmp_path):
+	path = tmp_path / "t.json"
+	path.write_text(json.dumps({"meta": {"x": 1}, "items": _records(5), "tail": []}), encoding="utf-8")
+	assert len(_page_all(str(path), 2)) == 5